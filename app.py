@@ -1,9 +1,18 @@
+import time
+import uuid
+
 import streamlit as st
-import requests
-import pandas as pd
-import re
-import matplotlib.pyplot as plt
-import numpy as np
+from core.cache import get_cache
+from core.client import OpenRouterError
+from core.jobs import ANTRI, GAGAL, get_executor
+from core.parsers import get_ide_label, parse_ide_list
+from core.pipeline import chat_cached, fan_out, generate_ide_lengkap
+from core.prompts import KRITERIA_DEFAULT, buat_prompt_ide
+from core.qa import TanyaAI
+from core.ratelimit import get_limiter
+from core.routing import jalankan_routing, urutkan_model
+from core.store import get_store
+from core.telemetry import get_telemetry
 
 # --- API Key & Model ---
 # Coba ambil dari secrets, jika tidak ada akan kosong
@@ -75,8 +84,66 @@ model_options = {
     'Mistral Small': 'mistralai/devstral-small',
     'Mistral 7B': 'mistralai/mistral-7b-instruct'
 }
+label_model = {nama: label for label, nama in model_options.items()}
 selected_model_label = st.sidebar.selectbox('Pilih Model AI', list(model_options.keys()), index=0, key='model_ai_selectbox')
 MODEL_NAME = model_options[selected_model_label]
+fanout_labels = st.sidebar.multiselect(
+    'Mode multi-model (opsional)',
+    list(model_options.keys()),
+    key='fanout_models',
+    help="Pilih 2 model atau lebih untuk menghasilkan ide dari semua model sekaligus secara paralel."
+)
+FANOUT_MODELS = fanout_labels if len(fanout_labels) >= 2 else []
+
+# --- Cache respons AI ---
+response_cache = get_cache()
+BYPASS_CACHE = st.sidebar.checkbox(
+    'Regenerate (abaikan cache)',
+    value=False,
+    key='bypass_cache',
+    help="Centang untuk memaksa permintaan baru ke AI walaupun prompt yang sama sudah pernah dijawab."
+)
+STREAMING_MODE = st.sidebar.toggle(
+    'Mode streaming',
+    value=True,
+    key='streaming_mode',
+    help="Tampilkan hasil ide sedikit demi sedikit selama AI masih menulis."
+)
+ROUTING_MODE = st.sidebar.toggle(
+    'Routing otomatis antar model',
+    value=False,
+    key='routing_mode',
+    help="Jika model terpilih lebih lambat dari biasanya (p95 latensinya) atau gagal, permintaan yang sama "
+         "otomatis dikirim ke model lain dan hasil valid tercepat yang dipakai. Catatan: hedging bisa mengirim "
+         "permintaan ganda (berbayar) ke model lain, dan permintaan yang kalah tidak dibatalkan."
+)
+MODEL_CADANGAN = list(model_options.values()) if ROUTING_MODE else None
+cache_stats = response_cache.stats()
+st.sidebar.caption(
+    f"Cache: {cache_stats['hits_memory'] + cache_stats['hits_disk']} hit "
+    f"({cache_stats['hits_memory']} memori, {cache_stats['hits_disk']} disk), "
+    f"{cache_stats['misses']} miss, {cache_stats.get('disk_items', 0)} entri tersimpan"
+)
+
+# --- Telemetri (latensi per model, dari semua sesi di proses ini) ---
+if st.sidebar.toggle('Tampilkan telemetri', value=False, key='show_telemetry',
+                     help="Latensi p50/p95, waktu token pertama dan keberhasilan parsing per model."):
+    telemetry = get_telemetry()
+    ringkasan_model, ringkasan_parse = telemetry.ringkasan_per_model()
+    if not ringkasan_model:
+        st.sidebar.caption("Belum ada panggilan AI yang tercatat.")
+    else:
+        def format_detik(x):
+            return "-" if x is None else f"{x:.1f}s"
+        baris = ["| Model | n | p50 | p95 | TTFB p50 | Error |", "|---|---|---|---|---|---|"]
+        for model, r in sorted(ringkasan_model.items()):
+            baris.append(f"| {model.split('/')[-1]} | {r['n']} | {format_detik(r['p50_s'])} | {format_detik(r['p95_s'])} "
+                         f"| {format_detik(r['ttfb_p50_s'])} | {r['error']} |")
+        st.sidebar.markdown("\n".join(baris))
+    for tahap, r in sorted(ringkasan_parse.items()):
+        st.sidebar.caption(f"Parsing {tahap}: {r['ok']} berhasil, {r['gagal']} gagal")
+    st.sidebar.download_button("Unduh metrik (Prometheus)", telemetry.prometheus_text(), file_name="metrics.prom",
+                               mime="text/plain", key="download_metrics")
 st.sidebar.markdown('---')
 
 # --- Sidebar BEP saja ---
@@ -85,79 +152,322 @@ modal_bep = st.sidebar.number_input('Modal Awal (Rp)', min_value=0, value=0, ste
 biaya_operasional_bep = st.sidebar.number_input('Biaya Operasional per Bulan (Rp)', min_value=0, value=0, step=500000, format='%d', key='bep_operasional', placeholder="Contoh: 2.000.000")
 omzet_bep = st.sidebar.number_input('Omzet per Bulan (Rp)', min_value=0, value=0, step=500000, format='%d', key='bep_omzet', placeholder="Contoh: 5.000.000")
 
+with st.sidebar.expander('Skenario & ketidakpastian (opsional)'):
+    pertumbuhan_bep = st.number_input('Pertumbuhan omzet per bulan (%)', min_value=-99.0, value=0.0, step=0.5,
+                                      key='bep_pertumbuhan')
+    inflasi_bep = st.number_input('Kenaikan biaya per tahun (%)', min_value=-99.0, value=0.0, step=1.0, key='bep_inflasi')
+    ramp_up_bep = st.number_input('Masa ramp-up (bulan)', min_value=0, value=0, step=1, key='bep_ramp_up',
+                                  help="Omzet naik bertahap dan baru penuh di akhir masa ramp-up.")
+    sd_omzet_bep = st.slider('Ketidakpastian omzet (± %)', 0, 100, 0, key='bep_sd_omzet',
+                             help="Simpangan baku omzet untuk simulasi Monte Carlo.")
+    sd_biaya_bep = st.slider('Ketidakpastian biaya (± %)', 0, 100, 0, key='bep_sd_biaya')
+    target_bep = st.number_input('Target balik modal (bulan)', min_value=1, value=12, step=1, key='bep_target')
+
 if st.sidebar.button('Hitung BEP'):
-    if omzet_bep <= biaya_operasional_bep:
+    # numpy dimuat hanya saat simulasi dijalankan
+    from core.bep import (HORIZON_BULAN, N_SAMPEL, bulan_bep, distribusi_bulan, grid_sensitivitas, inflasi_bulanan,
+                          monte_carlo, rentang, ringkasan_sampel)
+    from core.charts import spec_distribusi_bep, spec_heatmap_bep
+
+    skenario = {'pertumbuhan': pertumbuhan_bep / 100, 'inflasi': float(inflasi_bulanan(inflasi_bep / 100)),
+                'ramp_up': ramp_up_bep}
+    pakai_skenario = bool(pertumbuhan_bep or inflasi_bep or ramp_up_bep)
+    estimasi_bulan = bulan_bep(modal_bep, omzet_bep, biaya_operasional_bep, **skenario)
+    if not pakai_skenario and omzet_bep <= biaya_operasional_bep:
         st.sidebar.warning('Omzet per bulan harus lebih besar dari biaya operasional untuk bisa BEP!')
+    elif estimasi_bulan == float('inf'):
+        st.sidebar.warning(f'Dengan skenario ini modal belum kembali dalam {HORIZON_BULAN} bulan.')
     else:
-        bulan_bep = modal_bep / (omzet_bep - biaya_operasional_bep)
-        bulan_bep_int = int(bulan_bep) if bulan_bep == int(bulan_bep) else int(bulan_bep) + 1
         st.sidebar.markdown(f"**Estimasi Break Even Point (BEP):**")
-        st.sidebar.markdown(f"Anda akan balik modal dalam **{bulan_bep_int} bulan**.")
-        st.sidebar.markdown(f"(Perhitungan: Modal / (Omzet - Biaya Operasional))")
+        st.sidebar.markdown(f"Anda akan balik modal dalam **{estimasi_bulan:.0f} bulan**.")
+        if pakai_skenario:
+            st.sidebar.markdown("(Simulasi bulanan: laba kumulatif (Omzet - Biaya Operasional) >= Modal)")
+        else:
+            st.sidebar.markdown(f"(Perhitungan: Modal / (Omzet - Biaya Operasional))")
+    if omzet_bep > 0:
+        # Heatmap: bulan BEP untuk omzet & biaya ±50% dari input
+        omzet_grid = rentang(omzet_bep, 0.5, 11)
+        biaya_grid = rentang(biaya_operasional_bep, 0.5, 11) if biaya_operasional_bep > 0 else rentang(omzet_bep / 2, 1.0, 11)
+        st.sidebar.vega_lite_chart(spec_heatmap_bep(omzet_grid, biaya_grid,
+                                                    grid_sensitivitas(modal_bep, omzet_grid, biaya_grid, **skenario),
+                                                    HORIZON_BULAN), width="stretch")
+    if sd_omzet_bep or sd_biaya_bep:
+        sampel_bep = monte_carlo(modal_bep, omzet_bep, biaya_operasional_bep, sd_omzet=sd_omzet_bep / 100,
+                                 sd_biaya=sd_biaya_bep / 100, **skenario)
+        ringkasan_bep = ringkasan_sampel(sampel_bep, target_bep)
+        def format_bulan(x):
+            return f"> {HORIZON_BULAN}" if x == float('inf') else f"{x:.0f}"
+        st.sidebar.metric(f"Peluang BEP ≤ {target_bep} bulan", f"{ringkasan_bep['peluang_target']:.0%}")
+        st.sidebar.caption(f"Monte Carlo {N_SAMPEL:,} skenario: median {format_bulan(ringkasan_bep['p50'])} bulan "
+                           f"(rentang 80%: {format_bulan(ringkasan_bep['p10'])}-{format_bulan(ringkasan_bep['p90'])} bulan), "
+                           f"{ringkasan_bep['peluang_horizon']:.0%} skenario balik modal dalam {HORIZON_BULAN} bulan.")
+        st.sidebar.vega_lite_chart(spec_distribusi_bep(distribusi_bulan(sampel_bep), HORIZON_BULAN, target_bep),
+                                   width="stretch")
 
 # --- Fungsi OpenRouter ---
-def call_openrouter(prompt, api_key, model_name):
+def tampilkan_error_openrouter(e):
+    if e.status_code == 401:
+        st.error("❌ API Key tidak valid! Silakan periksa kembali API key Anda.")
+    elif e.status_code == 402:
+        st.error("❌ Kredit/balance habis! Silakan top up balance di OpenRouter.ai")
+    elif e.status_code == 429:
+        st.error("❌ Terlalu banyak request! Sudah dicoba ulang otomatis, tunggu sebentar dan coba lagi.")
+    else:
+        st.error(f"❌ {e}")
+
+def klien_limiter():
+    # Kuota API dipakai bersama semua sesi; tiap sesi jadi satu klien di antrean adil rate limit
+    return get_limiter().klien(st.session_state.setdefault('klien_id', uuid.uuid4().hex[:12]))
+
+def call_openrouter(prompt, api_key, model_name, use_cache=True, tahap="chat", cadangan=None):
+    # Jika `cadangan` (daftar model) diisi, model lambat/gagal otomatis di-hedge atau diganti model lain
     if not api_key.strip():
         st.error("❌ API Key tidak valid atau kosong!")
         return ""
-    
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    data = {
-        "model": model_name,
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 1200,  # Ditingkatkan agar output tidak terpotong
-        "temperature": 0.7,
-    }
-    api_url = "https://openrouter.ai/api/v1/chat/completions"
+    rate_limiter = klien_limiter()
+    def kirim(model):
+        return chat_cached(prompt, api_key, model, use_cache=use_cache, rate_limiter=rate_limiter, tahap=tahap)
     try:
-        response = requests.post(api_url, headers=headers, json=data, timeout=60)
-        if response.status_code == 200:
-            hasil_json = response.json()
-            if hasil_json.get("choices"):
-                return hasil_json["choices"][0]["message"]["content"].strip()
-            return "Tidak ada hasil."
-        elif response.status_code == 401:
-            st.error("❌ API Key tidak valid! Silakan periksa kembali API key Anda.")
-            return ""
-        elif response.status_code == 402:
-            st.error("❌ Kredit/balance habis! Silakan top up balance di OpenRouter.ai")
-            return ""
-        elif response.status_code == 429:
-            st.error("❌ Terlalu banyak request! Tunggu sebentar dan coba lagi.")
-            return ""
+        if cadangan:
+            routing = jalankan_routing(kirim, urutkan_model(model_name, cadangan, tahap),
+                                       valid=lambda teks: bool(teks and teks.strip()), tahap=tahap)
+            hasil = routing.hasil
+            if routing.model != model_name:
+                st.caption(f"ℹ️ Dijawab oleh {label_model.get(routing.model, routing.model)} "
+                           f"karena model terpilih lambat atau gagal.")
         else:
-            st.error(f"❌ Error dari server: {response.status_code} - {response.text}")
-            return ""
-    except Exception as e:
-        st.error(f"❌ Error koneksi: {e}")
+            hasil = kirim(model_name)
+    except OpenRouterError as e:
+        tampilkan_error_openrouter(e)
         return ""
+    return hasil or "Tidak ada hasil."
+
+def tampilkan_error_job(error):
+    if isinstance(error, OpenRouterError):
+        tampilkan_error_openrouter(error)
+    else:
+        st.error(f"❌ {error}")
+
+# --- Job latar belakang ---
+# Generate & perbandingan berjalan di executor milik proses (tanpa st.*), sehingga script tidak membeku
+# dan rerun tidak membuang hasil. Sesi hanya menyimpan job_id per jenis di session_state['jobs'].
+def job_generate(job, prompt, api_key, model_name, use_cache=True, stream=False, rate_limiter=None, cadangan=None):
+    # Hasil yang terpotong otomatis dilanjutkan; jika stream, teks sementara dilaporkan sebagai progres.
+    # Dengan `cadangan`, model lambat/gagal di-hedge ke model lain dan hasil yang bisa di-parse pertama dipakai
+    on_update = None
+    if stream:
+        def on_update(teks):
+            # Ide ke-N dianggap selesai begitu "Ide N+1" mulai ditulis
+            job.perbarui(teks=teks, ide_selesai=len(parse_ide_list(teks)[:-1]))
+    if not cadangan:
+        hasil, lanjutan = generate_ide_lengkap(prompt, api_key, model_name, use_cache=use_cache, on_update=on_update,
+                                               rate_limiter=rate_limiter)
+        return {'hasil': hasil or "Tidak ada hasil.", 'lanjutan': lanjutan, 'model': model_name}
+    lanjutan_per_model, penulis = {}, {}
+    def generate_model(model):
+        def update_model(teks):
+            # Pratinjau hanya dari model pertama yang mulai menulis
+            if penulis.setdefault('model', model) == model:
+                on_update(teks)
+        try:
+            hasil_model, lanjutan_per_model[model] = generate_ide_lengkap(
+                prompt, api_key, model, use_cache=use_cache, on_update=update_model if on_update else None,
+                rate_limiter=rate_limiter)
+        except Exception:
+            if penulis.get('model') == model:
+                penulis.pop('model')
+            raise
+        return hasil_model
+    routing = jalankan_routing(generate_model, urutkan_model(model_name, cadangan, "generate"),
+                               valid=lambda hasil: bool(parse_ide_list(hasil or "")), tahap="generate")
+    return {'hasil': routing.hasil or "Tidak ada hasil.", 'lanjutan': lanjutan_per_model.get(routing.model, 0),
+            'model': routing.model}
+
+def job_generate_fanout(job, prompt, api_key, models, use_cache=True, rate_limiter=None):
+    # Prompt yang sama ke beberapa model sekaligus ({label: nama model}); tiap model yang selesai jadi progres
+    hasil_per_model, errors = {}, {}
+    def generate_model(label):
+        hasil_model, _ = generate_ide_lengkap(prompt, api_key, models[label], use_cache=use_cache, rate_limiter=rate_limiter)
+        return hasil_model
+    for label, hasil_model, error in fan_out(generate_model, list(models)):
+        if error is not None:
+            errors[label] = error
+        elif hasil_model:
+            hasil_per_model[label] = hasil_model
+        job.perbarui(hasil_per_model=dict(hasil_per_model))
+    return {'hasil_per_model': hasil_per_model, 'errors': errors}
+
+def job_bandingkan(job, ide_terpilih, kriteria, api_key, model_name, use_cache=True, label_ide=None, rate_limiter=None,
+                   jumlah_sampel=1):
+    # Pool ide besar dibagi per kelompok (dengan ide jangkar) dan dinilai paralel;
+    # mode ensemble menilai ulang sebanyak `jumlah_sampel` kali sekaligus lalu skornya digabung.
+    # core.comparison memakai numpy, jadi baru dimuat saat job perbandingan berjalan
+    from core.comparison import bandingkan_ide, bandingkan_ide_ensemble
+    if jumlah_sampel > 1:
+        return bandingkan_ide_ensemble(ide_terpilih, kriteria, api_key, model_name, jumlah_sampel=jumlah_sampel,
+                                       use_cache=use_cache, label_ide=label_ide, rate_limiter=rate_limiter)
+    return bandingkan_ide(ide_terpilih, kriteria, api_key, model_name, use_cache=use_cache, label_ide=label_ide,
+                          rate_limiter=rate_limiter)
+
+def mulai_job(jenis, fn, *args, meta=None, **kwargs):
+    # Satu job aktif per jenis per sesi: job lama yang belum selesai dibatalkan
+    executor = get_executor()
+    jobs = st.session_state.setdefault('jobs', {})
+    if jobs.get(jenis):
+        executor.batalkan(jobs[jenis])
+        executor.hapus(jobs[jenis])
+    kwargs.setdefault('rate_limiter', klien_limiter())
+    jobs[jenis] = executor.submit(jenis, fn, *args, meta=meta, **kwargs)
 
-# --- Prompt Generator ---
-def buat_prompt_ide(segmen, pain_point, tren, kompetitor):
-    return f"""Buatkan 3 ide produk/layanan baru untuk riset pasar berikut:
-- Segmen pasar: {segmen}
-- Masalah konsumen: {pain_point}
-- Tren pasar: {tren}
-- Kompetitor: {kompetitor}
-Untuk setiap ide, berikan:
-1. Deskripsi singkat ide
-2. Analisis potensi target pasar
-3. Saran strategi pemasaran awal
-4. Potensi keunggulan kompetitif
-5. Prediksi tantangan/riskonya
-6. Poin-poin SWOT sederhana
-Format: Ide 1:..., Ide 2:..., Ide 3:...
-Pastikan SEMUA ide lengkap, tidak ada bagian yang terpotong, dan output selesai hingga Ide 3."""
-
-def buat_prompt_perbandingan(ide_terpilih, kriteria):
-    return f"""Bandingkan ide-ide berikut berdasarkan kriteria:
-Kriteria: {', '.join(kriteria)}
-Ide:
-{chr(10).join([f'{i+1}. {ide}' for i, ide in enumerate(ide_terpilih)])}
-Untuk setiap ide, beri skor (1-5) yang disajikan dalam format tabel, pastikan didalam tabel skor hanya ada format angka tanpa perlu penjelasan di tabel skor. lalu berikan Ringkasan Analisis dari poin-poin dibawah tabel."""
+def ambil_job(jenis):
+    job_id = st.session_state.get('jobs', {}).get(jenis)
+    job = get_executor().get(job_id) if job_id else None
+    if job_id and job is None:
+        st.session_state['jobs'].pop(jenis, None)  # Sudah dibuang executor (kedaluwarsa)
+    return job
+
+def selesaikan_job(jenis):
+    job_id = st.session_state.get('jobs', {}).pop(jenis, None)
+    if job_id:
+        get_executor().hapus(job_id)
+
+@st.fragment(run_every=1.0)
+def pantau_job(jenis):
+    # Hanya bagian ini yang dijalankan ulang tiap detik; begitu job selesai seluruh app di-rerun untuk menerapkan hasil
+    job = ambil_job(jenis)
+    if job is None or not job.aktif:
+        st.rerun()
+    executor = get_executor()
+    if job.status == ANTRI:
+        st.caption(f"⏳ Menunggu giliran... {executor.posisi_antrean(job.id)} job lain di depan "
+                   f"(maks. {executor.max_workers} job berjalan bersamaan)")
+    else:
+        progres = job.progres
+        posisi_kuota = klien_limiter().posisi()
+        if posisi_kuota:
+            di_depan = max(posisi_kuota.values())
+            st.caption("🚦 Menunggu kuota API bersama... "
+                       + (f"{di_depan} sesi lain di depan" if di_depan else "giliran berikutnya"))
+        with st.spinner(f"{job.meta.get('pesan', 'Sedang diproses...')} ({job.durasi:.0f} detik)"):
+            if 'ide_selesai' in progres:
+                st.caption(f"✍️ AI sedang menulis... {progres['ide_selesai']} ide selesai")
+            if progres.get('teks'):
+                st.markdown(progres['teks'] + " ▌")
+            for label, hasil_model in (progres.get('hasil_per_model') or {}).items():
+                with st.expander(f"✅ {label} selesai ({len(parse_ide_list(hasil_model))} ide)"):
+                    st.markdown(hasil_model)
+    if st.button("Batalkan", key=f"batal_job_{jenis}"):
+        executor.batalkan(job.id)
+        selesaikan_job(jenis)
+        st.rerun()
+
+def kirim_generate(prompt, brief, kriteria):
+    meta = {'brief': brief, 'kriteria': kriteria}
+    if FANOUT_MODELS:
+        # Kirim prompt yang sama ke beberapa model sekaligus, tampilkan tiap model begitu selesai
+        mulai_job('generate', job_generate_fanout, prompt, FINAL_API_KEY,
+                  {label: model_options[label] for label in FANOUT_MODELS}, use_cache=not BYPASS_CACHE,
+                  meta={**meta, 'models': FANOUT_MODELS,
+                        'pesan': f"Sedang riset dan menyusun ide dari {len(FANOUT_MODELS)} model secara paralel..."})
+    else:
+        mulai_job('generate', job_generate, prompt, FINAL_API_KEY, MODEL_NAME, use_cache=not BYPASS_CACHE,
+                  stream=STREAMING_MODE, cadangan=MODEL_CADANGAN, meta={**meta, 'model_label': selected_model_label,
+                                               'pesan': "Sedang riset dan menyusun ide..."})
+
+# --- Riwayat ide (store SQLite) ---
+def muat_hasil_tersimpan(generasi_id):
+    # Pakai hasil generate (dan perbandingan terakhirnya) dari riwayat tanpa memanggil AI
+    tersimpan = get_store().muat_generasi(generasi_id)
+    if tersimpan is None:
+        st.warning("Hasil tersimpan tidak ditemukan.")
+        return
+    st.session_state['last_ide'] = tersimpan['ide_list']
+    st.session_state['last_ide_model'] = tersimpan['ide_model']
+    st.session_state['hasil_ide_md'] = tersimpan['hasil']
+    st.session_state['just_generated'] = False
+    st.session_state['generasi_id'] = generasi_id
+    perbandingan = tersimpan['perbandingan']
+    st.session_state['hasil_perbandingan'] = perbandingan['hasil'] if perbandingan else ""
+    st.session_state.pop('ensemble_perbandingan', None)
+    st.session_state['compare_selected'] = perbandingan['label_ide'] if perbandingan else []
+
+def format_waktu(ts):
+    return time.strftime('%d-%m-%Y %H:%M', time.localtime(ts))
+
+def gabungkan_hasil_model(hasil_per_model, urutan_model):
+    # Gabungkan ide dari beberapa model menjadi satu pool, ditandai dengan model sumbernya
+    bagian_md, ide_list, ide_model = [], [], []
+    for label in urutan_model:
+        if label not in hasil_per_model:
+            continue
+        bagian_md.append(f"### {label}\n\n{hasil_per_model[label]}")
+        ide_model_ini = parse_ide_list(hasil_per_model[label])
+        ide_list.extend(ide_model_ini)
+        ide_model.extend([label] * len(ide_model_ini))
+    return '\n\n'.join(bagian_md), ide_list, ide_model
+
+# --- Cache visualisasi (Tab 3) ---
+# Parameter berawalan "_" tidak di-hash oleh Streamlit; kunci cache cukup hash teks perbandingan + label ide
+JENIS_CHART = {"Rata-rata per ide": "rata_rata", "Per kriteria": "kriteria", "Radar": "radar"}
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def ekstrak_skor_cached(kunci, _hasil_perbandingan):
+    from core.parsers import extract_scores_from_table
+    return extract_scores_from_table(_hasil_perbandingan)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_chart_png(kunci, jenis, _ide_labels, _df_scores, _mean_scores):
+    from core import charts
+    if jenis == "kriteria":
+        fig = charts.buat_grouped_bar_kriteria(_ide_labels, _df_scores)
+    elif jenis == "radar":
+        fig = charts.buat_radar_chart(_ide_labels, _df_scores)
+    else:
+        fig = charts.buat_bar_chart_rata_rata(_ide_labels, _mean_scores)
+    return charts.figure_to_png(fig)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def buat_spec_vega(kunci, jenis, _ide_labels, _df_scores, _mean_scores):
+    from core import charts
+    if jenis == "kriteria":
+        return charts.spec_grouped_bar_kriteria(_ide_labels, _df_scores)
+    return charts.spec_bar_rata_rata(_ide_labels, _mean_scores)
+
+def tampilkan_ensemble(ensemble, ide_labels):
+    # Kesimpulan mode ensemble: pemenang hanya jika unggul secara statistik, plus detail per ide x kriteria
+    import numpy as np
+    import pandas as pd
+    statistik, indeks = ensemble['statistik'], ensemble['indeks']
+    k, tingkat = statistik['jumlah_sampel'], statistik['tingkat']
+    def format_ik(bawah, atas):
+        return "-" if np.isnan(bawah) else f"{bawah:.2f}–{atas:.2f}"
+    pemenang = statistik['pemenang']
+    if pemenang is not None:
+        st.success(f"Ide terbaik: **{ide_labels[indeks.index(pemenang)]}** (skor rata-rata {statistik['total'][pemenang]:.2f}, "
+                   f"interval kepercayaan {tingkat:.0%}: {format_ik(statistik['total_ci_bawah'][pemenang], statistik['total_ci_atas'][pemenang])}), "
+                   f"unggul secara statistik atas semua ide lain berdasarkan {k} penilaian AI.")
+    else:
+        setara = ', '.join(f"**{ide_labels[indeks.index(i)]}**" for i in statistik['setara_teratas'])
+        st.info(f"Belum ada pemenang yang jelas dari {k} penilaian AI: skor {setara} masih tumpang tindih pada interval "
+                f"kepercayaan {tingkat:.0%}. Tambah jumlah sampel atau evaluasi ide-ide tersebut lebih mendalam.")
+    with st.expander("📊 Detail ensemble: rata-rata, variasi & interval kepercayaan"):
+        tabel = {
+            "Ide": ide_labels,
+            "Skor total": statistik['total'][indeks].round(2),
+            f"IK {tingkat:.0%}": [format_ik(statistik['total_ci_bawah'][i], statistik['total_ci_atas'][i]) for i in indeks],
+            "Peluang teratas (%)": (statistik['peluang_teratas'][indeks] * 100).round(1),
+        }
+        for j, kriteria in enumerate(ensemble['kriteria']):
+            tabel[kriteria] = [f"{statistik['rata'][i, j]:.2f} ± {np.sqrt(statistik['varians'][i, j]):.2f} "
+                               f"({format_ik(statistik['ci_bawah'][i, j], statistik['ci_atas'][i, j])})" for i in indeks]
+        st.dataframe(pd.DataFrame(tabel), hide_index=True, width="stretch")
+        st.caption("Skor total = rata-rata skor kriteria (kriteria biaya dibalik). Per kriteria: rata-rata ± simpangan baku "
+                   "antar penilaian (interval kepercayaan bootstrap). Peluang teratas = seberapa sering ide menempati "
+                   "posisi teratas saat penilaian diambil ulang secara acak.")
 
 # --- UI dengan Multi Tab: Generator Ide & Perbandingan Hasil ---
-st.markdown("""
+# CSS tab & tombol digabung dalam satu blok agar hanya satu elemen yang dikirim per rerun
+APP_CSS = """
     <style>
     /* Reset dan perbaiki tampilan tab agar tetap kontras di mode malam/terang, tanpa efek pop-up dan tanpa background gradasi kedua */
     .stTabs [data-baseweb="tab-list"] {
@@ -222,30 +532,6 @@ st.markdown("""
             box-shadow: 0 4px 18px rgba(79,140,255,0.18), 0 1.5px 8px rgba(0,0,0,0.10);
         }
     }
-    </style>
-""", unsafe_allow_html=True)
-tabs = st.tabs(["Generator Ide", "Perbandingan Hasil", "Visualisasi Perbandingan Skor Ide"])
-
-# Tab 1: Generator Ide
-with tabs[0]:
-    # --- Input Riset Pasar & Ide Produk (pindah dari sidebar ke tab 1) ---
-    st.markdown('### Input Riset Pasar & Ide Produk')
-    segmen = st.text_input("Segmen Pasar Target", placeholder="Mahasiswa urban, ibu rumah tangga", key="tab1_segmen")
-    pain_point = st.text_input("Masalah Konsumen (Pain Point)", placeholder="Kost mahal, Sulit cari makanan sehat", key="tab1_pain_point")
-    tren = st.text_input("Tren Pasar Saat Ini (Opsional)", placeholder="Produk berkelanjutan, layanan AI", key="tab1_tren")
-    kompetitor = st.text_input("Nama/Jenis Kompetitor (Opsional)", placeholder="Teh Botol, Lemonilo, Netflix", key="tab1_kompetitor")
-    st.markdown('---')
-    st.markdown('### Kriteria Perbandingan (Opsional)')
-    kriteria_default = ["Potensi Pasar", "Kesulitan Implementasi", "Inovasi", "Modal Awal"]
-    kriteria_user = st.text_area("Kriteria Tambahan (pisahkan dengan koma)", placeholder="Contoh: Margin, Daya Tahan Produk", key="tab1_kriteria")
-    if kriteria_user:
-        kriteria_list = kriteria_default + [k.strip() for k in kriteria_user.split(",") if k.strip()]
-    else:
-        kriteria_list = kriteria_default
-    st.markdown('---')
-    # --- Generate Ide ---
-    custom_btn_css = """
-    <style>
     .custom-btn-gen button {
         background: linear-gradient(90deg, #4f8cff 0%, #235390 100%) !important;
         color: #fff !important;
@@ -261,12 +547,7 @@ with tabs[0]:
         color: #fff !important;
         box-shadow: 0 4px 16px rgba(79,140,255,0.25);
     }
-    </style>
-    """
-    st.markdown(custom_btn_css, unsafe_allow_html=True)
-    # Custom CSS untuk SEMUA tombol Streamlit (bukan hanya .custom-btn-gen)
-    custom_btn_css = """
-    <style>
+    /* Custom CSS untuk SEMUA tombol Streamlit (bukan hanya .custom-btn-gen) */
     button[kind="primary"], button[kind="secondary"], .stButton > button {
         background: linear-gradient(90deg, #4f8cff 0%, #235390 100%) !important;
         color: #fff !important;
@@ -283,8 +564,29 @@ with tabs[0]:
         box-shadow: 0 8px 24px rgba(79,140,255,0.30);
         transform: scale(1.06);    }
     </style>
-    """
-    st.markdown(custom_btn_css, unsafe_allow_html=True)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
+# on_change="rerun" membuat tab bisa dirender malas: konten berat (pandas/matplotlib) hanya jalan saat tab-nya dibuka
+tabs = st.tabs(["Generator Ide", "Perbandingan Hasil", "Visualisasi Perbandingan Skor Ide"], key="main_tabs", on_change="rerun")
+
+# Tab 1: Generator Ide
+with tabs[0]:
+    # --- Input Riset Pasar & Ide Produk (pindah dari sidebar ke tab 1) ---
+    st.markdown('### Input Riset Pasar & Ide Produk')
+    segmen = st.text_input("Segmen Pasar Target", placeholder="Mahasiswa urban, ibu rumah tangga", key="tab1_segmen")
+    pain_point = st.text_input("Masalah Konsumen (Pain Point)", placeholder="Kost mahal, Sulit cari makanan sehat", key="tab1_pain_point")
+    tren = st.text_input("Tren Pasar Saat Ini (Opsional)", placeholder="Produk berkelanjutan, layanan AI", key="tab1_tren")
+    kompetitor = st.text_input("Nama/Jenis Kompetitor (Opsional)", placeholder="Teh Botol, Lemonilo, Netflix", key="tab1_kompetitor")
+    st.markdown('---')
+    st.markdown('### Kriteria Perbandingan (Opsional)')
+    kriteria_default = KRITERIA_DEFAULT
+    kriteria_user = st.text_area("Kriteria Tambahan (pisahkan dengan koma)", placeholder="Contoh: Margin, Daya Tahan Produk", key="tab1_kriteria")
+    if kriteria_user:
+        kriteria_list = kriteria_default + [k.strip() for k in kriteria_user.split(",") if k.strip()]
+    else:
+        kriteria_list = kriteria_default
+    st.markdown('---')
+    # --- Generate Ide ---
     # Tooltip popup untuk tombol
     st.markdown('<div class="custom-btn-gen" title="Klik untuk menghasilkan ide dan analisis berdasarkan input Anda">', unsafe_allow_html=True)
     
@@ -294,22 +596,78 @@ with tabs[0]:
         elif not FINAL_API_KEY:
             st.error("❌ Masukkan API Key OpenRouter terlebih dahulu di sidebar!")
         else:
-            with st.spinner("Sedang riset dan menyusun ide..."):
-                prompt = buat_prompt_ide(segmen, pain_point, tren, kompetitor)
-                hasil = call_openrouter(prompt, FINAL_API_KEY, MODEL_NAME)
-                # Jika gagal (hasil kosong), jangan tampilkan hasil & Tanya AI
-                if not hasil.strip():
-                    st.session_state['last_ide'] = []
-                    st.session_state['hasil_ide_md'] = ''
-                    st.session_state['just_generated'] = True
-                else:
-                    ide_list = [x.strip() for x in hasil.split('Ide ')[1:]] if 'Ide 1:' in hasil else []
-                    ide_list = [ide for ide in ide_list if not ide.lower().startswith('semua ide telah lengkap') and not ide.lower().startswith('setiap ide mencakup')]
-                    st.session_state['last_ide'] = ide_list
-                    st.session_state['hasil_ide_md'] = hasil
-                    st.session_state['just_generated'] = False  # Reset langsung setelah generate ide
-                    if len(ide_list) < 3:
-                        st.warning("⚠️ Hasil AI tampaknya terpotong. Coba klik tombol lagi, atau perpendek input/segmen/tren/kompetitor.")
+            prompt = buat_prompt_ide(segmen, pain_point, tren, kompetitor)
+            brief = {'segmen': segmen, 'pain_point': pain_point, 'tren': tren, 'kompetitor': kompetitor}
+            # Brief yang mirip dengan riwayat ditawarkan dulu sebelum memakai panggilan API baru
+            mirip = [] if BYPASS_CACHE else get_store().cari_brief_mirip(brief)
+            if mirip:
+                st.session_state['tawaran_brief'] = {'prompt': prompt, 'brief': brief, 'kriteria': kriteria_list, 'mirip': mirip}
+            else:
+                st.session_state.pop('tawaran_brief', None)
+                kirim_generate(prompt, brief, kriteria_list)
+
+    tawaran = st.session_state.get('tawaran_brief')
+    if tawaran:
+        st.info("💡 Brief serupa sudah pernah dibuat. Pakai hasil tersimpan agar tidak memakai kredit API, atau tetap generate baru.")
+        for item in tawaran['mirip']:
+            col_brief, col_pakai = st.columns([4, 1])
+            col_brief.markdown(f"**{item['segmen']}** · {item['pain_point']}"
+                               + (f" · {item['tren']}" if item['tren'] else "")
+                               + (f" · {item['kompetitor']}" if item['kompetitor'] else ""))
+            col_brief.caption(f"Kemiripan {item['kemiripan']:.0%} · {item['model']} · {format_waktu(item['waktu'])}")
+            if col_pakai.button("Pakai hasil ini", key=f"pakai_generasi_{item['generasi_id']}"):
+                st.session_state.pop('tawaran_brief', None)
+                muat_hasil_tersimpan(item['generasi_id'])
+                st.rerun()
+        if st.button("Tetap generate baru", key="generate_baru"):
+            st.session_state.pop('tawaran_brief', None)
+            kirim_generate(tawaran['prompt'], tawaran['brief'], tawaran['kriteria'])
+            st.rerun()
+
+    # Hasil job generate diterapkan di rerun mana pun setelah selesai (termasuk setelah widget lain diklik)
+    job_gen = ambil_job('generate')
+    if job_gen is not None and job_gen.aktif:
+        pantau_job('generate')
+    elif job_gen is not None:
+        selesaikan_job('generate')
+        hasil, ide_model, lanjutan = "", None, 0
+        if job_gen.status == GAGAL:
+            tampilkan_error_job(job_gen.error)
+        elif 'hasil_per_model' in job_gen.hasil:
+            for label, error in job_gen.hasil['errors'].items():
+                st.error(f"❌ {label}: gagal menghasilkan ide.")
+                if isinstance(error, OpenRouterError):
+                    tampilkan_error_openrouter(error)
+            hasil, ide_list, ide_model = gabungkan_hasil_model(job_gen.hasil['hasil_per_model'], job_gen.meta['models'])
+        else:
+            hasil, lanjutan = job_gen.hasil['hasil'], job_gen.hasil['lanjutan']
+            model_dipakai = label_model.get(job_gen.hasil['model'], job_gen.meta['model_label'])
+            if model_dipakai != job_gen.meta['model_label']:
+                st.caption(f"ℹ️ {job_gen.meta['model_label']} lambat atau gagal, ide dihasilkan oleh {model_dipakai}.")
+        # Jika gagal (hasil kosong), jangan tampilkan hasil & Tanya AI
+        if not hasil.strip():
+            st.session_state['last_ide'] = []
+            st.session_state['last_ide_model'] = []
+            st.session_state['hasil_ide_md'] = ''
+            st.session_state['just_generated'] = True
+        else:
+            if ide_model is None:
+                ide_list = parse_ide_list(hasil)
+                ide_model = [model_dipakai] * len(ide_list)
+            st.session_state['last_ide'] = ide_list
+            st.session_state['last_ide_model'] = ide_model
+            st.session_state['hasil_ide_md'] = hasil
+            st.session_state['just_generated'] = False  # Reset langsung setelah generate ide
+            # Simpan ke riwayat agar bisa dicari dan dipakai ulang untuk brief serupa
+            store = get_store()
+            brief_id = store.simpan_brief(job_gen.meta['brief'], job_gen.meta['kriteria'])
+            st.session_state['generasi_id'] = store.simpan_generasi(brief_id, hasil, ide_list, ide_model,
+                                                                    ', '.join(dict.fromkeys(ide_model)))
+            if lanjutan:
+                st.caption(f"ℹ️ Hasil AI sempat terpotong, {lanjutan} permintaan lanjutan dikirim otomatis untuk melengkapi ide.")
+            # Setiap model seharusnya menghasilkan 3 ide
+            if any(ide_model.count(label) < 3 for label in set(ide_model)) or len(ide_list) < 3:
+                st.warning("⚠️ Hasil AI masih terpotong walaupun sudah dilanjutkan otomatis. Coba klik tombol lagi, atau perpendek input/segmen/tren/kompetitor.")
 
     # Tampilkan hasil & Tanya AI hanya jika hasil_ide_md tidak kosong dan just_generated False
     if st.session_state.get('hasil_ide_md') and not st.session_state.get('just_generated'):
@@ -324,46 +682,133 @@ with tabs[0]:
 - Bagaimana strategi pemasaran untuk ide 1?
 - Berapa modal dan omset untuk ide 1?
 - dll""")
+            # Satu mesin tanya-jawab (indeks per ide + memori percakapan) per hasil ide
+            kunci_tanya = hash(st.session_state['hasil_ide_md'])
+            if st.session_state.get('tanya_ai_kunci') != kunci_tanya:
+                st.session_state['tanya_ai'] = TanyaAI(st.session_state.get('last_ide') or [st.session_state['hasil_ide_md']])
+                st.session_state['tanya_ai_kunci'] = kunci_tanya
+            tanya_ai = st.session_state['tanya_ai']
+            if tanya_ai.riwayat:
+                col_memori, col_reset = st.columns([3, 1])
+                col_memori.caption(f"🧠 AI mengingat ringkasan {len(tanya_ai.riwayat)} pertanyaan sebelumnya.")
+                if col_reset.button("Reset percakapan", key="tanya_ai_reset"):
+                    tanya_ai.riwayat = []
             user_question = st.text_input("Pertanyaan untuk AI", key="tanya_ai_input")
             if st.button("Tanya AI", key="tanya_ai_btn"):
                 if not user_question.strip():
                     st.warning("Masukkan pertanyaan terlebih dahulu.")
                 else:
                     with st.spinner("Sedang memproses pertanyaan Anda..."):
-                        context_ide = st.session_state['hasil_ide_md']
-                        prompt_tanya = f"Berikut hasil ide dan analisis:\n{context_ide}\n\nJawab pertanyaan berikut secara spesifik dan ringkas, gunakan data dari ide di atas jika relevan.\nPertanyaan: {user_question}"
-                        jawaban_ai = call_openrouter(prompt_tanya, FINAL_API_KEY, MODEL_NAME)
+                        # Hanya bagian ide yang relevan + ringkasan percakapan sebelumnya yang dikirim
+                        prompt_tanya, info_tanya = tanya_ai.buat_prompt(user_question)
+                        jawaban_ai = call_openrouter(prompt_tanya, FINAL_API_KEY, MODEL_NAME, use_cache=not BYPASS_CACHE,
+                                                     tahap="tanya", cadangan=MODEL_CADANGAN)
+                        if jawaban_ai != "Tidak ada hasil.":
+                            tanya_ai.catat(user_question, jawaban_ai)
                         st.markdown(f"**Jawaban AI:**\n{jawaban_ai}")
+                        konteks_ide = ', '.join(f"Ide {n}" for n in info_tanya['ide']) or "-"
+                        st.caption(f"Konteks: {konteks_ide} · ~{info_tanya['token']} token prompt (batas {info_tanya['batas']})"
+                                   + (" · sebagian konteks dipangkas" if info_tanya['terpotong'] else ""))
         # Tambahkan tombol ganti model di tab 1
         st.markdown('---')
         st.markdown('<div class="custom-btn-gen" title="Ganti model AI untuk hasil ide yang berbeda">', unsafe_allow_html=True)
         if st.button('Apa anda ingin menggunakan model lain untuk generate ide?', key='btn_ganti_model_tab1', use_container_width=True):
-            st.info('Silakan pilih model AI lain di sidebar pada bagian "Pengaturan Model AI", lalu klik tombol "🔍 Hasilkan Ide & Analisis" untuk generate ide baru.')
+            st.info('Silakan pilih model AI lain di sidebar pada bagian "Pengaturan Model AI", lalu klik tombol "🔍 Hasilkan Ide & Analisis" untuk generate ide baru. Pilih beberapa model di "Mode multi-model" untuk menjalankan semuanya sekaligus.')
         st.markdown('</div>', unsafe_allow_html=True)
 
+    # --- Riwayat & pencarian ide tersimpan ---
+    with st.expander("🔎 Cari Riwayat Ide", expanded=False):
+        query_riwayat = st.text_input("Kata kunci (judul, isi ide, atau brief)", key="cari_riwayat",
+                                      placeholder="Contoh: laundry mahasiswa")
+        if query_riwayat.strip():
+            hasil_cari = get_store().cari(query_riwayat)
+            if not hasil_cari:
+                st.caption("Tidak ada ide tersimpan yang cocok.")
+            for item in hasil_cari:
+                col_ide, col_muat = st.columns([4, 1])
+                col_ide.markdown(f"**{item['judul']}** · {item['model']} · {format_waktu(item['waktu'])}\n\n"
+                                 f"{' '.join(item['cuplikan'].split())}")
+                if col_muat.button("Muat", key=f"muat_riwayat_{item['ide_id']}"):
+                    muat_hasil_tersimpan(item['generasi_id'])
+                    st.rerun()
+        else:
+            stats_store = get_store().stats()
+            st.caption(f"{stats_store['ide']} ide dari {stats_store['briefs']} brief tersimpan di riwayat.")
+
 # Tab 2: Perbandingan Hasil
 with tabs[1]:
     if 'last_ide' not in st.session_state or not st.session_state['last_ide']:
         st.info("Silakan generate ide terlebih dahulu di tab 'Generator Ide'.")
     else:
         st.subheader("Pilih Ide untuk Dibandingkan:")
-        def get_ide_label(ide_text, idx):
-            lines = ide_text.splitlines()
-            for line in lines:
-                if line.strip() and not line.strip().lower().startswith('deskripsi'):
-                    return line.strip()[:60]
-            return f"Ide {idx+1}"
-        ide_labels = [get_ide_label(ide, i) for i, ide in enumerate(st.session_state['last_ide'])]
-        label_to_ide = {get_ide_label(ide, i): ide for i, ide in enumerate(st.session_state['last_ide'])}
+        ide_sumber = st.session_state.get('last_ide_model', [])
+        tandai_model = len(set(ide_sumber)) > 1 and len(ide_sumber) == len(st.session_state['last_ide'])
+        def get_ide_label_sumber(ide_text, idx):
+            # Jika pool ide berasal dari beberapa model, label diberi tanda model sumbernya
+            label = get_ide_label(ide_text, idx)
+            return f"[{ide_sumber[idx]}] {label}" if tandai_model else label
+        ide_labels = [get_ide_label_sumber(ide, i) for i, ide in enumerate(st.session_state['last_ide'])]
+        label_to_ide = {get_ide_label_sumber(ide, i): ide for i, ide in enumerate(st.session_state['last_ide'])}
         selected_labels = st.multiselect("Pilih ide (minimal 2):", ide_labels, key="compare_ideas")
         selected = [label_to_ide[l] for l in selected_labels]
         if len(selected) >= 2:
+            mode_ensemble = st.toggle(
+                "Mode ensemble (beberapa penilaian sekaligus)", value=False, key="compare_ensemble",
+                help="AI menilai ide yang sama beberapa kali secara paralel. Skor dirata-rata dan ide pemenang "
+                     "hanya ditetapkan jika unggul secara statistik (interval kepercayaan tidak tumpang tindih)."
+            )
+            jumlah_sampel = 1
+            if mode_ensemble:
+                from core.comparison import JUMLAH_SAMPEL
+                jumlah_sampel = st.slider("Jumlah sampel penilaian", 3, 10, JUMLAH_SAMPEL, key="compare_jumlah_sampel")
             if st.button("⚖️ Bandingkan Ide", key="compare_btn", use_container_width=True):
-                with st.spinner("Membandingkan ide dengan AI..."):
-                    prompt_cmp = buat_prompt_perbandingan(selected, kriteria_list)
-                    hasil_cmp = call_openrouter(prompt_cmp, FINAL_API_KEY, MODEL_NAME)
-                    st.session_state['hasil_perbandingan'] = hasil_cmp
-                    st.session_state['compare_selected'] = selected_labels
+                if not FINAL_API_KEY.strip():
+                    st.error("❌ API Key tidak valid atau kosong!")
+                else:
+                    pesan = "Membandingkan ide dengan AI..." if jumlah_sampel == 1 else \
+                        f"Membandingkan ide dengan AI ({jumlah_sampel} penilaian paralel)..."
+                    mulai_job('perbandingan', job_bandingkan, selected, kriteria_list, FINAL_API_KEY, MODEL_NAME,
+                              use_cache=not BYPASS_CACHE, label_ide=selected_labels, jumlah_sampel=jumlah_sampel,
+                              meta={'label_ide': selected_labels, 'kriteria': kriteria_list, 'model': MODEL_NAME,
+                                    'generasi_id': st.session_state.get('generasi_id'), 'pesan': pesan})
+        job_cmp = ambil_job('perbandingan')
+        if job_cmp is not None and job_cmp.aktif:
+            pantau_job('perbandingan')
+        elif job_cmp is not None:
+            selesaikan_job('perbandingan')
+            label_cmp = job_cmp.meta['label_ide']
+            hasil_cmp = job_cmp.hasil
+            st.session_state.pop('ensemble_perbandingan', None)
+            if job_cmp.status == GAGAL:
+                tampilkan_error_job(job_cmp.error)
+                st.session_state['hasil_perbandingan'] = ""
+                st.session_state['compare_selected'] = label_cmp
+            elif 'statistik' in hasil_cmp:
+                # Ensemble: tabel berisi skor rata-rata; statistik per ide disimpan untuk Tab 3 (urutan = compare_selected)
+                statistik = hasil_cmp['statistik']
+                st.session_state['hasil_perbandingan'] = hasil_cmp['hasil']
+                st.session_state['compare_selected'] = [label_cmp[i] for i in hasil_cmp['indeks']]
+                st.session_state['ensemble_perbandingan'] = {'statistik': statistik, 'indeks': hasil_cmp['indeks'],
+                                                             'kriteria': job_cmp.meta['kriteria']}
+                st.caption(f"Skor adalah rata-rata {statistik['jumlah_sampel']} penilaian AI independen yang dijalankan paralel."
+                           + (f" {hasil_cmp['sampel_gagal']} penilaian gagal dan dilewati." if hasil_cmp['sampel_gagal'] else ""))
+                if len(hasil_cmp['indeks']) < len(label_cmp):
+                    st.warning(f"Skor {len(label_cmp) - len(hasil_cmp['indeks'])} ide tidak terbaca lengkap dan tidak ditampilkan di tabel.")
+            elif hasil_cmp['jumlah_chunk'] == 1:
+                st.session_state['hasil_perbandingan'] = hasil_cmp['hasil'] or "Tidak ada hasil."
+                st.session_state['compare_selected'] = label_cmp
+            else:
+                # Tabel global hanya memuat ide yang skornya lengkap, label Tab 3 mengikuti urutannya
+                st.session_state['hasil_perbandingan'] = hasil_cmp['hasil']
+                st.session_state['compare_selected'] = [label_cmp[i] for i in hasil_cmp['indeks']]
+                st.caption(f"{len(label_cmp)} ide dinilai dalam {hasil_cmp['jumlah_chunk']} kelompok paralel; "
+                           "skor antar kelompok dikalibrasi memakai ide jangkar yang sama.")
+                if hasil_cmp['chunk_gagal'] or len(hasil_cmp['indeks']) < len(label_cmp):
+                    st.warning(f"Skor {len(label_cmp) - len(hasil_cmp['indeks'])} ide tidak terbaca lengkap dan tidak ditampilkan di tabel.")
+            if st.session_state['hasil_perbandingan'] and st.session_state['hasil_perbandingan'] != "Tidak ada hasil.":
+                get_store().simpan_perbandingan(job_cmp.meta['generasi_id'], st.session_state['hasil_perbandingan'],
+                                                st.session_state['compare_selected'], job_cmp.meta['kriteria'],
+                                                job_cmp.meta['model'])
         if st.session_state.get('hasil_perbandingan'):
             st.subheader("Hasil Perbandingan:")
             lines = st.session_state['hasil_perbandingan'].splitlines()
@@ -388,89 +833,52 @@ with tabs[1]:
 with tabs[2]:
     if not st.session_state.get('hasil_perbandingan'):
         st.info("Tab ini akan aktif setelah Anda melakukan perbandingan ide di tab 'Perbandingan Hasil'.")
-    else:
-        st.subheader("Bar Chart: Rata-rata Skor Kriteria per Ide")
+    elif tabs[2].open:
+        # Import berat (pandas, numpy, matplotlib) baru dimuat saat tab ini benar-benar dibuka
+        from core.charts import kunci_chart
+        from core.scoring import cari_kriteria_favorit, indeks_tertinggi, rata_rata_per_ide, terbaik_pada_kriteria
         hasil_perbandingan = st.session_state['hasil_perbandingan']
-        # --- Ekstrak tabel skor dari hasil perbandingan ---
-        def extract_scores_from_table(text):
-            lines = text.splitlines()
-            table_lines = [l for l in lines if '|' in l and re.search(r'\d', l)]
-            if not table_lines:
-                return None, None
-            header = [h.strip() for h in table_lines[0].split('|') if h.strip()]
-            data = []
-            for l in table_lines[1:]:
-                row = [c.strip() for c in l.split('|') if c.strip()]
-                if len(row) == len(header) and all(re.match(r'^[1-5](?:\.\d+)?$', c) for c in row[1:]):
-                    data.append(row)
-            if not data or len(header) < 2:
-                return None, None
-            try:
-                df = pd.DataFrame(data, columns=header)
-                for col in df.columns[1:]:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                return df.iloc[:, 0], df.iloc[:, 1:]
-            except Exception:
-                return None, None
-        ide_col, df_scores = extract_scores_from_table(hasil_perbandingan)
+        ide_col, df_scores = ekstrak_skor_cached(kunci_chart(hasil_perbandingan, []), hasil_perbandingan)
         # Ambil label ide yang dipilih di Tab 2
         selected_labels = st.session_state.get('compare_selected', None)
         if df_scores is not None and not df_scores.empty and selected_labels is not None:
-            # Pastikan jumlah bar dan label sesuai ide yang dipilih
-            ide_labels = list(selected_labels)
-            mean_scores = df_scores.mean(axis=1)
-            # Jika jumlah mean_scores tidak sama dengan jumlah ide_labels, sesuaikan
-            if len(mean_scores) > len(ide_labels):
-                mean_scores = mean_scores[:len(ide_labels)]
-            elif len(mean_scores) < len(ide_labels):
-                ide_labels = ide_labels[:len(mean_scores)]
-            # Ubah label sumbu X menjadi 2 kata pertama + '...'
-            def short_label(label):
-                words = label.split()
-                if len(words) > 2:
-                    return ' '.join(words[:2]) + '...'
-                return label
-            short_labels = [short_label(label) for label in ide_labels]
-            bar_colors = plt.cm.Paired(np.linspace(0, 1, len(short_labels)))
-            fig, ax = plt.subplots(figsize=(6, 3.5))  # smaller chart
-            bars = ax.bar(short_labels, mean_scores, color=bar_colors, width=0.6)
-            ax.set_ylabel('Rata-rata Skor', fontsize=11)
-            ax.set_xlabel('Ide', fontsize=11)
-            ax.set_title('Rata-rata Skor per Ide', fontsize=13, pad=10)
-            ax.set_xticks(np.arange(len(short_labels)))
-            ax.set_xticklabels(short_labels, rotation=15, ha='right', fontsize=10, wrap=True)
-            ax.tick_params(axis='y', labelsize=10)
-            ax.tick_params(axis='x', labelsize=10)
-            for i, (bar, score) in enumerate(zip(bars, mean_scores)):
-                ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.05, f"{score:.2f}", ha='center', va='bottom', fontsize=9)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.spines['left'].set_alpha(0.5)
-            ax.spines['bottom'].set_alpha(0.5)
-            ax.grid(axis='y', linestyle='--', alpha=0.15)
-            fig.tight_layout(pad=1.2)
-            st.pyplot(fig)
+            ide_labels, mean_scores = rata_rata_per_ide(df_scores, selected_labels)
+            col_jenis, col_backend = st.columns(2)
+            jenis_label = col_jenis.radio("Tampilan grafik", list(JENIS_CHART.keys()), horizontal=True, key="chart_view")
+            backend = col_backend.radio("Backend grafik", ["Vega-Lite (native)", "Matplotlib (gambar)"], horizontal=True, key="chart_backend")
+            jenis = JENIS_CHART[jenis_label]
+            st.subheader("Bar Chart: Rata-rata Skor Kriteria per Ide" if jenis == "rata_rata" else f"Grafik: Skor {jenis_label}")
+            kunci = kunci_chart(hasil_perbandingan, ide_labels)
+            if backend.startswith("Vega") and jenis != "radar":
+                st.vega_lite_chart(buat_spec_vega(kunci, jenis, ide_labels, df_scores, mean_scores), width="stretch")
+            else:
+                if jenis == "radar" and backend.startswith("Vega"):
+                    st.caption("Tampilan radar hanya tersedia sebagai gambar matplotlib.")
+                st.image(render_chart_png(kunci, jenis, ide_labels, df_scores, mean_scores))
             # Kesimpulan rata-rata tertinggi (bisa lebih dari 1)
             max_score = mean_scores.max()
-            best_idxs = [i for i, v in enumerate(mean_scores) if np.isclose(v, max_score)]
-            if len(best_idxs) == 1:
+            best_idxs = indeks_tertinggi(mean_scores)
+            ensemble = st.session_state.get('ensemble_perbandingan')
+            if ensemble and ensemble['statistik']['jumlah_sampel'] > 1 and len(ensemble['indeks']) == len(ide_labels):
+                tampilkan_ensemble(ensemble, ide_labels)
+                # Ide yang belum bisa dipisahkan dari ide teratas dianggap setara pada saran di bawah
+                posisi = {ide: n for n, ide in enumerate(ensemble['indeks'])}
+                best_idxs = [posisi[i] for i in ensemble['statistik']['setara_teratas']]
+            elif len(best_idxs) == 1:
                 st.success(f"Ide dengan rata-rata skor kriteria tertinggi: **{ide_labels[best_idxs[0]]}** (skor rata-rata {mean_scores[best_idxs[0]]:.2f})")
             else:
                 best_names = ', '.join(f'**{ide_labels[i]}**' for i in best_idxs)
                 st.info(f"Ada {len(best_idxs)} ide dengan rata-rata skor kriteria tertinggi: {best_names} (skor rata-rata {max_score:.2f})")
-            st.caption("Bar chart di atas menunjukkan rata-rata skor seluruh kriteria untuk masing-masing ide. Semakin tinggi batang, semakin unggul ide tersebut secara keseluruhan.")
+            st.caption("Bar chart di atas menunjukkan rata-rata skor seluruh kriteria untuk masing-masing ide. Skor kriteria biaya (Kesulitan Implementasi, Modal Awal) dibalik (6 - skor) sebelum dirata-rata, sehingga semakin tinggi batang, semakin unggul ide tersebut secara keseluruhan.")
             # Saran berdasarkan kriteria favorit user ATAU kriteria tertinggi per ide jika tidak ada kriteria tambahan
             if 'kriteria_list' in locals() and kriteria_list:
                 # Cari kriteria favorit user (selain default)
-                kriteria_favorit = None
-                for k in reversed(kriteria_list):
-                    if k not in ["Potensi Pasar", "Kesulitan Implementasi", "Inovasi", "Modal Awal"]:
-                        kriteria_favorit = k
-                        break
+                kriteria_favorit = cari_kriteria_favorit(kriteria_list)
                 if kriteria_favorit and kriteria_favorit in df_scores.columns:
+                    # Untuk kriteria cost (mis. biaya/modal), ide terbaik adalah yang skornya paling rendah
                     skor_kriteria = df_scores[kriteria_favorit]
-                    max_krit = skor_kriteria.max()
-                    best_krit_idxs = [i for i, v in enumerate(skor_kriteria) if np.isclose(v, max_krit)]
+                    best_krit_idxs = terbaik_pada_kriteria(df_scores, kriteria_favorit)
+                    max_krit = skor_kriteria.iloc[best_krit_idxs[0]]
                     if len(best_krit_idxs) == 1:
                         st.info(f"Jika Anda lebih mementingkan kriteria **{kriteria_favorit}**, maka ide yang paling cocok adalah: **{ide_labels[best_krit_idxs[0]]}** (skor {max_krit:.2f} pada kriteria tersebut).")
                     else:
@@ -483,4 +891,32 @@ with tabs[2]:
                     else:
                         # Hanya satu ide terbaik, tampilkan saran biasa
                         st.write(f"Kami menyimpulkan jika Ide **{ide_labels[best_idxs[0]]}** telah melalui proses evaluasi, ide ini terbukti memiliki nilai rata-rata paling tinggi di antara semua alternatif yang dipertimbangkan, sekaligus meraih skor kriteria tertinggi dalam aspek-aspek penilaian seperti inovasi, kelayakan, dan dampak potensial.")
+            # --- Peringkat multi-kriteria: bobot per kriteria + arah cost/benefit ---
+            with st.expander("⚖️ Peringkat Multi-Kriteria (bobot & TOPSIS)"):
+                import pandas as pd
+                from core.ranking import arah_kriteria, peringkat_ide, sensitivitas_peringkat
+                kriteria_skor = list(df_scores.columns)
+                metode_label = st.radio("Metode peringkat", ["TOPSIS", "Weighted Sum"], horizontal=True, key="ranking_metode")
+                biaya_default = [k for k, a in zip(kriteria_skor, arah_kriteria(kriteria_skor)) if a < 0]
+                kriteria_biaya = st.multiselect("Kriteria biaya (makin rendah makin baik)", kriteria_skor, default=biaya_default,
+                                                key=f"ranking_biaya_{kunci}")
+                st.caption("Bobot kriteria (0 = diabaikan)")
+                kolom_bobot = st.columns(min(len(kriteria_skor), 4))
+                bobot = [kolom_bobot[j % len(kolom_bobot)].slider(k, 0.0, 5.0, 1.0, 0.5, key=f"bobot_{k}")
+                         for j, k in enumerate(kriteria_skor)]
+                arah = [-1.0 if k in kriteria_biaya else 1.0 for k in kriteria_skor]
+                skor = df_scores.to_numpy(dtype=float)[:len(ide_labels)]
+                metode = "topsis" if metode_label == "TOPSIS" else "weighted_sum"
+                hasil_rank = peringkat_ide(skor, kriteria_skor, bobot, arah, metode)
+                sensitivitas = sensitivitas_peringkat(skor, kriteria_skor, bobot, arah, metode)
+                df_rank = pd.DataFrame({
+                    "Peringkat": hasil_rank['peringkat'],
+                    "Ide": ide_labels,
+                    "Nilai": hasil_rank['nilai'].round(3),
+                    "Peluang Peringkat 1 (%)": (sensitivitas['peluang_juara'] * 100).round(1),
+                    "Rentang Peringkat (±)": sensitivitas['std_peringkat'].round(2),
+                }).sort_values("Peringkat")
+                st.dataframe(df_rank, hide_index=True, width="stretch")
+                st.caption("Peluang Peringkat 1 dihitung dari 500 variasi acak bobot (±25%). Nilai mendekati 100% berarti "
+                           "peringkat teratas tidak mudah berubah walau bobot sedikit digeser.")
 
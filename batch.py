@@ -0,0 +1,299 @@
+"""Batch runner tanpa UI: brief riset (CSV/JSONL) masuk, ide & skor keluar.
+
+Contoh:
+    python batch.py briefs.csv -o hasil.jsonl --workers 4 --rpm 30
+    python batch.py briefs.jsonl -o hasil.parquet --format parquet
+    python batch.py briefs.csv -o hasil.jsonl --rank topsis
+
+Kolom input: segmen, pain_point, tren, kompetitor, kriteria (dipisah koma),
+dan opsional id. Setiap baris yang selesai langsung ditulis ke output dan
+dicatat di file checkpoint (<output>.checkpoint), sehingga run yang terhenti
+bisa dilanjutkan dengan perintah yang sama tanpa mengulang baris yang sudah
+selesai. Baris yang gagal ditulis dengan status "error" dan dicoba lagi saat
+resume. Dengan --rank, semua ide dari seluruh output diberi peringkat global
+(weighted sum / TOPSIS) dan ditulis ke <output>.ranking.csv.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.client import OpenRouterError
+from core.parsers import extract_scores_from_table, nama_kriteria, parse_ide_list
+from core.pipeline import chat_cached, generate_ide_lengkap
+from core.prompts import KRITERIA_DEFAULT, buat_prompt_ide, buat_prompt_perbandingan
+from core.ranking import METODE, peringkat_ide
+from core.ratelimit import RateLimiter
+from core.telemetry import get_telemetry
+
+DEFAULT_MODEL = 'deepseek/deepseek-chat-v3-0324'
+INPUT_FIELDS = ['segmen', 'pain_point', 'tren', 'kompetitor', 'kriteria']
+
+
+# --- Input ---
+def read_briefs(path):
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    for index, row in enumerate(rows):
+        brief = {field: row.get(field) or '' for field in INPUT_FIELDS}
+        kriteria = brief['kriteria']
+        if isinstance(kriteria, str):
+            kriteria = [k.strip() for k in kriteria.split(',') if k.strip()]
+        brief['kriteria'] = KRITERIA_DEFAULT + [k for k in kriteria if k not in KRITERIA_DEFAULT]
+        # ID stabil: id eksplisit, atau nomor baris + hash isi brief
+        if row.get('id'):
+            brief['id'] = str(row['id'])
+        else:
+            digest = hashlib.sha1(json.dumps(brief, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+            brief['id'] = f"{index}-{digest[:12]}"
+        yield brief
+
+
+# --- Output ---
+class JsonlSink:
+    def __init__(self, path):
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        # Mengembalikan id baris sukses yang sudah tersimpan permanen (untuk checkpoint)
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        return [record['id']] if record['status'] == 'ok' else []
+
+    def close(self):
+        self._file.close()
+        return []
+
+
+class ParquetSink:
+    # Parquet tidak bisa di-append, jadi hasil ditulis sebagai part file di dalam folder output
+    def __init__(self, path, flush_every=50):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Output Parquet membutuhkan pyarrow: pip install pyarrow")
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+        self._part = len([n for n in os.listdir(path) if n.endswith('.parquet')])
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.flush_every:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self._buffer:
+            return []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        rows = [
+            {**r, 'kriteria': list(r['kriteria']), 'scores': json.dumps(r.get('scores'), ensure_ascii=False)}
+            for r in self._buffer
+        ]
+        schema = pa.schema(
+            [(name, pa.string()) for name in ('id', 'segmen', 'pain_point', 'tren', 'kompetitor', 'model', 'status',
+                                             'error', 'hasil_ide_md', 'hasil_perbandingan', 'scores')]
+            + [('kriteria', pa.list_(pa.string())), ('ideas', pa.list_(pa.string())),
+               ('continuations', pa.int64()), ('elapsed_s', pa.float64())]
+        )
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), os.path.join(self.path, f"part-{self._part:05d}.parquet"))
+        self._part += 1
+        ids = [r['id'] for r in self._buffer if r['status'] == 'ok']
+        self._buffer = []
+        return ids
+
+    def close(self):
+        return self.flush()
+
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def mark(self, ids):
+        for row_id in ids:
+            self._file.write(row_id + '\n')
+            self.done.add(row_id)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# --- Proses satu brief ---
+def scores_to_dict(ide_col, df_scores):
+    if df_scores is None or df_scores.empty:
+        return None
+    return {
+        str(ide): {k: (None if v != v else float(v)) for k, v in row.items()}
+        for ide, (_, row) in zip(ide_col, df_scores.iterrows())
+    }
+
+
+def process_brief(brief, api_key, model_name, use_cache=True, compare=True, rate_limiter=None):
+    record = {**brief, 'model': model_name, 'status': 'ok', 'error': None}
+    started = time.monotonic()
+    try:
+        prompt = buat_prompt_ide(brief['segmen'], brief['pain_point'], brief['tren'], brief['kompetitor'])
+        hasil, lanjutan = generate_ide_lengkap(prompt, api_key, model_name, use_cache=use_cache, rate_limiter=rate_limiter)
+        ide_list = parse_ide_list(hasil)
+        record.update({'hasil_ide_md': hasil, 'ideas': ide_list, 'continuations': lanjutan,
+                       'hasil_perbandingan': None, 'scores': None})
+        if compare and len(ide_list) >= 2:
+            prompt_cmp = buat_prompt_perbandingan(ide_list, brief['kriteria'])
+            hasil_cmp = chat_cached(prompt_cmp, api_key, model_name, use_cache=use_cache, rate_limiter=rate_limiter,
+                                    tahap='perbandingan')
+            record['hasil_perbandingan'] = hasil_cmp
+            record['scores'] = scores_to_dict(*extract_scores_from_table(hasil_cmp))
+            get_telemetry().catat_parse('parse_skor', record['scores'] is not None, model_name)
+    except OpenRouterError as e:
+        record.update({'status': 'error', 'error': str(e)})
+    except Exception as e:
+        # Error tak terduga (parsing, jaringan, dsb.) cukup menggagalkan baris ini, bukan seluruh batch
+        record.update({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+    record['elapsed_s'] = round(time.monotonic() - started, 3)
+    return record
+
+
+def run_batch(briefs, sink, checkpoint, api_key, model_name, workers=4, rpm=None,
+              use_cache=True, compare=True, log=sys.stderr):
+    rate_limiter = RateLimiter(rpm) if rpm else None
+    pending_briefs = [b for b in briefs if b['id'] not in checkpoint.done]
+    total = len(pending_briefs)
+    if log:
+        print(f"{len(checkpoint.done)} baris sudah selesai sebelumnya, {total} baris akan diproses.", file=log)
+    started = time.monotonic()
+    selesai = gagal = 0
+    queue = iter(pending_briefs)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    running = set()
+    try:
+        while True:
+            # Jendela submit dibatasi agar Ctrl+C tidak harus menunggu ribuan baris antre
+            while len(running) < workers * 2:
+                brief = next(queue, None)
+                if brief is None:
+                    break
+                running.add(pool.submit(process_brief, brief, api_key, model_name, use_cache, compare, rate_limiter))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                selesai += 1
+                if record['status'] != 'ok':
+                    gagal += 1
+                checkpoint.mark(sink.write(record))
+                if log:
+                    laju = selesai / max(time.monotonic() - started, 1e-9)
+                    print(f"[{selesai}/{total}] {record['id']} {record['status']} "
+                          f"({record['elapsed_s']:.1f} dtk, {laju:.2f} baris/dtk)", file=log)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        checkpoint.mark(sink.close())
+    return {'processed': selesai, 'failed': gagal, 'elapsed_s': time.monotonic() - started}
+
+
+# --- Peringkat global seluruh output ---
+def read_records(path):
+    if os.path.isdir(path):
+        import pandas as pd
+        rows = pd.read_parquet(path).to_dict('records')
+        return [{**r, 'scores': json.loads(r['scores']) if r.get('scores') else None} for r in rows]
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def rank_records(records, metode='topsis'):
+    import numpy as np
+
+    # Baris terakhir per id yang menang (hasil resume menimpa baris error sebelumnya)
+    terakhir = {r['id']: r for r in records if r.get('status') == 'ok' and r.get('scores')}
+    baris, kriteria = [], {}
+    for record in terakhir.values():
+        for ide, skor in record['scores'].items():
+            skor = {nama_kriteria(k): v for k, v in skor.items()}
+            for k in skor:
+                kriteria.setdefault(k, len(kriteria))
+            baris.append((record['id'], ide, skor))
+    if not baris:
+        return []
+    matriks = np.full((len(baris), len(kriteria)), np.nan)
+    for i, (_, _, skor) in enumerate(baris):
+        for k, v in skor.items():
+            if v is not None:
+                matriks[i, kriteria[k]] = v
+    hasil = peringkat_ide(matriks, list(kriteria), metode=metode)
+    return [
+        {'peringkat': int(hasil['peringkat'][i]), 'nilai': round(float(hasil['nilai'][i]), 4),
+         'id': baris[i][0], 'ide': baris[i][1]}
+        for i in hasil['urutan']
+    ]
+
+
+def write_ranking(path, ranking):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['peringkat', 'nilai', 'id', 'ide'])
+        writer.writeheader()
+        writer.writerows(ranking)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate & bandingkan ide untuk banyak brief riset sekaligus.")
+    parser.add_argument('input', help="File CSV atau JSONL berisi brief riset")
+    parser.add_argument('-o', '--output', required=True, help="File output (.jsonl) atau folder output (.parquet)")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], help="Default: ditebak dari ekstensi output")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--api-key', default=os.environ.get('OPENROUTER_API_KEY', ''))
+    parser.add_argument('--workers', type=int, default=4, help="Jumlah brief yang diproses bersamaan")
+    parser.add_argument('--rpm', type=float, default=None, help="Batas request per menit ke OpenRouter")
+    parser.add_argument('--flush-every', type=int, default=50, help="Jumlah baris per part file Parquet")
+    parser.add_argument('--no-compare', action='store_true', help="Lewati perbandingan/skor ide")
+    parser.add_argument('--no-cache', action='store_true', help="Abaikan cache respons")
+    parser.add_argument('--rank', choices=sorted(METODE), help="Beri peringkat global semua ide di output setelah selesai")
+    args = parser.parse_args(argv)
+
+    if not args.api_key.strip():
+        parser.error("API key belum diisi (gunakan --api-key atau env OPENROUTER_API_KEY)")
+    fmt = args.format or ('parquet' if args.output.endswith('.parquet') else 'jsonl')
+    sink = ParquetSink(args.output, args.flush_every) if fmt == 'parquet' else JsonlSink(args.output)
+    checkpoint = Checkpoint(args.output.rstrip('/\\') + '.checkpoint')
+    try:
+        summary = run_batch(
+            read_briefs(args.input), sink, checkpoint, args.api_key, args.model,
+            workers=args.workers, rpm=args.rpm, use_cache=not args.no_cache, compare=not args.no_compare,
+        )
+    except KeyboardInterrupt:
+        print("Dihentikan. Jalankan perintah yang sama untuk melanjutkan dari checkpoint.", file=sys.stderr)
+        return 130
+    finally:
+        checkpoint.close()
+    print(f"Selesai: {summary['processed']} baris diproses, {summary['failed']} gagal, "
+          f"{summary['elapsed_s']:.1f} detik.", file=sys.stderr)
+    if args.rank:
+        ranking = rank_records(read_records(args.output), args.rank)
+        ranking_path = args.output.rstrip('/\\') + '.ranking.csv'
+        write_ranking(ranking_path, ranking)
+        print(f"Peringkat {len(ranking)} ide ditulis ke {ranking_path}.", file=sys.stderr)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Benchmark mesin simulasi BEP (core.bep).
+
+Mengukur biaya evaluasi grid sensitivitas omzet x biaya untuk beberapa
+ukuran grid, Monte Carlo 100 ribu sampel, dan loop Python murni per
+skenario sebagai acuan.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_bep --grid 21 101 301 --sampel 100000 --output hasil_bep.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+from core.bep import HORIZON_BULAN, grid_sensitivitas, inflasi_bulanan, monte_carlo, rentang
+
+MODAL = 50_000_000
+OMZET = 12_000_000
+BIAYA = 8_000_000
+SKENARIO = {'pertumbuhan': 0.02, 'inflasi': float(inflasi_bulanan(0.05)), 'ramp_up': 3}
+
+
+def ukur(fn, ulang):
+    samples = []
+    for _ in range(ulang):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        'n': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def bulan_bep_loop(modal, omzet, biaya, pertumbuhan, inflasi, ramp_up, horizon=HORIZON_BULAN):
+    # Acuan: simulasi satu skenario bulan per bulan dengan loop Python
+    kumulatif = 0.0
+    for bulan in range(1, horizon + 1):
+        ramp = min(bulan / ramp_up, 1.0) if ramp_up > 0 else 1.0
+        kumulatif += omzet * ramp * (1 + pertumbuhan) ** (bulan - 1) - biaya * (1 + inflasi) ** (bulan - 1)
+        if kumulatif >= modal:
+            return bulan
+    return float('inf')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark grid sensitivitas & Monte Carlo BEP.")
+    parser.add_argument('--grid', type=int, nargs='+', default=[21, 101, 301], help="Jumlah titik per sumbu grid")
+    parser.add_argument('--sampel', type=int, default=100_000, help="Jumlah sampel Monte Carlo")
+    parser.add_argument('--ulang', type=int, default=10)
+    parser.add_argument('--output', help="Simpan hasil JSON ke file")
+    args = parser.parse_args(argv)
+
+    hasil = {'horizon_bulan': HORIZON_BULAN, 'grid': {}}
+    for n in args.grid:
+        omzet_grid, biaya_grid = rentang(OMZET, 0.5, n), rentang(BIAYA, 0.5, n)
+        statistik = ukur(lambda: grid_sensitivitas(MODAL, omzet_grid, biaya_grid, **SKENARIO), args.ulang)
+        statistik['skenario'] = n * n
+        statistik['us_per_skenario'] = round(statistik['p50_ms'] * 1000 / (n * n), 3)
+        hasil['grid'][f"{n}x{n}"] = statistik
+    hasil['monte_carlo'] = ukur(lambda: monte_carlo(MODAL, OMZET, BIAYA, sd_omzet=0.2, sd_biaya=0.1,
+                                                    n_sampel=args.sampel, **SKENARIO), max(1, args.ulang // 2))
+    hasil['monte_carlo']['sampel'] = args.sampel
+
+    # Acuan loop Python pada grid terkecil, diskalakan per skenario
+    n = min(args.grid)
+    omzet_grid, biaya_grid = rentang(OMZET, 0.5, n), rentang(BIAYA, 0.5, n)
+    acuan = ukur(lambda: [bulan_bep_loop(MODAL, o, b, **SKENARIO) for o in omzet_grid for b in biaya_grid], 3)
+    acuan['us_per_skenario'] = round(acuan['p50_ms'] * 1000 / (n * n), 3)
+    hasil[f'loop_python_{n}x{n}'] = acuan
+
+    teks = json.dumps(hasil, indent=2)
+    print(teks)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(teks + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark end-to-end generate/compare memakai server tiruan OpenRouter.
+
+Menjalankan N sesi simulasi secara bersamaan (masing-masing: generate ide ->
+bandingkan ide -> ulangi), mengukur latensi p50/p95 per operasi, throughput
+dan error, lalu menjalankan micro-benchmark pemecah ide (`parse_ide_list`),
+`extract_scores_from_table` dan render grafik. Hasil disimpan sebagai JSON
+(beserta commit git) agar bisa dibandingkan antar commit.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_load --sessions 16 --rounds 3 --latency 0.5
+    python -m benchmarks.bench_load --compare benchmarks/results/<commit-lama>.json
+Gunakan --url untuk memakai server tiruan yang dijalankan terpisah.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+MODEL = 'deepseek/deepseek-chat-v3-0324'
+
+
+def ringkas(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {'n': 0}
+    return {
+        'n': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+# --- End-to-end ---
+def sesi(nomor, args, hasil_sesi):
+    from core.client import OpenRouterError
+    from core.comparison import bandingkan_ide
+    from core.parsers import parse_ide_list
+    from core.pipeline import generate_ide_lengkap
+    from core.prompts import KRITERIA_DEFAULT, buat_prompt_ide
+
+    latensi = defaultdict(list)
+    errors = Counter()
+    for putaran in range(args.rounds):
+        # Brief unik per sesi/putaran agar tidak ada cache hit antar sesi
+        prompt = buat_prompt_ide(f"segmen {nomor}-{putaran}", "harga mahal", "digital", "pemain lama")
+        on_update = (lambda teks: None) if args.stream else None
+        try:
+            mulai = time.perf_counter()
+            hasil, _ = generate_ide_lengkap(prompt, 'bench-key', MODEL, use_cache=False, on_update=on_update)
+            latensi['generate'].append(time.perf_counter() - mulai)
+            ide_list = parse_ide_list(hasil)
+            if args.compare and len(ide_list) >= 2:
+                mulai = time.perf_counter()
+                bandingkan_ide(ide_list, KRITERIA_DEFAULT, 'bench-key', MODEL, use_cache=False)
+                latensi['compare'].append(time.perf_counter() - mulai)
+        except OpenRouterError as e:
+            errors[e.status_code or 'koneksi'] += 1
+    hasil_sesi.append((latensi, errors))
+
+
+def bench_end_to_end(args):
+    from core.client import get_client
+
+    client = get_client()
+    client.api_url = args.url
+    hasil_sesi = []
+    threads = [threading.Thread(target=sesi, args=(n, args, hasil_sesi)) for n in range(args.sessions)]
+    mulai = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - mulai
+    latensi = defaultdict(list)
+    errors = Counter()
+    for latensi_sesi, errors_sesi in hasil_sesi:
+        for nama, samples in latensi_sesi.items():
+            latensi[nama].extend(samples)
+        errors.update(errors_sesi)
+    operasi = sum(len(v) for v in latensi.values())
+    return {
+        'wall_s': round(total, 3),
+        'operasi_per_detik': round(operasi / total, 3) if total else None,
+        'sesi_per_menit': round(args.sessions * args.rounds / total * 60, 2) if total else None,
+        'generate': ringkas(latensi['generate']),
+        'compare': ringkas(latensi['compare']),
+        'errors': {str(k): v for k, v in errors.items()},
+    }
+
+
+# --- Micro-benchmark ---
+def ukur(fn, ulang):
+    samples = []
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - mulai)
+    return ringkas(samples)
+
+
+def bench_micro(ulang):
+    from benchmarks.mock_openrouter import teks_ide, teks_perbandingan
+    from core import charts
+    from core.parsers import extract_scores_from_table, parse_ide_list
+    from core.prompts import KRITERIA_DEFAULT, buat_prompt_ide, buat_prompt_perbandingan
+    from core.scoring import rata_rata_per_ide
+
+    hasil_ide = teks_ide(buat_prompt_ide("mahasiswa", "kos mahal", "digital", "kos lama"))
+    ide_list = parse_ide_list(hasil_ide)
+    tabel = teks_perbandingan(buat_prompt_perbandingan(ide_list, KRITERIA_DEFAULT))
+    ide_col, df_scores = extract_scores_from_table(tabel)
+    labels, mean_scores = rata_rata_per_ide(df_scores, [f"Ide {i + 1}" for i in range(len(ide_list))])
+    return {
+        'parse_ide_list': ukur(lambda: parse_ide_list(hasil_ide), ulang * 10),
+        'extract_scores_from_table': ukur(lambda: extract_scores_from_table(tabel), ulang),
+        'chart_png_rata_rata': ukur(lambda: charts.figure_to_png(charts.buat_bar_chart_rata_rata(labels, mean_scores)),
+                                    max(1, ulang // 10)),
+        'chart_png_radar': ukur(lambda: charts.figure_to_png(charts.buat_radar_chart(labels, df_scores)),
+                                max(1, ulang // 10)),
+        'chart_vega_kriteria': ukur(lambda: charts.spec_grouped_bar_kriteria(labels, df_scores), ulang),
+    }
+
+
+def bandingkan_hasil(lama, baru):
+    # Cetak perubahan p50 antar dua file hasil (negatif = lebih cepat)
+    baris = []
+    for bagian in ('end_to_end', 'micro'):
+        for nama, nilai in (baru.get(bagian) or {}).items():
+            sebelum = ((lama.get(bagian) or {}).get(nama) or {})
+            if isinstance(nilai, dict) and nilai.get('p50_ms') and sebelum.get('p50_ms'):
+                delta = (nilai['p50_ms'] - sebelum['p50_ms']) / sebelum['p50_ms'] * 100
+                baris.append(f"{bagian}.{nama}: p50 {sebelum['p50_ms']} -> {nilai['p50_ms']} ms ({delta:+.1f}%)")
+    return baris
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline generate/compare dengan server tiruan OpenRouter.")
+    parser.add_argument('--sessions', type=int, default=8, help="Jumlah sesi simulasi bersamaan")
+    parser.add_argument('--rounds', type=int, default=2, help="Putaran generate+compare per sesi")
+    parser.add_argument('--latency', type=float, default=0.3, help="Latensi server tiruan (detik)")
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--token-delay', type=float, default=0.002)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-402', type=float, default=0.0)
+    parser.add_argument('--url', help="Pakai server tiruan yang sudah berjalan (default: jalankan di proses ini)")
+    parser.add_argument('--no-stream', dest='stream', action='store_false', help="Generate tanpa streaming")
+    parser.add_argument('--no-compare', dest='compare', action='store_false')
+    parser.add_argument('--micro-repeat', type=int, default=200)
+    parser.add_argument('--skip-e2e', action='store_true')
+    parser.add_argument('--output', help="File JSON hasil (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', dest='compare_with', metavar='FILE', help="Bandingkan dengan hasil sebelumnya")
+    args = parser.parse_args(argv)
+
+    # Cache & telemetri benchmark dipisah dari data aplikasi (harus di-set sebelum import core)
+    tmp = tempfile.mkdtemp(prefix='ideagen-bench-')
+    os.environ.setdefault('IDEAGEN_CACHE_PATH', os.path.join(tmp, 'cache.sqlite'))
+    os.environ.setdefault('IDEAGEN_TELEMETRY_LOG', '')
+    os.environ.setdefault('IDEAGEN_METRICS_PATH', '')
+    # Kuota rate limit bersama dimatikan agar yang terukur kapasitas aplikasi, bukan anggaran rpm
+    os.environ.setdefault('IDEAGEN_RPM', '0')
+    sys.path.insert(0, ROOT)
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from benchmarks.mock_openrouter import MockOpenRouter
+
+    hasil = {
+        'commit': git_commit(),
+        'waktu': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'konfigurasi': {k: v for k, v in vars(args).items() if k not in ('output', 'compare_with')},
+    }
+    if not args.skip_e2e:
+        mock = None
+        if not args.url:
+            mock = MockOpenRouter(latency=args.latency, jitter=args.jitter, token_delay=args.token_delay,
+                                  rate_429=args.rate_429, rate_402=args.rate_402)
+            args.url = mock.start()
+        try:
+            hasil['end_to_end'] = bench_end_to_end(args)
+        finally:
+            if mock is not None:
+                hasil.setdefault('end_to_end', {})['status_server'] = {str(k): v for k, v in mock.stats.items()}
+                mock.stop()
+    hasil['micro'] = bench_micro(args.micro_repeat)
+
+    teks = json.dumps(hasil, indent=2)
+    print(teks)
+    output = args.output or os.path.join(RESULTS_DIR, f"{hasil['commit']}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(teks + '\n')
+    print(f"Hasil disimpan di {output}", file=sys.stderr)
+    if args.compare_with:
+        with open(args.compare_with, encoding='utf-8') as f:
+            for baris in bandingkan_hasil(json.load(f), hasil):
+                print(baris, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
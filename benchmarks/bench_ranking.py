@@ -0,0 +1,85 @@
+"""Benchmark mesin peringkat multi-kriteria (core.ranking).
+
+Mengukur weighted sum, TOPSIS dan uji sensitivitas bobot pada matriks skor
+acak (skala 1-5) berukuran ribuan ide x puluhan kriteria, dan
+membandingkannya dengan loop Python murni sebagai acuan.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_ranking --ide 5000 --kriteria 30 --output hasil_ranking.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+from core.ranking import peringkat_ide, sensitivitas_peringkat
+
+
+def ukur(fn, ulang):
+    samples = []
+    for _ in range(ulang):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        'n': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def weighted_sum_loop(skor, bobot, arah):
+    # Acuan: implementasi loop Python per ide per kriteria
+    total_bobot = sum(bobot)
+    hasil = []
+    for baris in skor:
+        nilai = 0.0
+        for x, w, a in zip(baris, bobot, arah):
+            x = 6 - x if a < 0 else x
+            nilai += (x - 1) / 4 * w / total_bobot
+        hasil.append(nilai)
+    return sorted(range(len(hasil)), key=lambda i: -hasil[i])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark peringkat weighted sum / TOPSIS.")
+    parser.add_argument('--ide', type=int, default=5000)
+    parser.add_argument('--kriteria', type=int, default=30)
+    parser.add_argument('--ulang', type=int, default=20)
+    parser.add_argument('--sampel', type=int, default=200, help="Jumlah variasi bobot untuk uji sensitivitas")
+    parser.add_argument('--output', help="Simpan hasil JSON ke file")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(42)
+    skor = rng.integers(1, 6, size=(args.ide, args.kriteria)).astype(float)
+    skor[rng.random(skor.shape) < 0.01] = np.nan  # sebagian skor gagal terbaca
+    kriteria = [f"Kriteria {j}" for j in range(args.kriteria)]
+    kriteria[1], kriteria[3] = "Kesulitan Implementasi", "Modal Awal"
+    bobot = rng.uniform(0.5, 2.0, size=args.kriteria)
+
+    hasil = {
+        'ukuran': {'ide': args.ide, 'kriteria': args.kriteria, 'sampel_sensitivitas': args.sampel},
+        'weighted_sum': ukur(lambda: peringkat_ide(skor, kriteria, bobot, metode='weighted_sum'), args.ulang),
+        'topsis': ukur(lambda: peringkat_ide(skor, kriteria, bobot, metode='topsis'), args.ulang),
+        'sensitivitas_topsis': ukur(
+            lambda: sensitivitas_peringkat(skor, kriteria, bobot, metode='topsis', n_sampel=args.sampel),
+            max(1, args.ulang // 5)),
+    }
+    arah = [-1.0 if k in ("Kesulitan Implementasi", "Modal Awal") else 1.0 for k in kriteria]
+    skor_penuh = np.nan_to_num(skor, nan=3.0).tolist()
+    hasil['weighted_sum_loop_python'] = ukur(lambda: weighted_sum_loop(skor_penuh, bobot.tolist(), arah),
+                                             max(1, args.ulang // 5))
+
+    teks = json.dumps(hasil, indent=2)
+    print(teks)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(teks + '\n')
+
+
+if __name__ == '__main__':
+    main()
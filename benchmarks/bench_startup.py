@@ -0,0 +1,120 @@
+"""Benchmark cold-start & rerun app.py.
+
+Mengukur:
+- biaya import pertama tiap modul (di interpreter baru, agar tidak ter-cache),
+- waktu eksekusi script per rerun Streamlit (via streamlit.testing AppTest),
+  baik saat idle maupun saat tab visualisasi dibuka,
+- apakah pandas/matplotlib ikut termuat padahal tab visualisasi belum dibuka.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_startup --reruns 20 --output hasil_startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['streamlit', 'requests', 'core.pipeline', 'core.parsers', 'pandas', 'numpy', 'matplotlib.pyplot']
+
+CONTOH_PERBANDINGAN = """| Ide | Potensi Pasar (1-5) | Kesulitan Implementasi (1-5) | Inovasi (1-5) | Modal Awal (1-5) |
+|-----|-----|-----|-----|-----|
+| Ide 1 | 4 | 3 | 5 | 2 |
+| Ide 2 | 3 | 2 | 4 | 3 |
+| Ide 3 | 5 | 4 | 3 | 4 |
+
+Ringkasan Analisis: ..."""
+
+
+def ringkas(samples):
+    samples = sorted(samples)
+    return {
+        'n': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 2),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+    }
+
+
+def ukur_import(module, repeat):
+    # Setiap sampel memakai interpreter baru agar yang terukur benar-benar import pertama
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return ringkas(samples)
+
+
+def ukur_rerun(reruns):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=60)
+    at.secrets['OPENROUTER_API_KEY'] = ''
+    t = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - t
+    hasil = {'cold_run_ms': round(cold * 1000, 2)}
+
+    idle = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        idle.append(time.perf_counter() - t)
+    hasil['idle_rerun'] = ringkas(idle)
+    hasil['heavy_modules_loaded_idle'] = sorted(m for m in ('pandas', 'matplotlib') if m in sys.modules)
+
+    # Ada hasil perbandingan, tetapi tab visualisasi belum dibuka
+    at.session_state['hasil_perbandingan'] = CONTOH_PERBANDINGAN
+    at.session_state['compare_selected'] = ['Ide 1: Kos Hemat', 'Ide 2: Makan Sehat', 'Ide 3: Laundry Kilat']
+    closed = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        closed.append(time.perf_counter() - t)
+    hasil['rerun_with_comparison_tab_closed'] = ringkas(closed)
+
+    # Tab visualisasi dibuka
+    at.session_state['main_tabs'] = 'Visualisasi Perbandingan Skor Ide'
+    opened = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        opened.append(time.perf_counter() - t)
+    hasil['rerun_with_chart_tab_open'] = ringkas(opened)
+    hasil['exceptions'] = [e.message for e in at.exception]
+    return hasil
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reruns', type=int, default=20)
+    parser.add_argument('--import-repeat', type=int, default=5)
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    # Cache, telemetri & store benchmark dipisah dari data aplikasi (harus di-set sebelum import core)
+    tmp = tempfile.mkdtemp(prefix='ideagen-bench-')
+    os.environ.setdefault('IDEAGEN_CACHE_PATH', os.path.join(tmp, 'cache.sqlite'))
+    os.environ.setdefault('IDEAGEN_STORE_PATH', os.path.join(tmp, 'idea_store.sqlite'))
+    os.environ.setdefault('IDEAGEN_TELEMETRY_LOG', '')
+    os.environ.setdefault('IDEAGEN_METRICS_PATH', '')
+    sys.path.insert(0, ROOT)
+    hasil = {
+        'python': sys.version.split()[0],
+        'first_import': {m: ukur_import(m, args.import_repeat) for m in MODULES},
+        'script_run': ukur_rerun(args.reruns),
+    }
+    text = json.dumps(hasil, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""Server tiruan OpenRouter untuk benchmark & uji offline (tanpa kredit, tanpa internet).
+
+Meniru endpoint `POST /api/v1/chat/completions`:
+- prompt generate ide -> 3 ide kanned ("Ide 1: ... Ide 3: ...") dengan 6 poin,
+- prompt perbandingan -> tabel skor 1-5 untuk setiap ide bernomor di prompt,
+- prompt lanjutan / Tanya AI -> jawaban pendek,
+- `stream: true` -> Server-Sent Events per potongan teks, diakhiri `data: [DONE]`.
+
+Latensi (waktu hingga header + jeda per potongan stream) bisa diatur, dan
+sebagian request bisa dibuat gagal dengan 429 (beserta Retry-After) atau 402.
+
+Jalankan terpisah lalu arahkan aplikasi ke sana:
+    python -m benchmarks.mock_openrouter --port 8787 --latency 0.8 --rate-429 0.05
+    OPENROUTER_API_URL=http://127.0.0.1:8787/api/v1/chat/completions streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NAMA_IDE = [
+    "Kos Harian Digital", "Katering Sehat Mingguan", "Laundry Kilat Antar Jemput", "Sewa Alat Kemah",
+    "Kelas Coding Anak", "Marketplace Barang Bekas Kampus", "Jasa Titip Belanja", "Kopi Keliling Listrik",
+    "Bengkel Sepeda Panggilan", "Penitipan Hewan Harian",
+]
+POIN_IDE = [
+    "Deskripsi singkat ide: {nama} untuk {segmen} dengan model berlangganan dan harga terjangkau.",
+    "Analisis potensi target pasar: {segmen} di kota besar, pertumbuhan permintaan stabil tiap tahun.",
+    "Saran strategi pemasaran awal: konten TikTok/Instagram, kerja sama komunitas, promo pengguna pertama.",
+    "Potensi keunggulan kompetitif: layanan cepat, harga transparan, dan pemesanan lewat aplikasi.",
+    "Prediksi tantangan/risikonya: persaingan harga, biaya akuisisi pelanggan, dan operasional harian.",
+    "Poin-poin SWOT sederhana:\n   - S: biaya operasional rendah\n   - W: brand belum dikenal\n"
+    "   - O: tren digital\n   - T: pemain besar masuk pasar",
+]
+
+
+def _angka(seed, *parts):
+    # Angka deterministik dari isi prompt agar hasil bisa dibandingkan antar run
+    return int(hashlib.sha1(("|".join(str(p) for p in (seed,) + parts)).encode("utf-8")).hexdigest(), 16)
+
+
+def teks_ide(prompt, nomor_awal=1, jumlah=3):
+    segmen = (re.search(r"Segmen pasar:\s*(.*)", prompt) or [None, "mahasiswa"])[1].strip() or "mahasiswa"
+    blok = []
+    for nomor in range(nomor_awal, nomor_awal + jumlah):
+        nama = NAMA_IDE[_angka(prompt, nomor) % len(NAMA_IDE)]
+        poin = "\n".join(f"{i + 1}. {p.format(nama=nama, segmen=segmen)}" for i, p in enumerate(POIN_IDE))
+        blok.append(f"**Ide {nomor}: {nama}**\n{poin}")
+    return "\n\n".join(blok)
+
+
+def teks_perbandingan(prompt):
+    kriteria = [k.strip() for k in (re.search(r"Kriteria:\s*(.*)", prompt) or [None, "Potensi Pasar"])[1].split(",")]
+    # Hanya baris "N. Ide M: ..." / "N. M: ..." dari prompt; daftar bernomor di dalam teks ide tidak dihitung sebagai ide
+    nomor = [int(n) for n in re.findall(r"^(\d+)\. \**(?:Ide\s+)?\d+\s*:", prompt, re.M)] or [1, 2]
+    baris = ["| Ide | " + " | ".join(f"{k} (1-5)" for k in kriteria) + " |", "|" + "---|" * (len(kriteria) + 1)]
+    for n in nomor:
+        skor = [str(1 + _angka(prompt.split("Ide:")[0], n, k) % 5) for k in kriteria]
+        baris.append(f"| Ide {n} | " + " | ".join(skor) + " |")
+    return "\n".join(baris) + "\n\nRingkasan Analisis:\n- Skor dihasilkan oleh server tiruan untuk benchmark."
+
+
+def jawaban_untuk(messages):
+    prompt = messages[-1]["content"] if messages else ""
+    if prompt.startswith("Bandingkan ide-ide"):
+        return teks_perbandingan(prompt)
+    if prompt.startswith("Jawaban di atas terpotong"):
+        nomor_awal = int((re.search(r"Ide (\d+):", prompt) or [None, 3])[1])
+        return teks_ide(messages[0]["content"], nomor_awal, 3 - nomor_awal + 1)
+    if "Buatkan 3 ide" in prompt:
+        return teks_ide(prompt)
+    return "Jawaban singkat dari server tiruan: fokuskan strategi pada kanal digital dan uji pasar kecil dulu."
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Klien keep-alive yang menutup koneksi bukan error yang perlu dicetak
+        if not isinstance(sys.exc_info()[1], (ConnectionError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class MockOpenRouter:
+    """Server tiruan yang berjalan di thread latar belakang.
+
+    `latency` = detik sebelum header respons dikirim (± `jitter`),
+    `token_delay` = jeda antar potongan SSE, `rate_429`/`rate_402` = peluang
+    request ditolak. Statistik status tersedia di `stats`.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, jitter=0.0, token_delay=0.01, chunk_chars=16,
+                 rate_429=0.0, rate_402=0.0, retry_after=0.2, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.chunk_chars = chunk_chars
+        self.rate_429 = rate_429
+        self.rate_402 = rate_402
+        self.retry_after = retry_after
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="mock-openrouter")
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _undian(self):
+        with self._lock:
+            return self._random.random(), self._random.uniform(-self.jitter, self.jitter)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, data):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                undian, jitter = mock._undian()
+                time.sleep(max(0.0, mock.latency + jitter))
+                if undian < mock.rate_429:
+                    mock.stats[429] += 1
+                    self._json(429, {"error": {"code": 429, "message": "Rate limit exceeded (mock)"}},
+                               {"Retry-After": str(mock.retry_after)})
+                    return
+                if undian < mock.rate_429 + mock.rate_402:
+                    mock.stats[402] += 1
+                    self._json(402, {"error": {"code": 402, "message": "Insufficient credits (mock)"}})
+                    return
+                mock.stats[200] += 1
+                messages = payload.get("messages") or []
+                teks = jawaban_untuk(messages)
+                usage = {
+                    "prompt_tokens": sum(len(m.get("content") or "") for m in messages) // 4,
+                    "completion_tokens": len(teks) // 4,
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                model = payload.get("model", "mock/model")
+                if not payload.get("stream"):
+                    self._json(200, {"model": model, "usage": usage,
+                                     "choices": [{"message": {"role": "assistant", "content": teks}, "finish_reason": "stop"}]})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self._chunk(b": OPENROUTER PROCESSING\n\n")
+                for i in range(0, len(teks), mock.chunk_chars):
+                    chunk = {"model": model, "choices": [{"delta": {"content": teks[i:i + mock.chunk_chars]}, "finish_reason": None}]}
+                    self._chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    if mock.token_delay:
+                        time.sleep(mock.token_delay)
+                akhir = {"model": model, "usage": usage, "choices": [{"delta": {}, "finish_reason": "stop"}]}
+                self._chunk(f"data: {json.dumps(akhir)}\n\n".encode("utf-8"))
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server tiruan OpenRouter untuk benchmark offline.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.5, help="Detik sebelum respons dikirim")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variasi acak latensi (± detik)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Jeda antar potongan stream (detik)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Peluang request dibalas 429")
+    parser.add_argument("--rate-402", type=float, default=0.0, help="Peluang request dibalas 402")
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    mock = MockOpenRouter(args.host, args.port, latency=args.latency, jitter=args.jitter, token_delay=args.token_delay,
+                          rate_429=args.rate_429, rate_402=args.rate_402, retry_after=args.retry_after)
+    print(f"Mock OpenRouter berjalan di {mock.start()}")
+    print("Set env OPENROUTER_API_URL ke alamat di atas. Ctrl+C untuk berhenti.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Paket inti (non-UI) untuk Market Research & Idea Generator.
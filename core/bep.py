@@ -0,0 +1,109 @@
+"""Mesin simulasi Break Even Point (BEP) berbasis NumPy.
+
+Arus kas disimulasikan per bulan: omzet tumbuh `pertumbuhan` per bulan dan
+naik bertahap selama masa ramp-up, biaya operasional naik `inflasi` per
+bulan, dan BEP adalah bulan pertama saat laba kumulatif menutup modal awal.
+Semua parameter boleh berupa array (di-broadcast), sehingga grid parameter
+(heatmap omzet x biaya) dan ratusan ribu sampel Monte Carlo dihitung sekaligus
+per blok tanpa loop Python per skenario.
+"""
+import numpy as np
+
+HORIZON_BULAN = 60
+N_SAMPEL = 100_000
+UKURAN_BLOK = 8192  # Skenario per blok: matriks (blok x horizon) tetap kecil dan muat di cache CPU
+
+
+def inflasi_bulanan(inflasi_tahunan):
+    # Penurunan >= 100% per tahun dibatasi ke -100% (akar dari bilangan negatif = NaN)
+    return np.maximum(1.0 + np.asarray(inflasi_tahunan, dtype=float), 0.0) ** (1.0 / 12.0) - 1.0
+
+
+def bulan_bep(modal, omzet, biaya, pertumbuhan=0.0, inflasi=0.0, ramp_up=0, horizon=HORIZON_BULAN,
+              ukuran_blok=UKURAN_BLOK):
+    """Bulan ke berapa modal kembali, untuk setiap kombinasi parameter.
+
+    `pertumbuhan` dan `inflasi` berupa rasio per bulan (0.02 = 2%), `ramp_up`
+    = jumlah bulan hingga omzet penuh (omzet bulan ke-k = k/ramp_up bagian).
+    Hasil berbentuk broadcast semua parameter: 0 jika modal <= 0, `np.inf`
+    jika BEP tidak tercapai dalam `horizon` bulan. Tanpa skenario (pertumbuhan,
+    inflasi dan ramp-up 0) dipakai rumus ceil(modal / (omzet - biaya)) yang
+    tidak dibatasi horizon. Pertumbuhan dan inflasi dibatasi minimal -99% per bulan.
+    """
+    params = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (modal, omzet, biaya, pertumbuhan, inflasi, ramp_up)))
+    bentuk = params[0].shape
+    flat = [p.reshape(-1) for p in params]
+    flat[3] = np.maximum(flat[3], -0.99)
+    flat[4] = np.maximum(flat[4], -0.99)
+    hasil = np.empty(flat[0].size)
+    t = np.arange(horizon, dtype=float)  # bulan ke-1 = t 0
+    for awal in range(0, hasil.size, ukuran_blok):
+        m, o, b, g, i, r = (p[awal:awal + ukuran_blok, None] for p in flat)
+        # Parameter yang sama untuk seluruh blok (kasus umum di grid) cukup dihitung sekali sebagai satu baris
+        g, i, r = (x[:1] if (x == x[0]).all() else x for x in (g, i, r))
+        # Skenario tanpa pertumbuhan/inflasi/ramp-up: bentuk tertutup, sama dengan rumus dasar Modal / (Omzet - Biaya)
+        polos = np.broadcast_to((g == 0) & (i == 0) & (r <= 0), m.shape)[:, 0]
+        laba_tetap = (o - b)[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bulan = np.where(laba_tetap > 0, np.ceil(m[:, 0] / laba_tetap), np.inf)
+        if not polos.all():
+            faktor_omzet = np.where(r > 0, np.minimum((t + 1) / np.maximum(r, 1.0), 1.0), 1.0) * np.exp(np.log1p(g) * t)
+            laba = o * faktor_omzet - b * np.exp(np.log1p(i) * t)
+            tercapai = np.cumsum(laba, axis=1) >= m
+            simulasi = np.argmax(tercapai, axis=1) + 1.0
+            simulasi[~tercapai.any(axis=1)] = np.inf
+            bulan = np.where(polos, bulan, simulasi)
+        bulan[m[:, 0] <= 0] = 0.0
+        hasil[awal:awal + bulan.size] = bulan
+    return hasil.reshape(bentuk)
+
+
+def rentang(nilai, persen=0.5, n=21):
+    # Nilai di sekitar input (± persen) untuk sumbu grid sensitivitas
+    return np.linspace(nilai * (1 - persen), nilai * (1 + persen), n)
+
+
+def grid_sensitivitas(modal, omzet_nilai, biaya_nilai, **skenario):
+    """Heatmap bulan BEP: baris = omzet, kolom = biaya (array len(omzet) x len(biaya))."""
+    omzet_nilai = np.asarray(omzet_nilai, dtype=float)
+    biaya_nilai = np.asarray(biaya_nilai, dtype=float)
+    return bulan_bep(modal, omzet_nilai[:, None], biaya_nilai[None, :], **skenario)
+
+
+def monte_carlo(modal, omzet, biaya, pertumbuhan=0.0, inflasi=0.0, ramp_up=0, sd_omzet=0.2, sd_biaya=0.1,
+                sd_modal=0.0, sd_pertumbuhan=0.0, n_sampel=N_SAMPEL, seed=0, horizon=HORIZON_BULAN):
+    """Sampel bulan BEP dengan parameter acak.
+
+    Omzet, biaya dan modal diambil dari distribusi normal dengan simpangan
+    baku relatif `sd_*` (0.2 = ±20%, dipotong di 0); pertumbuhan omzet
+    dengan simpangan baku absolut `sd_pertumbuhan`.
+    """
+    rng = np.random.default_rng(seed)
+    sampel_omzet = np.maximum(rng.normal(omzet, abs(omzet) * sd_omzet, n_sampel), 0.0)
+    sampel_biaya = np.maximum(rng.normal(biaya, abs(biaya) * sd_biaya, n_sampel), 0.0)
+    sampel_modal = np.maximum(rng.normal(modal, abs(modal) * sd_modal, n_sampel), 0.0) if sd_modal else modal
+    sampel_pertumbuhan = rng.normal(pertumbuhan, sd_pertumbuhan, n_sampel) if sd_pertumbuhan else pertumbuhan
+    return bulan_bep(sampel_modal, sampel_omzet, sampel_biaya, np.maximum(sampel_pertumbuhan, -0.99), inflasi, ramp_up,
+                     horizon)
+
+
+def peluang_bep_dalam(bulan, n):
+    # Peluang balik modal paling lambat bulan ke-n
+    return float(np.mean(np.asarray(bulan) <= n))
+
+
+def distribusi_bulan(bulan, horizon=HORIZON_BULAN):
+    # Jumlah sampel per bulan BEP (indeks 0..horizon); indeks terakhir = tidak tercapai dalam horizon
+    bulan = np.asarray(bulan)
+    return np.bincount(np.where(bulan <= horizon, bulan, horizon + 1).astype(int), minlength=horizon + 2)
+
+
+def ringkasan_sampel(bulan, target, horizon=HORIZON_BULAN):
+    # Persentil tanpa interpolasi agar sampel "tidak tercapai" (inf) tetap bermakna
+    p10, p50, p90 = np.quantile(bulan, [0.1, 0.5, 0.9], method='inverted_cdf')
+    return {
+        'peluang_target': peluang_bep_dalam(bulan, target),
+        'peluang_horizon': float(np.mean(bulan <= horizon)),
+        'p10': float(p10), 'p50': float(p50), 'p90': float(p90),
+        'horizon': horizon,
+    }
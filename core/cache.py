@@ -0,0 +1,146 @@
+"""Cache respons OpenRouter: tier LRU di memori + tier SQLite di disk.
+
+Kunci cache = hash dari (model, prompt lengkap, temperature, max_tokens),
+sehingga prompt yang sama persis ke model yang sama tidak perlu dikirim ulang.
+Tier disk dipakai bersama oleh semua sesi Streamlit (dan proses lain).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "IDEAGEN_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "openrouter_cache.sqlite"),
+)
+
+
+def make_cache_key(model_name, prompt, temperature, max_tokens, sampel=0):
+    # `sampel` > 0 membedakan beberapa jawaban untuk prompt yang sama (perbandingan ensemble)
+    data = [model_name, prompt, temperature, max_tokens] + ([sampel] if sampel else [])
+    raw = json.dumps(data, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_items=256, max_disk_items=5000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY, model TEXT, value TEXT,"
+                    " created_at REAL, last_access REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+
+    @contextmanager
+    def _connect(self):
+        # Koneksi baru per operasi: aman dipakai lintas thread dan lintas proses
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if not self._expired(item[0], now):
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    return item[1]
+                del self._memory[key]
+        if self.path:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    with self._lock:
+                        self._put_memory(key, row[1], row[0])
+                        self.hits_disk += 1
+                    return row[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, model_name=""):
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, value)
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, value, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, value, now, now),
+                )
+                self._evict_disk(conn, now)
+
+    def _put_memory(self, key, created_at, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, conn, now):
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        # LRU: buang entri yang paling lama tidak diakses jika melebihi batas
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_items,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "memory_items": len(self._memory),
+            }
+        if self.path:
+            with self._connect() as conn:
+                stats["disk_items"] = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    # Satu instance per proses, dipakai bersama oleh semua sesi Streamlit
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,220 @@
+import hashlib
+import io
+import json
+import re
+
+# matplotlib sengaja di-import di dalam fungsi agar hanya dimuat saat tab visualisasi dirender
+
+
+def short_label(label):
+    # Ubah label sumbu X menjadi 2 kata pertama + '...'; tanda model "[...]" (mode multi-model)
+    # disingkat jadi kata pertamanya dan dipasang di depan, agar ide dari model yang sama tetap beda
+    prefix = ''
+    match = re.match(r'^\[([^\]]*)\]\s*', label)
+    if match:
+        prefix = f"[{(match.group(1).split() or [''])[0]}] "
+        label = label[match.end():]
+    words = label.split()
+    if len(words) > 2:
+        return prefix + ' '.join(words[:2]) + '...'
+    return prefix + label
+
+
+def _label_sumbu(ide_labels):
+    # Sumbu X Vega memakai nomor urut ide (unik); teks yang tampil diambil dari daftar label singkat
+    return json.dumps([short_label(label) for label in ide_labels], ensure_ascii=False) + "[datum.value]"
+
+
+def kunci_chart(hasil_perbandingan, ide_labels):
+    # Kunci memoization: hash teks perbandingan + label ide yang dipilih
+    raw = json.dumps([hasil_perbandingan, list(ide_labels)], ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def figure_to_png(fig):
+    # Rasterisasi sekali lalu figure langsung dilepas agar tidak menumpuk di memori sesi panjang
+    import matplotlib.pyplot as plt
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=150)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+# --- Matplotlib ---
+def buat_bar_chart_rata_rata(ide_labels, mean_scores):
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    short_labels = [short_label(label) for label in ide_labels]
+    bar_colors = plt.cm.Paired(np.linspace(0, 1, len(short_labels)))
+    fig, ax = plt.subplots(figsize=(6, 3.5))  # smaller chart
+    # Posisi bar = nomor urut, bukan teks label (label singkat bisa sama untuk ide berbeda)
+    bars = ax.bar(np.arange(len(short_labels)), mean_scores, color=bar_colors, width=0.6)
+    ax.set_ylabel('Rata-rata Skor', fontsize=11)
+    ax.set_xlabel('Ide', fontsize=11)
+    ax.set_title('Rata-rata Skor per Ide', fontsize=13, pad=10)
+    ax.set_xticks(np.arange(len(short_labels)))
+    ax.set_xticklabels(short_labels, rotation=15, ha='right', fontsize=10, wrap=True)
+    ax.tick_params(axis='y', labelsize=10)
+    ax.tick_params(axis='x', labelsize=10)
+    for bar, score in zip(bars, mean_scores):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.05, f"{score:.2f}", ha='center', va='bottom', fontsize=9)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_alpha(0.5)
+    ax.spines['bottom'].set_alpha(0.5)
+    ax.grid(axis='y', linestyle='--', alpha=0.15)
+    fig.tight_layout(pad=1.2)
+    return fig
+
+
+def buat_grouped_bar_kriteria(ide_labels, df_scores):
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    kriteria = list(df_scores.columns)
+    skor = df_scores.to_numpy(dtype=float)[:len(ide_labels)]
+    x = np.arange(len(ide_labels))
+    lebar = 0.8 / max(len(kriteria), 1)
+    colors = plt.cm.Paired(np.linspace(0, 1, len(kriteria)))
+    fig, ax = plt.subplots(figsize=(7, 3.8))
+    for j, nama in enumerate(kriteria):
+        ax.bar(x - 0.4 + lebar * (j + 0.5), skor[:, j], width=lebar, color=colors[j], label=nama)
+    ax.set_xticks(x)
+    ax.set_xticklabels([short_label(label) for label in ide_labels], rotation=15, ha='right', fontsize=10)
+    ax.set_ylabel('Skor', fontsize=11)
+    ax.set_ylim(0, 5.5)
+    ax.set_title('Skor per Kriteria', fontsize=13, pad=10)
+    ax.legend(fontsize=8, frameon=False, ncol=min(len(kriteria), 3), loc='upper center', bbox_to_anchor=(0.5, -0.2))
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(axis='y', linestyle='--', alpha=0.15)
+    fig.tight_layout(pad=1.2)
+    return fig
+
+
+def buat_radar_chart(ide_labels, df_scores):
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    kriteria = list(df_scores.columns)
+    skor = df_scores.to_numpy(dtype=float)[:len(ide_labels)]
+    sudut = np.linspace(0, 2 * np.pi, len(kriteria), endpoint=False)
+    sudut_tertutup = np.concatenate([sudut, sudut[:1]])
+    colors = plt.cm.Paired(np.linspace(0, 1, len(ide_labels)))
+    fig, ax = plt.subplots(figsize=(5, 5), subplot_kw={'polar': True})
+    for i, label in enumerate(ide_labels):
+        nilai = np.concatenate([skor[i], skor[i, :1]])
+        ax.plot(sudut_tertutup, nilai, color=colors[i], linewidth=1.5, label=short_label(label))
+        ax.fill(sudut_tertutup, nilai, color=colors[i], alpha=0.12)
+    ax.set_xticks(sudut)
+    ax.set_xticklabels(kriteria, fontsize=9)
+    ax.set_ylim(0, 5)
+    ax.set_yticks([1, 2, 3, 4, 5])
+    ax.tick_params(axis='y', labelsize=8)
+    ax.legend(fontsize=8, frameon=False, loc='upper right', bbox_to_anchor=(1.3, 1.1))
+    fig.tight_layout(pad=1.2)
+    return fig
+
+
+# --- Vega-Lite (dirender native oleh Streamlit di browser, tanpa rasterisasi di server) ---
+def spec_bar_rata_rata(ide_labels, mean_scores):
+    values = [
+        {'urutan': i, 'label': label, 'skor': round(float(score), 2)}
+        for i, (label, score) in enumerate(zip(ide_labels, mean_scores))
+    ]
+    return {
+        'data': {'values': values},
+        'title': 'Rata-rata Skor per Ide',
+        'encoding': {
+            'x': {'field': 'urutan', 'type': 'ordinal', 'title': 'Ide',
+                  'axis': {'labelAngle': -15, 'labelExpr': _label_sumbu(ide_labels)}},
+            'y': {'field': 'skor', 'type': 'quantitative', 'title': 'Rata-rata Skor', 'scale': {'domain': [0, 5]}},
+        },
+        'layer': [
+            {'mark': {'type': 'bar', 'cornerRadiusEnd': 3},
+             'encoding': {'color': {'field': 'urutan', 'type': 'nominal', 'legend': None},
+                          'tooltip': [{'field': 'label', 'title': 'Ide'}, {'field': 'skor', 'format': '.2f'}]}},
+            {'mark': {'type': 'text', 'dy': -8, 'fontSize': 11},
+             'encoding': {'text': {'field': 'skor', 'format': '.2f'}}},
+        ],
+    }
+
+
+def spec_grouped_bar_kriteria(ide_labels, df_scores):
+    values = [
+        {'urutan': i, 'label': label, 'kriteria': str(kriteria), 'skor': float(skor)}
+        for i, (label, (_, row)) in enumerate(zip(ide_labels, df_scores.iterrows()))
+        for kriteria, skor in row.items()
+        if skor == skor  # lewati NaN
+    ]
+    return {
+        'data': {'values': values},
+        'title': 'Skor per Kriteria',
+        'mark': {'type': 'bar', 'cornerRadiusEnd': 2},
+        'encoding': {
+            'x': {'field': 'urutan', 'type': 'ordinal', 'title': 'Ide',
+                  'axis': {'labelAngle': -15, 'labelExpr': _label_sumbu(ide_labels)}},
+            'xOffset': {'field': 'kriteria', 'type': 'nominal'},
+            'y': {'field': 'skor', 'type': 'quantitative', 'title': 'Skor', 'scale': {'domain': [0, 5]}},
+            'color': {'field': 'kriteria', 'type': 'nominal', 'title': 'Kriteria'},
+            'tooltip': [{'field': 'label', 'title': 'Ide'}, {'field': 'kriteria'}, {'field': 'skor'}],
+        },
+    }
+
+
+# --- Simulasi BEP ---
+def format_rupiah_singkat(nilai):
+    if abs(nilai) >= 1e9:
+        return f"{nilai / 1e9:.1f} M"
+    if abs(nilai) >= 1e6:
+        return f"{nilai / 1e6:.1f} jt"
+    return f"{nilai / 1e3:.0f} rb"
+
+
+def spec_heatmap_bep(omzet_nilai, biaya_nilai, bulan, horizon):
+    # Baris = omzet, kolom = biaya; sel yang tidak mencapai BEP diberi warna abu-abu
+    values = [
+        {'omzet': format_rupiah_singkat(o), 'biaya': format_rupiah_singkat(b),
+         'bulan': None if bulan[i, j] == float('inf') else float(bulan[i, j]),
+         'label': f"> {horizon}" if bulan[i, j] == float('inf') else f"{bulan[i, j]:.0f}"}
+        for i, o in enumerate(omzet_nilai)
+        for j, b in enumerate(biaya_nilai)
+    ]
+    return {
+        'data': {'values': values},
+        'title': 'Bulan BEP: Omzet x Biaya',
+        'mark': 'rect',
+        'encoding': {
+            'x': {'field': 'biaya', 'type': 'ordinal', 'sort': None, 'title': 'Biaya/bulan'},
+            'y': {'field': 'omzet', 'type': 'ordinal', 'sort': None, 'title': 'Omzet/bulan'},
+            'color': {'condition': {'test': 'datum.bulan === null', 'value': '#d9d9d9'},
+                      'field': 'bulan', 'type': 'quantitative', 'title': 'Bulan',
+                      'scale': {'scheme': 'redyellowgreen', 'reverse': True}},
+            'tooltip': [{'field': 'omzet'}, {'field': 'biaya'}, {'field': 'label', 'title': 'Bulan BEP'}],
+        },
+    }
+
+
+def spec_distribusi_bep(distribusi, horizon, target):
+    # Histogram bulan BEP hasil Monte Carlo, bulan <= target diberi warna berbeda
+    total = max(int(distribusi.sum()), 1)
+    values = [
+        {'bulan': str(b) if b <= horizon else f"> {horizon}", 'urutan': b,
+         'persen': round(100 * int(n) / total, 2), 'dalam_target': b <= target}
+        for b, n in enumerate(distribusi) if n
+    ]
+    return {
+        'data': {'values': values},
+        'title': 'Distribusi Bulan BEP',
+        'mark': {'type': 'bar', 'cornerRadiusEnd': 2},
+        'encoding': {
+            'x': {'field': 'bulan', 'type': 'ordinal', 'sort': {'field': 'urutan'}, 'title': 'Bulan'},
+            'y': {'field': 'persen', 'type': 'quantitative', 'title': '% skenario'},
+            'color': {'field': 'dalam_target', 'type': 'nominal', 'legend': None,
+                      'scale': {'domain': [True, False], 'range': ['#2ca02c', '#bdbdbd']}},
+            'tooltip': [{'field': 'bulan'}, {'field': 'persen', 'title': '%'}],
+        },
+    }
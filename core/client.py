@@ -0,0 +1,236 @@
+"""Klien HTTP OpenRouter bersama (thread-safe) dengan koneksi keep-alive.
+
+Satu `requests.Session` dengan pool koneksi per host dipakai oleh semua sesi,
+sehingga handshake TCP+TLS tidak diulang setiap kali memanggil AI. Respons
+429/5xx dicoba ulang otomatis dengan backoff eksponensial + jitter yang
+menghormati header `Retry-After`, dan jumlah request yang berjalan bersamaan
+dibatasi agar lonjakan pengguna mengantre, bukan ditolak.
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = os.environ.get("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# ttfb = detik hingga header respons diterima (percobaan terakhir)
+Completion = namedtuple("Completion", ["content", "finish_reason", "usage", "model", "retries", "ttfb"])
+
+
+class OpenRouterError(Exception):
+    def __init__(self, message, status_code=None, body=""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+        self.retries = 0
+
+
+def parse_retry_after(value):
+    # Retry-After bisa berupa jumlah detik atau tanggal HTTP
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenRouterClient:
+    def __init__(self, api_url=API_URL, pool_maxsize=16, connect_timeout=5, read_timeout=60,
+                 max_retries=3, backoff_base=1.0, backoff_max=30.0, max_in_flight=8):
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._session = requests.Session()
+        # Retry ditangani sendiri (agar Retry-After & jitter bisa dikontrol)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0, pool_block=True)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def backoff_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: acak antara 0 dan base * 2^attempt
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _send(self, headers, payload, stream):
+        # Satu percobaan: (response, None, None) jika 200, atau (None, error, retry_after)
+        try:
+            response = self._session.post(self.api_url, headers=headers, json=payload,
+                                          timeout=self.timeout, stream=stream)
+        except requests.ConnectionError as e:
+            return None, OpenRouterError(f"Error koneksi: {e}"), None
+        except requests.RequestException as e:
+            # Read timeout tidak dicoba ulang: sudah menunggu selama read_timeout
+            raise OpenRouterError(f"Error koneksi: {e}") from e
+        if response.status_code == 200:
+            return response, None, None
+        error = OpenRouterError(
+            f"Error dari server: {response.status_code} - {response.text}",
+            status_code=response.status_code,
+            body=response.text,
+        )
+        response.close()
+        if response.status_code not in RETRY_STATUS:
+            raise error
+        return None, error, parse_retry_after(response.headers.get("Retry-After"))
+
+    def _post(self, api_key, payload, stream=False):
+        # Mengembalikan (response, jumlah retry, release). `release` melepas slot
+        # in-flight dan harus dipanggil setelah body respons selesai dibaca.
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        attempt = 0
+        while True:
+            self._slots.acquire()
+            try:
+                response, error, retry_after = self._send(headers, payload, stream)
+            except BaseException:
+                self._slots.release()
+                raise
+            if response is not None:
+                return response, attempt, self._release_once()
+            self._slots.release()
+            if attempt >= self.max_retries:
+                error.retries = attempt
+                raise error
+            # Slot dilepas selama menunggu agar request lain tetap jalan
+            time.sleep(self.backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    def _release_once(self):
+        released = []
+
+        def release():
+            if not released:
+                released.append(True)
+                self._slots.release()
+        return release
+
+    def chat(self, prompt, api_key, model_name, max_tokens=1200, temperature=0.7, messages=None):
+        # `messages` (riwayat chat lengkap) dipakai sebagai pengganti prompt tunggal jika diisi
+        payload = {
+            "model": model_name,
+            "messages": messages or [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        response, retries, release = self._post(api_key, payload)
+        ttfb = response.elapsed.total_seconds()
+        try:
+            hasil_json = response.json()
+        except ValueError:
+            raise OpenRouterError("Respons server bukan JSON yang valid.", status_code=response.status_code)
+        finally:
+            release()
+        choices = hasil_json.get("choices") or []
+        if not choices:
+            return Completion("", None, hasil_json.get("usage") or {}, hasil_json.get("model", model_name), retries, ttfb)
+        choice = choices[0]
+        return Completion(
+            ((choice.get("message") or {}).get("content") or "").strip(),
+            choice.get("finish_reason"),
+            hasil_json.get("usage") or {},
+            hasil_json.get("model", model_name),
+            retries,
+            ttfb,
+        )
+
+    def stream_chat(self, prompt, api_key, model_name, max_tokens=1200, temperature=0.7, messages=None):
+        # `messages` (riwayat chat lengkap) dipakai sebagai pengganti prompt tunggal jika diisi
+        payload = {
+            "model": model_name,
+            "messages": messages or [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+        response, retries, release = self._post(api_key, payload, stream=True)
+        return ChatStream(response, retries, model_name, release)
+
+
+class ChatStream:
+    """Iterator token dari respons SSE (`stream: true`).
+
+    Setiap iterasi menghasilkan potongan teks baru. Setelah selesai,
+    `text`, `finish_reason` dan `usage` berisi hasil lengkapnya.
+    """
+
+    def __init__(self, response, retries, model_name, release=None):
+        self._response = response
+        self._release = release
+        self.retries = retries
+        self.model = model_name
+        self.finish_reason = None
+        self.usage = {}
+        self._parts = []
+
+    @property
+    def text(self):
+        return "".join(self._parts).strip()
+
+    def __iter__(self):
+        try:
+            for raw_line in self._response.iter_lines():
+                # Baris SSE selalu utuh, jadi aman di-decode per baris
+                line = raw_line.decode("utf-8", errors="replace").strip()
+                if not line.startswith("data:"):
+                    continue  # komentar keep-alive (": OPENROUTER PROCESSING") atau baris kosong
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    continue
+                if chunk.get("error"):
+                    error = chunk["error"]
+                    # Biasanya objek {"message", "code"}, tapi sebagian provider mengirim string saja
+                    if isinstance(error, dict):
+                        raise OpenRouterError(f"Error dari server: {error.get('message', error)}", status_code=error.get("code"))
+                    raise OpenRouterError(f"Error dari server: {error}")
+                if chunk.get("usage"):
+                    self.usage = chunk["usage"]
+                self.model = chunk.get("model", self.model)
+                for choice in chunk.get("choices") or []:
+                    if choice.get("finish_reason"):
+                        self.finish_reason = choice["finish_reason"]
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        self._parts.append(delta)
+                        yield delta
+        except requests.RequestException as e:
+            raise OpenRouterError(f"Error koneksi: {e}") from e
+        finally:
+            self.close()
+
+    def close(self):
+        self._response.close()
+        if self._release is not None:
+            self._release()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client():
+    # Satu klien per proses: pool koneksi dan batas in-flight dipakai bersama
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OpenRouterClient()
+        return _default_client
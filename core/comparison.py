@@ -0,0 +1,298 @@
+"""Perbandingan ide bertahap untuk pool ide yang besar.
+
+Alih-alih memasukkan semua ide ke satu prompt, ide dibagi menjadi beberapa
+kelompok (chunk) yang masing-masing berisi beberapa ide jangkar (anchor) yang
+sama. Setiap kelompok dinilai AI secara paralel, lalu skor antar kelompok
+dikalibrasi memakai skor ide jangkar sehingga bisa digabung menjadi satu
+matriks skor global. Ukuran prompt tetap terbatas (jumlah ide per kelompok x
+panjang maksimum teks ide), berapa pun jumlah ide yang dibandingkan.
+
+Mode ensemble (`bandingkan_ide_ensemble`) menjalankan K perbandingan
+independen secara bersamaan, menumpuk skornya menjadi array K x ide x
+kriteria, lalu melaporkan rata-rata, varians dan interval kepercayaan
+bootstrap, sehingga satu jawaban AI yang "berisik" tidak langsung menentukan
+ide pemenang.
+"""
+import re
+import warnings
+
+import numpy as np
+
+from core.client import OpenRouterError
+from core.parsers import extract_scores_from_table, nama_kriteria
+from core.pipeline import chat_cached, fan_out
+from core.prompts import buat_prompt_perbandingan
+from core.ranking import arah_kriteria, skor_terorientasi
+from core.telemetry import get_telemetry
+
+UKURAN_CHUNK = 6  # Jumlah ide per prompt, termasuk ide jangkar
+JUMLAH_ANCHOR = 2
+MAX_KARAKTER_IDE = 1500
+MAX_WORKERS = 4
+INSTRUKSI_LABEL = "Gunakan label 'Ide N' sesuai nomor ide di atas pada kolom pertama tabel skor."
+JUMLAH_SAMPEL = 5
+N_BOOTSTRAP = 2000
+TINGKAT_KEPERCAYAAN = 0.95
+
+
+def ringkas_ide(ide, max_karakter=MAX_KARAKTER_IDE):
+    # Potong teks ide panjang di batas baris agar ukuran prompt tetap terbatas
+    ide = ide.strip()
+    if len(ide) <= max_karakter:
+        return ide
+    potong = ide.rfind('\n', 0, max_karakter)
+    return ide[:potong if potong > max_karakter // 2 else max_karakter].rstrip() + " ..."
+
+
+def bagi_chunk(jumlah_ide, ukuran_chunk=UKURAN_CHUNK, jumlah_anchor=JUMLAH_ANCHOR):
+    # Mengembalikan (indeks anchor, daftar indeks ide per kelompok); anchor ada di setiap kelompok
+    if jumlah_ide <= ukuran_chunk:
+        return [], [list(range(jumlah_ide))]
+    jumlah_anchor = max(1, min(jumlah_anchor, ukuran_chunk - 1))
+    # Anchor diambil merata di sepanjang daftar (ide dari model/run berbeda ikut terwakili)
+    anchor = sorted({int(round(x)) for x in np.linspace(0, jumlah_ide - 1, jumlah_anchor)})
+    sisa = [i for i in range(jumlah_ide) if i not in anchor]
+    isi = ukuran_chunk - len(anchor)
+    return anchor, [anchor + sisa[i:i + isi] for i in range(0, len(sisa), isi)]
+
+
+def _baris_ke_ide(ide_col, chunk):
+    # Petakan baris tabel ke indeks ide global: lewat nomor "Ide N", atau urutan baris jika jumlahnya pas.
+    # Angka lain di sel (nomor urut baris, "3 langkah" di judul) sengaja tidak dipakai
+    nomor = []
+    for sel in ide_col:
+        match = re.search(r'\bIde\s*(\d+)', str(sel), re.IGNORECASE)
+        nomor.append(int(match.group(1)) - 1 if match else None)
+    if len(set(nomor)) == len(nomor) and all(n in chunk for n in nomor):
+        return nomor
+    if len(ide_col) == len(chunk):
+        return list(chunk)
+    return None
+
+
+def _matriks_chunk(teks, chunk, kriteria):
+    # Skor satu kelompok sebagai array (jumlah ide di kelompok x jumlah kriteria), NaN jika tidak terbaca
+    ide_col, df_scores = extract_scores_from_table(teks or "")
+    if df_scores is None:
+        return None
+    baris = _baris_ke_ide(list(ide_col), chunk)
+    if baris is None:
+        return None
+    kolom = [nama_kriteria(c).lower() for c in df_scores.columns]
+    target = [nama_kriteria(k).lower() for k in kriteria]
+    if all(t in kolom for t in target):
+        nilai = df_scores.to_numpy(dtype=float)[:, [kolom.index(t) for t in target]]
+    elif len(kolom) == len(target):
+        nilai = df_scores.to_numpy(dtype=float)
+    else:
+        return None
+    matriks = np.full((len(chunk), len(kriteria)), np.nan)
+    posisi = {ide: i for i, ide in enumerate(chunk)}
+    for i, ide in enumerate(baris):
+        matriks[posisi[ide]] = nilai[i]
+    return matriks
+
+
+def kalibrasi_gabung(jumlah_ide, jumlah_kriteria, chunks, matriks_chunk, anchor):
+    """Gabungkan skor per kelompok menjadi satu matriks global.
+
+    Kelompok pertama yang berhasil menjadi acuan; skor kelompok lain digeser
+    per kriteria sebesar rata-rata selisih skor ide jangkar terhadap acuan,
+    lalu skor ide yang muncul di beberapa kelompok (anchor) dirata-rata.
+    """
+    total = np.zeros((jumlah_ide, jumlah_kriteria))
+    jumlah = np.zeros((jumlah_ide, jumlah_kriteria))
+    acuan = None
+    for chunk, matriks in zip(chunks, matriks_chunk):
+        if matriks is None:
+            continue
+        if anchor:
+            skor_anchor = matriks[[chunk.index(a) for a in anchor]]
+            if acuan is None:
+                acuan = skor_anchor
+            else:
+                selisih = acuan - skor_anchor
+                terbaca = ~np.isnan(selisih)
+                geser = np.nansum(selisih, axis=0) / np.maximum(terbaca.sum(axis=0), 1)
+                matriks = np.clip(matriks + geser, 1.0, 5.0)
+        terisi = ~np.isnan(matriks)
+        np.add.at(total, chunk, np.where(terisi, matriks, 0.0))
+        np.add.at(jumlah, chunk, terisi)
+    return np.where(jumlah > 0, total / np.maximum(jumlah, 1), np.nan)
+
+
+def format_skor(nilai):
+    return f"{nilai:.2f}".rstrip('0').rstrip('.')
+
+
+def tabel_markdown(skor, kriteria, indeks):
+    # Tabel skor global dengan format yang sama seperti jawaban AI (dibaca ulang oleh extract_scores_from_table)
+    lines = ["| Ide | " + " | ".join(kriteria) + " |", "|" + "---|" * (len(kriteria) + 1)]
+    for i in indeks:
+        lines.append(f"| Ide {i + 1} | " + " | ".join(format_skor(v) for v in skor[i]) + " |")
+    return "\n".join(lines)
+
+
+def keterangan_label(label_ide, indeks):
+    return "**Keterangan:**\n" + "\n".join(f"- Ide {i + 1}: {label_ide[i]}" for i in indeks)
+
+
+def tanpa_tabel(teks):
+    return "\n".join(l for l in (teks or "").splitlines() if '|' not in l).strip()
+
+
+def bandingkan_ide(ide_list, kriteria, api_key, model_name, use_cache=True, ukuran_chunk=UKURAN_CHUNK,
+                   jumlah_anchor=JUMLAH_ANCHOR, max_karakter=MAX_KARAKTER_IDE, rate_limiter=None,
+                   max_workers=MAX_WORKERS, label_ide=None, sampel=0):
+    """Bandingkan ide dalam kelompok-kelompok paralel lalu gabungkan skornya.
+
+    Mengembalikan dict berisi `hasil` (teks markdown untuk ditampilkan/diparse),
+    `skor` (array ide x kriteria, NaN jika tidak terbaca), `indeks` (ide yang
+    skornya lengkap), `jumlah_chunk` dan `chunk_gagal`. Jika hanya ada satu
+    kelompok, `hasil` adalah jawaban AI apa adanya. `label_ide` (opsional)
+    ditampilkan sebagai keterangan nomor ide di bawah tabel global. `sampel`
+    membedakan jawaban yang di-cache untuk prompt yang sama (mode ensemble).
+    """
+    ide_ringkas = [ringkas_ide(ide, max_karakter) for ide in ide_list]
+    anchor, chunks = bagi_chunk(len(ide_list), ukuran_chunk, jumlah_anchor)
+    bertahap = len(chunks) > 1
+
+    def nilai_chunk(nomor_chunk):
+        chunk = chunks[nomor_chunk]
+        prompt = buat_prompt_perbandingan([ide_ringkas[i] for i in chunk], kriteria, nomor=[i + 1 for i in chunk])
+        if bertahap:
+            prompt += "\n" + INSTRUKSI_LABEL
+        return chat_cached(prompt, api_key, model_name, use_cache=use_cache, rate_limiter=rate_limiter, tahap="perbandingan",
+                           sampel=sampel)
+
+    teks_chunk = [None] * len(chunks)
+    errors = []
+    for nomor_chunk, teks, error in fan_out(nilai_chunk, range(len(chunks)), max_workers=min(max_workers, len(chunks))):
+        if error is not None:
+            if not isinstance(error, OpenRouterError):
+                raise error
+            errors.append(error)
+        teks_chunk[nomor_chunk] = teks
+    if len(errors) == len(chunks):
+        raise errors[0]
+
+    matriks_chunk = [_matriks_chunk(teks, chunk, kriteria) for teks, chunk in zip(teks_chunk, chunks)]
+    for teks, matriks in zip(teks_chunk, matriks_chunk):
+        if teks is not None:
+            get_telemetry().catat_parse("parse_skor", matriks is not None, model_name)
+    skor = kalibrasi_gabung(len(ide_list), len(kriteria), chunks, matriks_chunk, anchor)
+    # Hanya ide dengan skor lengkap yang masuk tabel global (baris ber-NaN tidak bisa diparse ulang)
+    indeks = [i for i in range(len(ide_list)) if not np.isnan(skor[i]).any()]
+    chunk_gagal = [n for n, m in enumerate(matriks_chunk) if m is None]
+
+    if not bertahap:
+        hasil = teks_chunk[0] or ""
+    else:
+        bagian = [tabel_markdown(skor, kriteria, indeks)]
+        if label_ide:
+            bagian.append(keterangan_label(label_ide, indeks))
+        for n, teks in enumerate(teks_chunk):
+            # Ringkasan analisis tiap kelompok (tanpa tabel skor mentahnya)
+            ringkasan = tanpa_tabel(teks)
+            if ringkasan:
+                bagian.append(f"#### Ringkasan Kelompok {n + 1} (Ide {', '.join(str(i + 1) for i in chunks[n])})\n{ringkasan}")
+        hasil = "\n\n".join(bagian)
+    return {'hasil': hasil, 'skor': skor, 'indeks': indeks, 'jumlah_chunk': len(chunks), 'chunk_gagal': chunk_gagal}
+
+
+# --- Perbandingan ensemble (self-consistency) ---
+def statistik_ensemble(sampel_skor, arah, n_bootstrap=N_BOOTSTRAP, tingkat=TINGKAT_KEPERCAYAAN, seed=0):
+    """Ringkasan K sampel skor (array K x ide x kriteria, NaN = tidak terbaca).
+
+    Setiap ulangan bootstrap menarik K sampel dengan pengembalian, disimpan
+    sebagai matriks jumlah tarikan (ulangan x K) sehingga rata-rata semua
+    ulangan cukup satu perkalian matriks. Total per ide = rata-rata skor
+    terorientasi (kriteria cost dibalik), sama seperti bar chart Tab 3.
+    Pemenang hanya ditetapkan jika batas bawah interval selisih totalnya
+    terhadap setiap ide lain di atas 0; jika tidak, `pemenang` = None dan
+    `setara_teratas` berisi ide-ide yang belum bisa dipisahkan dari ide teratas.
+    """
+    sampel_skor = np.asarray(sampel_skor, dtype=float)
+    k = sampel_skor.shape[0]
+    alfa = (1.0 - tingkat) / 2
+    tarikan = np.random.default_rng(seed).multinomial(k, np.full(k, 1.0 / k), size=n_bootstrap).astype(float)
+
+    def bootstrap(x):
+        # Rata-rata tiap ulangan bootstrap untuk array (K x ...) ber-NaN -> (ulangan x ...)
+        datar = x.reshape(k, -1)
+        terbaca = ~np.isnan(datar)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rata = (tarikan @ np.where(terbaca, datar, 0.0)) / (tarikan @ terbaca)
+        return rata.reshape((n_bootstrap,) + x.shape[1:])
+
+    # Ide/kriteria yang tidak pernah terbaca menghasilkan NaN (bukan error) di semua ringkasan
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        rata = np.nanmean(sampel_skor, axis=0)
+        varians = np.nanvar(sampel_skor, axis=0, ddof=1) if k > 1 else np.zeros_like(rata)
+        ci_bawah, ci_atas = np.nanquantile(bootstrap(sampel_skor), [alfa, 1.0 - alfa], axis=0)
+        total_sampel = np.nanmean(skor_terorientasi(sampel_skor, arah), axis=2)  # K x ide
+        total = np.nanmean(total_sampel, axis=0)
+        boot_total = bootstrap(total_sampel)
+        total_ci_bawah, total_ci_atas = np.nanquantile(boot_total, [alfa, 1.0 - alfa], axis=0)
+
+        lengkap = np.flatnonzero(~np.isnan(total))
+        peluang_teratas = np.zeros(len(total))
+        pemenang = None
+        setara_teratas = [int(lengkap[np.argmax(total[lengkap])])] if len(lengkap) else []
+        if k > 1 and len(lengkap) > 1:
+            boot_isi = np.where(np.isnan(boot_total), -np.inf, boot_total)
+            peluang_teratas = np.bincount(np.argmax(boot_isi, axis=1), minlength=len(total)) / n_bootstrap
+            terbaik = int(lengkap[np.argmax(total[lengkap])])
+            lain = [j for j in lengkap if j != terbaik]
+            selisih = boot_total[:, [terbaik]] - boot_total[:, lain]
+            terpisah = np.nanquantile(selisih, alfa, axis=0) > 0
+            if terpisah.all():
+                pemenang = terbaik
+            setara_teratas += [int(j) for j, t in zip(lain, terpisah) if not t]
+    return {
+        'jumlah_sampel': k, 'tingkat': tingkat,
+        'rata': rata, 'varians': varians, 'ci_bawah': ci_bawah, 'ci_atas': ci_atas,
+        'total': total, 'total_ci_bawah': total_ci_bawah, 'total_ci_atas': total_ci_atas,
+        'peluang_teratas': peluang_teratas, 'pemenang': pemenang, 'setara_teratas': setara_teratas,
+    }
+
+
+def bandingkan_ide_ensemble(ide_list, kriteria, api_key, model_name, jumlah_sampel=JUMLAH_SAMPEL, use_cache=True,
+                            rate_limiter=None, label_ide=None, n_bootstrap=N_BOOTSTRAP, **kwargs):
+    """Jalankan `jumlah_sampel` perbandingan independen sekaligus lalu gabungkan skornya.
+
+    Mengembalikan dict seperti `bandingkan_ide` (tabel `hasil` berisi skor
+    rata-rata) ditambah `sampel` (array K x ide x kriteria), `sampel_gagal`
+    dan `statistik` (lihat `statistik_ensemble`). Sampel yang gagal dilewati;
+    error dilempar hanya jika semua sampel gagal.
+    """
+    def satu_sampel(nomor):
+        return bandingkan_ide(ide_list, kriteria, api_key, model_name, use_cache=use_cache, rate_limiter=rate_limiter,
+                              sampel=nomor, **kwargs)
+
+    hasil_sampel = [None] * jumlah_sampel
+    errors = []
+    # Semua sampel dikirim paralel: total waktu ~ satu perbandingan, bukan K kali
+    for nomor, hasil, error in fan_out(satu_sampel, range(jumlah_sampel)):
+        if error is not None:
+            if not isinstance(error, OpenRouterError):
+                raise error
+            errors.append(error)
+        hasil_sampel[nomor] = hasil
+    berhasil = [h for h in hasil_sampel if h is not None]
+    if not berhasil:
+        raise errors[0]
+
+    sampel_skor = np.stack([h['skor'] for h in berhasil])
+    statistik = statistik_ensemble(sampel_skor, arah_kriteria(kriteria), n_bootstrap)
+    indeks = [i for i in range(len(ide_list)) if not np.isnan(statistik['rata'][i]).any()]
+    bagian = [tabel_markdown(statistik['rata'], kriteria, indeks)]
+    if label_ide:
+        bagian.append(keterangan_label(label_ide, indeks))
+    ringkasan = tanpa_tabel(berhasil[0]['hasil'])
+    if ringkasan:
+        bagian.append(f"#### Ringkasan Analisis (sampel 1 dari {len(berhasil)})\n{ringkasan}")
+    return {'hasil': "\n\n".join(bagian), 'skor': statistik['rata'], 'indeks': indeks,
+            'jumlah_chunk': berhasil[0]['jumlah_chunk'], 'chunk_gagal': [], 'sampel': sampel_skor,
+            'sampel_gagal': len(errors), 'statistik': statistik}
@@ -0,0 +1,144 @@
+"""Antrean job latar belakang untuk panggilan AI yang lama.
+
+Generate dan perbandingan ide dijalankan di thread pool milik proses, bukan
+di thread script Streamlit, sehingga UI tidak membeku dan rerun (klik widget
+lain) tidak membuang hasil yang sedang dikerjakan. Pemanggil hanya menyimpan
+`job_id` (misal di `st.session_state`) lalu memeriksa statusnya secara
+berkala. Jumlah job yang berjalan bersamaan dibatasi secara global untuk
+semua sesi; job lain menunggu di antrean.
+
+Fungsi job dipanggil sebagai `fn(job, *args, **kwargs)` dan tidak boleh
+memanggil `st.*`; progres dilaporkan lewat `job.perbarui(...)`.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.environ.get("IDEAGEN_JOB_WORKERS", "8"))
+JOB_TTL = 3600  # Detik job selesai disimpan sebelum dibuang dari memori
+
+ANTRI = "antri"
+BERJALAN = "berjalan"
+SELESAI = "selesai"
+GAGAL = "gagal"
+DIBATALKAN = "dibatalkan"
+
+
+class Job:
+    def __init__(self, job_id, jenis, meta=None):
+        self.id = job_id
+        self.jenis = jenis
+        self.meta = meta or {}  # Data pemanggil untuk menerapkan hasil (label ide, model, dll)
+        self.status = ANTRI
+        self.hasil = None
+        self.error = None
+        self.progres = {}
+        self.dibuat = time.time()
+        self.mulai = None
+        self.selesai = None
+        self._future = None
+
+    @property
+    def aktif(self):
+        return self.status in (ANTRI, BERJALAN)
+
+    @property
+    def durasi(self):
+        if self.mulai is None:
+            return 0.0
+        return (self.selesai or time.time()) - self.mulai
+
+    def perbarui(self, **progres):
+        # Dipanggil dari thread job; dict diganti utuh agar pembaca tidak melihat isi setengah jadi
+        self.progres = {**self.progres, **progres}
+
+
+class JobExecutor:
+    def __init__(self, max_workers=MAX_WORKERS, ttl=JOB_TTL):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ideagen-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, jenis, fn, *args, meta=None, **kwargs):
+        """Masukkan job ke antrean dan kembalikan `job_id`-nya."""
+        self._bersihkan()
+        job = Job(f"{jenis}-{uuid.uuid4().hex[:12]}", jenis, meta)
+        with self._lock:
+            self._jobs[job.id] = job
+        job._future = self._pool.submit(self._jalankan, job, fn, args, kwargs)
+        return job.id
+
+    def _jalankan(self, job, fn, args, kwargs):
+        if job.status == DIBATALKAN:
+            return
+        job.status = BERJALAN
+        job.mulai = time.time()
+        try:
+            hasil = fn(job, *args, **kwargs)
+        except Exception as e:
+            hasil, error = None, e
+        else:
+            error = None
+        if job.status == DIBATALKAN:
+            return
+        job.hasil, job.error = hasil, error
+        job.selesai = time.time()
+        job.status = GAGAL if error is not None else SELESAI
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def batalkan(self, job_id):
+        # Job yang masih antre tidak dijalankan; job yang sedang berjalan tetap selesai tapi hasilnya diabaikan
+        job = self.get(job_id)
+        if job is not None and job.aktif:
+            if job._future is not None:
+                job._future.cancel()
+            job.status = DIBATALKAN
+            job.selesai = time.time()
+
+    def hapus(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def posisi_antrean(self, job_id):
+        # Jumlah job yang antre lebih dulu (0 = berikutnya dijalankan)
+        with self._lock:
+            antre = [j for j in self._jobs.values() if j.status == ANTRI]
+        antre.sort(key=lambda j: j.dibuat)
+        ids = [j.id for j in antre]
+        return ids.index(job_id) if job_id in ids else None
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "antri": sum(j.status == ANTRI for j in jobs),
+            "berjalan": sum(j.status == BERJALAN for j in jobs),
+            "max_workers": self.max_workers,
+        }
+
+    def _bersihkan(self):
+        # Job selesai yang tidak pernah diambil (misal sesi ditutup) dibuang setelah TTL
+        batas = time.time() - self.ttl
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if not j.aktif and (j.selesai or 0) < batas]:
+                del self._jobs[job_id]
+
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # Satu executor per proses: batas worker berlaku untuk semua sesi
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = JobExecutor()
+        return _default_executor
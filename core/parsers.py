@@ -0,0 +1,64 @@
+import re
+
+# pandas sengaja di-import di dalam extract_scores_from_table agar tidak dimuat saat startup
+
+
+# --- Parser Hasil Ide ---
+def parse_ide_list(hasil):
+    ide_list = [x.strip() for x in hasil.split('Ide ')[1:]] if 'Ide 1:' in hasil else []
+    return [ide for ide in ide_list if not ide.lower().startswith('semua ide telah lengkap') and not ide.lower().startswith('setiap ide mencakup')]
+
+
+def get_ide_label(ide_text, idx):
+    lines = ide_text.splitlines()
+    for line in lines:
+        if line.strip() and not line.strip().lower().startswith('deskripsi'):
+            return line.strip()[:60]
+    return f"Ide {idx+1}"
+
+
+# --- Ekstrak tabel skor dari hasil perbandingan ---
+def _baris_tabel(line):
+    return [c.strip() for c in line.split('|') if c.strip()]
+
+
+def _blok_tabel(lines):
+    # Kelompokkan baris tabel markdown yang berurutan menjadi blok-blok terpisah
+    blok = []
+    for line in lines:
+        if '|' in line:
+            blok.append(line)
+        elif blok:
+            yield blok
+            blok = []
+    if blok:
+        yield blok
+
+
+def nama_kriteria(kolom):
+    # "Modal Awal (1-5)" dan "Modal Awal" dianggap kriteria yang sama
+    return re.sub(r'\s*\(.*?\)\s*$', '', str(kolom)).strip()
+
+
+def extract_scores_from_table(text):
+    # Header = baris pertama tiap blok tabel (tidak harus mengandung angka), baris pemisah "---" dilewati
+    header, data = None, []
+    for blok in _blok_tabel(text.splitlines()):
+        rows = [r for r in (_baris_tabel(l) for l in blok) if r and not all(re.match(r'^:?-+:?$', c) for c in r)]
+        if len(rows) < 2:
+            continue
+        header = rows[0]
+        data = [row for row in rows[1:]
+                if len(row) == len(header) and all(re.match(r'^[1-5](?:\.\d+)?$', c) for c in row[1:])]
+        if data:
+            break
+    if not data or len(header) < 2:
+        return None, None
+    import pandas as pd
+    try:
+        df = pd.DataFrame(data, columns=header)
+        for col in df.columns[1:]:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df.iloc[:, 0], df.iloc[:, 1:]
+    except Exception:
+        return None, None
@@ -0,0 +1,169 @@
+"""Alur pemanggilan AI tanpa ketergantungan ke Streamlit.
+
+Fungsi di sini aman dipanggil dari thread lain (tidak memanggil `st.*`);
+error dilempar sebagai `OpenRouterError` dan ditampilkan oleh pemanggil.
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.cache import get_cache, make_cache_key
+from core.client import OpenRouterError, get_client
+from core.parsers import parse_ide_list
+from core.ratelimit import KlienLimiter, estimasi_token, get_limiter
+from core.telemetry import get_telemetry
+
+MAX_TOKENS = 1200  # Ditingkatkan agar output tidak terpotong
+TEMPERATURE = 0.7
+JUMLAH_IDE = 3
+TOKENS_PER_IDE = 450  # Batas token permintaan lanjutan, per ide yang kurang
+
+
+def _request(api_key, model_name, messages, max_tokens, temperature, on_update=None, rate_limiter=None, tahap="chat"):
+    # Satu request ke OpenRouter (streaming jika on_update diisi), mengembalikan (teks, finish_reason).
+    # Hanya request yang benar-benar dikirim yang memakai jatah rate limit. Kuota bersama per
+    # (API key, model) selalu berlaku; `rate_limiter` lama (RateLimiter) menambah jeda lokal di atasnya
+    antrean = rate_limiter if isinstance(rate_limiter, KlienLimiter) else get_limiter().klien()
+    if rate_limiter is not None and rate_limiter is not antrean:
+        rate_limiter.acquire()
+    token = estimasi_token(messages, max_tokens)
+    antrean.acquire(api_key, model_name, token)
+    client = get_client()
+    telemetry = get_telemetry()
+    # Waktu diukur setelah antre rate limit, agar latensi yang tercatat = latensi model
+    mulai = time.monotonic()
+    try:
+        if on_update is None:
+            completion = client.chat(None, api_key, model_name, max_tokens=max_tokens, temperature=temperature, messages=messages)
+            telemetry.catat_panggilan(tahap, model_name, "ok", time.monotonic() - mulai, completion.ttfb, 200,
+                                      completion.usage, completion.retries)
+            antrean.koreksi(api_key, model_name, token, completion.usage.get("total_tokens"))
+            return completion.content, completion.finish_reason
+        teks = ""
+        ttfb = None
+        stream = client.stream_chat(None, api_key, model_name, max_tokens=max_tokens, temperature=temperature, messages=messages)
+        for potongan in stream:
+            if ttfb is None:
+                ttfb = time.monotonic() - mulai  # token pertama
+            teks += potongan
+            on_update(teks)
+        telemetry.catat_panggilan(tahap, model_name, "ok", time.monotonic() - mulai, ttfb, 200, stream.usage,
+                                  stream.retries, stream=True)
+        antrean.koreksi(api_key, model_name, token, stream.usage.get("total_tokens"))
+        return stream.text, stream.finish_reason
+    except OpenRouterError as e:
+        telemetry.catat_panggilan(tahap, model_name, "error", time.monotonic() - mulai, None, e.status_code,
+                                  retries=e.retries, stream=on_update is not None, error=str(e)[:200])
+        raise
+
+
+def chat_cached(prompt, api_key, model_name, use_cache=True, max_tokens=MAX_TOKENS, temperature=TEMPERATURE, rate_limiter=None,
+                tahap="chat", sampel=0):
+    # Prompt yang sama persis ke model yang sama diambil dari cache (per nomor sampel)
+    cache = get_cache()
+    cache_key = make_cache_key(model_name, prompt, temperature, max_tokens, sampel)
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            get_telemetry().catat_panggilan(tahap, model_name, "cache", 0.0)
+            return cached
+    hasil, _ = _request(api_key, model_name, [{"role": "user", "content": prompt}], max_tokens, temperature,
+                        rate_limiter=rate_limiter, tahap=tahap)
+    # Hanya hasil yang berhasil yang disimpan ke cache
+    if hasil:
+        cache.set(cache_key, hasil, model_name)
+    return hasil
+
+
+# --- Deteksi & lanjutan hasil yang terpotong ---
+def _awal_baris_ide(teks, nomor):
+    # Posisi awal baris yang memuat "Ide N:" (agar markup seperti "**" ikut terpotong rapi)
+    match = re.search(rf'^.*?Ide {nomor}\s*:', teks, re.M)
+    return match.start() if match else None
+
+
+def ide_yang_lengkap(hasil, finish_reason):
+    # Jika output terpotong (finish_reason "length", atau tidak diketahui karena dari cache),
+    # ide terakhir kemungkinan belum selesai sehingga tidak dihitung
+    ide_list = parse_ide_list(hasil)
+    if finish_reason == "length" or (finish_reason is None and len(ide_list) < JUMLAH_IDE):
+        return ide_list[:-1]
+    return ide_list
+
+
+def buat_prompt_lanjutan(nomor_awal, jumlah_ide=JUMLAH_IDE):
+    daftar = ', '.join(f'Ide {i}' for i in range(nomor_awal, jumlah_ide + 1))
+    return (f"Jawaban di atas terpotong. Lanjutkan dengan menulis HANYA {daftar} "
+            f"dengan poin dan format yang sama (Ide {nomor_awal}:...). "
+            f"Jangan ulangi ide sebelumnya dan pastikan output selesai hingga Ide {jumlah_ide}.")
+
+
+def generate_ide_lengkap(prompt, api_key, model_name, use_cache=True, on_update=None, rate_limiter=None,
+                         max_lanjutan=2, temperature=TEMPERATURE):
+    """Generate ide; jika hasil terpotong, minta HANYA ide yang kurang lalu sambungkan.
+
+    Mengembalikan (hasil, jumlah_permintaan_lanjutan). Hasil yang sudah
+    disambung disimpan ke cache dengan kunci prompt aslinya.
+    """
+    cache = get_cache()
+    cache_key = make_cache_key(model_name, prompt, temperature, MAX_TOKENS)
+    hasil = cache.get(cache_key) if use_cache else None
+    finish_reason = None
+    baru = hasil is None
+    if baru:
+        hasil, finish_reason = _request(api_key, model_name, [{"role": "user", "content": prompt}], MAX_TOKENS,
+                                        temperature, on_update, rate_limiter, tahap="generate")
+    else:
+        get_telemetry().catat_panggilan("generate", model_name, "cache", 0.0)
+        if on_update is not None:
+            on_update(hasil)
+
+    lanjutan = 0
+    while hasil and lanjutan < max_lanjutan:
+        ide_lengkap = ide_yang_lengkap(hasil, finish_reason)
+        if not ide_lengkap or len(ide_lengkap) >= JUMLAH_IDE:
+            break
+        nomor_awal = len(ide_lengkap) + 1
+        # Buang ide terakhir yang terpotong, lalu bawa sisa output sebagai riwayat percakapan
+        potong = _awal_baris_ide(hasil, nomor_awal)
+        dipertahankan = (hasil[:potong] if potong is not None else hasil).rstrip()
+        messages = [
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": dipertahankan},
+            {"role": "user", "content": buat_prompt_lanjutan(nomor_awal)},
+        ]
+        max_tokens = min(MAX_TOKENS, TOKENS_PER_IDE * (JUMLAH_IDE - len(ide_lengkap)))
+        update_lanjutan = None
+        if on_update is not None:
+            def update_lanjutan(teks, awal=dipertahankan):
+                on_update(awal + "\n\n" + teks)
+        tambahan, finish_reason = _request(api_key, model_name, messages, max_tokens, temperature,
+                                           update_lanjutan, rate_limiter, tahap="lanjutan")
+        lanjutan += 1
+        mulai = _awal_baris_ide(tambahan, nomor_awal)
+        tambahan = (tambahan[mulai:] if mulai is not None else tambahan).strip()
+        if not tambahan:
+            break
+        hasil = dipertahankan + "\n\n" + tambahan
+
+    if hasil and (baru or lanjutan):
+        cache.set(cache_key, hasil, model_name)
+    jumlah_ide = len(parse_ide_list(hasil or ""))
+    get_telemetry().catat_parse("parse_ide", jumlah_ide >= JUMLAH_IDE, model_name, jumlah_ide)
+    return hasil, lanjutan
+
+
+def fan_out(fn, items, max_workers=None):
+    # Jalankan fn(item) secara paralel dan hasilkan (item, hasil, error) sesuai urutan selesai,
+    # sehingga total waktu ~ item paling lambat, bukan jumlah semuanya
+    items = list(items)
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers or len(items)) as pool:
+        futures = {pool.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
@@ -0,0 +1,29 @@
+# --- Prompt Generator ---
+KRITERIA_DEFAULT = ["Potensi Pasar", "Kesulitan Implementasi", "Inovasi", "Modal Awal"]
+
+
+def buat_prompt_ide(segmen, pain_point, tren, kompetitor):
+    return f"""Buatkan 3 ide produk/layanan baru untuk riset pasar berikut:
+- Segmen pasar: {segmen}
+- Masalah konsumen: {pain_point}
+- Tren pasar: {tren}
+- Kompetitor: {kompetitor}
+Untuk setiap ide, berikan:
+1. Deskripsi singkat ide
+2. Analisis potensi target pasar
+3. Saran strategi pemasaran awal
+4. Potensi keunggulan kompetitif
+5. Prediksi tantangan/riskonya
+6. Poin-poin SWOT sederhana
+Format: Ide 1:..., Ide 2:..., Ide 3:...
+Pastikan SEMUA ide lengkap, tidak ada bagian yang terpotong, dan output selesai hingga Ide 3."""
+
+
+def buat_prompt_perbandingan(ide_terpilih, kriteria, nomor=None):
+    # `nomor` = nomor global tiap ide (dipakai saat perbandingan dibagi per kelompok)
+    nomor = nomor or range(1, len(ide_terpilih) + 1)
+    return f"""Bandingkan ide-ide berikut berdasarkan kriteria:
+Kriteria: {', '.join(kriteria)}
+Ide:
+{chr(10).join([f'{n}. {ide}' for n, ide in zip(nomor, ide_terpilih)])}
+Untuk setiap ide, beri skor (1-5) yang disajikan dalam format tabel, pastikan didalam tabel skor hanya ada format angka tanpa perlu penjelasan di tabel skor. lalu berikan Ringkasan Analisis dari poin-poin dibawah tabel."""
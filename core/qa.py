@@ -0,0 +1,238 @@
+"""Tanya AI dengan konteks yang dipangkas.
+
+Setiap ide di `last_ide` diindeks per bagian (deskripsi, pasar, strategi,
+keunggulan, tantangan, SWOT). Untuk setiap pertanyaan hanya bagian yang
+relevan yang dikirim (misal "ide 2" -> Ide 2 saja, "strategi" -> bagian
+strategi pemasaran), ditambah ringkasan singkat percakapan sebelumnya.
+Jumlah token prompt dibatasi dan dilaporkan ke pemanggil.
+"""
+import re
+
+from core.parsers import get_ide_label
+
+MAX_TOKEN_PROMPT = 900
+MAX_TOKEN_RIWAYAT = 180
+KARAKTER_PER_TOKEN = 4  # Perkiraan kasar untuk teks Indonesia/Inggris
+
+# Urutan sesuai poin di prompt generate ide (1-6)
+BAGIAN = ['deskripsi', 'pasar', 'strategi', 'keunggulan', 'tantangan', 'swot']
+JUDUL_BAGIAN = {
+    'deskripsi': 'Deskripsi',
+    'pasar': 'Analisis Target Pasar',
+    'strategi': 'Strategi Pemasaran',
+    'keunggulan': 'Keunggulan Kompetitif',
+    'tantangan': 'Tantangan/Risiko',
+    'swot': 'SWOT',
+    'umum': 'Isi Ide',
+}
+KATA_KUNCI_BAGIAN = {
+    'deskripsi': ('deskripsi', 'konsep', 'apa itu', 'jelaskan', 'produk', 'layanan'),
+    'pasar': ('pasar', 'target', 'segmen', 'konsumen', 'pelanggan', 'market', 'demografi'),
+    'strategi': ('strategi', 'pemasaran', 'marketing', 'promosi', 'iklan', 'branding', 'jual'),
+    'keunggulan': ('keunggulan', 'kompetitif', 'kompetitor', 'pesaing', 'unggul', 'diferensiasi', 'beda'),
+    'tantangan': ('tantangan', 'risiko', 'resiko', 'hambatan', 'kendala', 'masalah'),
+    'swot': ('swot', 'kekuatan', 'kelemahan', 'peluang', 'ancaman'),
+}
+# Pertanyaan finansial tidak punya bagian khusus; jawabannya paling dekat dengan bagian berikut
+KATA_KUNCI_FINANSIAL = ('modal', 'omset', 'omzet', 'biaya', 'harga', 'untung', 'laba', 'bep', 'balik modal')
+BAGIAN_FINANSIAL = ['deskripsi', 'pasar', 'strategi']
+KATA_SEMUA_IDE = ('semua ide', 'ketiga ide', 'kedua ide', 'tiap ide', 'setiap ide', 'masing-masing', 'bandingkan', 'terbaik')
+
+_HEADER_BAGIAN = re.compile(r'^(\s*)(?:#+\s*)?(?:\*\*)?\s*(\d)[.)]\s*(.*)$')
+_RUJUKAN_IDE = re.compile(r'\bide\s*(?:ke\s*-?\s*|no\.?\s*|nomor\s*)?(\d+)', re.I)
+
+
+def estimasi_token(teks):
+    return (len(teks) + KARAKTER_PER_TOKEN - 1) // KARAKTER_PER_TOKEN
+
+
+def potong_token(teks, max_token):
+    # Potong teks agar muat dalam max_token (di batas kata bila memungkinkan)
+    max_karakter = max_token * KARAKTER_PER_TOKEN
+    if len(teks) <= max_karakter:
+        return teks
+    potong = teks.rfind(' ', 0, max_karakter - 4)
+    return teks[:potong if potong > 0 else max_karakter - 4].rstrip() + " ..."
+
+
+def _judul_bagian(baris):
+    # Hanya judul poin (sebelum ":" atau penutup "**"), bukan isi, yang dipakai menebak jenis bagian
+    return re.match(r'^[*\s]*([^:*]{0,80})', baris).group(1).strip().lower()
+
+
+def _jenis_bagian(judul, nomor):
+    """Jenis bagian dari judul poin dan nomornya (1-6 sesuai prompt generate ide).
+
+    Kata kunci dicocokkan di awal kata ("pemasaran" tidak dianggap "pasar").
+    Nomor dipakai jika judul cocok dengannya atau tidak memuat kata kunci apa pun.
+    """
+    cocok = [b for b in BAGIAN if any(re.search(rf'\b{re.escape(k)}', judul) for k in KATA_KUNCI_BAGIAN[b])]
+    dari_nomor = BAGIAN[nomor - 1] if 1 <= nomor <= len(BAGIAN) else None
+    if dari_nomor is not None and (not cocok or dari_nomor in cocok):
+        return dari_nomor
+    return cocok[0] if cocok else None
+
+
+def pecah_bagian(ide_text):
+    """Pecah teks satu ide menjadi dict {bagian: teks}.
+
+    Baris bernomor 1-6 di awal baris (tidak menjorok) dianggap judul bagian;
+    jenisnya ditebak dari judul poin dan nomornya (lihat `_jenis_bagian`).
+    Teks sebelum bagian pertama (judul ide) dibuang.
+    """
+    bagian = {}
+    aktif = None
+    baris_ide = ide_text.splitlines()[1:]
+    for line in baris_ide:
+        match = _HEADER_BAGIAN.match(line)
+        if match and not match.group(1):
+            nomor = int(match.group(2))
+            jenis = _jenis_bagian(_judul_bagian(match.group(3)), nomor)
+            if jenis is not None:
+                aktif = jenis
+                isi = re.sub(r'^\**\s*[^:]{0,60}:\**\s*', '', match.group(3)).strip()
+                bagian.setdefault(aktif, [])
+                if isi:
+                    bagian[aktif].append(isi)
+                continue
+        # Baris yang hanya berisi markup (mis. sisa "**" dari judul ide berikutnya) dilewati
+        if aktif is not None and line.strip().strip('*#-_ '):
+            bagian[aktif].append(line.strip())
+    if not bagian:
+        isi = '\n'.join(l.strip() for l in baris_ide if l.strip().strip('*#-_ '))
+        return {'umum': isi} if isi else {}
+    return {k: '\n'.join(v) for k, v in bagian.items() if v}
+
+
+def judul_ide(ide_text, idx):
+    # Label ide tanpa nomor hasil split ("1: ...") dan markup tebal
+    return re.sub(r'^\d+\s*:\s*', '', get_ide_label(ide_text, idx).replace('*', '')).strip() or f"Ide {idx + 1}"
+
+
+def indeks_ide(ide_list):
+    # Indeks per ide: judul + bagian-bagiannya
+    return [
+        {'nomor': i + 1, 'judul': judul_ide(ide, i), 'bagian': pecah_bagian(ide)}
+        for i, ide in enumerate(ide_list)
+    ]
+
+
+def cari_rujukan_ide(pertanyaan, indeks):
+    # Nomor ide yang disebut ("ide 2", "ide ke-3"), atau judul ide yang disebut
+    pertanyaan_lower = pertanyaan.lower()
+    nomor = [int(n) for n in _RUJUKAN_IDE.findall(pertanyaan)]
+    nomor = [n for n in dict.fromkeys(nomor) if 1 <= n <= len(indeks)]
+    if nomor:
+        return nomor
+    if any(k in pertanyaan_lower for k in KATA_SEMUA_IDE):
+        return [ide['nomor'] for ide in indeks]
+    disebut = []
+    for ide in indeks:
+        kata = [k for k in re.findall(r'\w+', ide['judul'].lower()) if len(k) > 3]
+        if kata and sum(k in pertanyaan_lower for k in kata) >= max(1, min(2, len(kata) // 2)):
+            disebut.append(ide['nomor'])
+    return disebut
+
+
+def cari_bagian(pertanyaan):
+    pertanyaan_lower = pertanyaan.lower()
+    bagian = [b for b in BAGIAN if any(k in pertanyaan_lower for k in KATA_KUNCI_BAGIAN[b])]
+    if any(k in pertanyaan_lower for k in KATA_KUNCI_FINANSIAL):
+        bagian += [b for b in BAGIAN_FINANSIAL if b not in bagian]
+    return bagian
+
+
+class TanyaAI:
+    """Mesin tanya-jawab untuk satu set ide, dengan memori percakapan.
+
+    Simpan satu instance per hasil ide (misal di session_state); buat ulang
+    jika ide berubah.
+    """
+
+    def __init__(self, ide_list, max_token_prompt=MAX_TOKEN_PROMPT, max_token_riwayat=MAX_TOKEN_RIWAYAT):
+        self.indeks = indeks_ide(ide_list)
+        self.max_token_prompt = max_token_prompt
+        self.max_token_riwayat = max_token_riwayat
+        self.riwayat = []
+        self._ide_terakhir = []
+
+    def ringkasan_riwayat(self):
+        # Giliran terbaru diutamakan; tiap giliran diringkas menjadi pertanyaan + awal jawaban
+        baris = []
+        sisa = self.max_token_riwayat
+        for giliran in reversed(self.riwayat):
+            jawaban = potong_token(' '.join(giliran['jawaban'].split()), 40)
+            item = f"- T: {potong_token(giliran['pertanyaan'], 25)} | J: {jawaban}"
+            if estimasi_token(item) > sisa:
+                break
+            baris.insert(0, item)
+            sisa -= estimasi_token(item)
+        return '\n'.join(baris)
+
+    def buat_prompt(self, pertanyaan):
+        """Susun prompt untuk satu pertanyaan.
+
+        Mengembalikan (prompt, info) dengan info berisi `ide` (nomor ide yang
+        dikirim), `bagian`, `token` (perkiraan token prompt), `batas` dan
+        `terpotong` (True jika ada konteks yang dipotong agar muat).
+        """
+        pertanyaan = potong_token(pertanyaan.strip(), self.max_token_prompt // 4)
+        nomor = cari_rujukan_ide(pertanyaan, self.indeks)
+        # Pertanyaan lanjutan tanpa rujukan ide memakai ide dari pertanyaan sebelumnya
+        if not nomor:
+            nomor = self._ide_terakhir or [ide['nomor'] for ide in self.indeks]
+        bagian_diminta = cari_bagian(pertanyaan)
+
+        riwayat = self.ringkasan_riwayat()
+        pembuka = "Berikut bagian ide dan analisis yang relevan:\n"
+        penutup = ("\n\nJawab pertanyaan berikut secara spesifik dan ringkas, gunakan data dari ide di atas jika relevan."
+                   f"\nPertanyaan: {pertanyaan}")
+        if riwayat:
+            penutup = f"\n\nRingkasan percakapan sebelumnya:\n{riwayat}" + penutup
+        sisa = self.max_token_prompt - estimasi_token(pembuka + penutup)
+
+        konteks, ide_terkirim, bagian_terkirim, terpotong = [], [], set(), False
+        for posisi, n in enumerate(nomor):
+            # Sisa jatah dibagi rata ke ide yang belum diproses agar ide terakhir tidak selalu terpotong
+            # (minimal ~60 token per ide; jika ide terlalu banyak, ide sisanya tidak dikirim)
+            jatah_ide = min(max(sisa // (len(nomor) - posisi), 60), sisa)
+            if jatah_ide < 30:
+                terpotong = True
+                break
+            ide = self.indeks[n - 1]
+            blok = [f"### Ide {n}: {ide['judul']}"]
+            jatah = jatah_ide - estimasi_token(blok[0])
+            urutan = [b for b in (bagian_diminta or BAGIAN + ['umum']) if b in ide['bagian']]
+            if bagian_diminta and not urutan:
+                # Bagian yang ditanyakan tidak ditemukan di ide ini: kirim isi ide yang ada
+                urutan = [b for b in BAGIAN + ['umum'] if b in ide['bagian']]
+            for b in urutan:
+                teks = f"**{JUDUL_BAGIAN[b]}:** {ide['bagian'][b]}"
+                if jatah <= 10:
+                    terpotong = True
+                    break
+                if estimasi_token(teks) > jatah:
+                    teks = potong_token(teks, jatah)
+                    terpotong = True
+                blok.append(teks)
+                bagian_terkirim.add(b)
+                jatah -= estimasi_token(teks) + 1
+            konteks.append('\n'.join(blok))
+            ide_terkirim.append(n)
+            sisa -= estimasi_token('\n'.join(blok)) + 1
+
+        prompt = pembuka + '\n\n'.join(konteks) + penutup
+        self._ide_terakhir = nomor
+        info = {
+            'ide': ide_terkirim,
+            'bagian': [b for b in BAGIAN + ['umum'] if b in bagian_terkirim],
+            'token': estimasi_token(prompt),
+            'batas': self.max_token_prompt,
+            'terpotong': terpotong,
+        }
+        return prompt, info
+
+    def catat(self, pertanyaan, jawaban):
+        # Simpan giliran tanya-jawab untuk ringkasan percakapan berikutnya
+        if jawaban:
+            self.riwayat.append({'pertanyaan': pertanyaan, 'jawaban': jawaban})
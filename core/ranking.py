@@ -0,0 +1,125 @@
+"""Mesin peringkat multi-kriteria berbasis NumPy untuk matriks skor ide.
+
+Matriks skor berukuran (jumlah ide x jumlah kriteria) dengan skala 1-5,
+seperti keluaran `extract_scores_from_table`. Setiap kriteria punya arah:
+benefit (+1, makin tinggi makin baik) atau cost (-1, makin rendah makin baik,
+misal "Kesulitan Implementasi" dan "Modal Awal"). Semua perhitungan
+divektorisasi sehingga ribuan ide x puluhan kriteria selesai dalam milidetik.
+"""
+import numpy as np
+
+SKALA_MIN = 1.0
+SKALA_MAX = 5.0
+KATA_KUNCI_BIAYA = ('kesulitan', 'modal', 'biaya', 'risiko', 'resiko', 'waktu implementasi', 'kompleksitas')
+
+
+def arah_kriteria(kriteria):
+    # +1 untuk kriteria benefit, -1 untuk kriteria cost (ditebak dari nama kriteria)
+    return np.array([-1.0 if any(k in str(nama).lower() for k in KATA_KUNCI_BIAYA) else 1.0 for nama in kriteria])
+
+
+def normalisasi_bobot(bobot, jumlah_kriteria):
+    if bobot is None:
+        return np.full(jumlah_kriteria, 1.0 / jumlah_kriteria)
+    bobot = np.clip(np.asarray(bobot, dtype=float), 0, None)
+    total = bobot.sum(axis=-1, keepdims=True)
+    return np.divide(bobot, total, out=np.full_like(bobot, 1.0 / jumlah_kriteria), where=total > 0)
+
+
+def isi_nilai_kosong(skor):
+    # NaN (skor tidak terbaca) diganti rata-rata kriterianya agar netral terhadap peringkat
+    skor = np.asarray(skor, dtype=float)
+    if not np.isnan(skor).any():
+        return skor
+    rata_kolom = np.nanmean(np.where(np.isnan(skor).all(axis=0), SKALA_MIN, skor), axis=0)
+    return np.where(np.isnan(skor), rata_kolom, skor)
+
+
+def skor_terorientasi(skor, arah):
+    # Balik kriteria cost (x -> 6 - x pada skala 1-5) sehingga makin tinggi selalu makin baik
+    skor = np.asarray(skor, dtype=float)
+    return np.where(np.asarray(arah) < 0, SKALA_MAX + SKALA_MIN - skor, skor)
+
+
+def weighted_sum(skor, bobot=None, arah=None):
+    skor = isi_nilai_kosong(skor)
+    arah = np.ones(skor.shape[1]) if arah is None else np.asarray(arah)
+    bobot = normalisasi_bobot(bobot, skor.shape[1])
+    # Normalisasi min-max terhadap skala 1-5 lalu dibobot; hasil 0..1
+    normal = (skor_terorientasi(skor, arah) - SKALA_MIN) / (SKALA_MAX - SKALA_MIN)
+    return normal @ bobot.T
+
+
+def topsis(skor, bobot=None, arah=None):
+    skor = isi_nilai_kosong(skor)
+    arah = np.ones(skor.shape[1]) if arah is None else np.asarray(arah)
+    bobot = normalisasi_bobot(bobot, skor.shape[1])
+    norma = np.sqrt((skor ** 2).sum(axis=0))
+    normal = skor / np.where(norma == 0, 1.0, norma)
+    # Bobot >= 0 sehingga solusi ideal = bobot x ideal matriks ternormalisasi; jarak kuadrat
+    # menjadi perkalian matriks (ide x kriteria) @ (kriteria x sampel) tanpa array 3 dimensi
+    terbaik = np.where(arah > 0, normal.max(axis=0), normal.min(axis=0))
+    terburuk = np.where(arah > 0, normal.min(axis=0), normal.max(axis=0))
+    bobot_kuadrat = (bobot ** 2).T
+    jarak_positif = np.sqrt(np.maximum(((normal - terbaik) ** 2) @ bobot_kuadrat, 0.0))
+    jarak_negatif = np.sqrt(np.maximum(((normal - terburuk) ** 2) @ bobot_kuadrat, 0.0))
+    total = jarak_positif + jarak_negatif
+    # Jika semua ide identik, semua mendapat nilai 0.5
+    return np.divide(jarak_negatif, total, out=np.full_like(total, 0.5), where=total > 0)
+
+
+METODE = {'topsis': topsis, 'weighted_sum': weighted_sum}
+
+
+def peringkat_dari_nilai(nilai, axis=0):
+    # Peringkat 1 = nilai tertinggi (argsort ganda, stabil untuk nilai seri)
+    urutan = np.argsort(-np.asarray(nilai), axis=axis, kind='stable')
+    return np.argsort(urutan, axis=axis, kind='stable') + 1
+
+
+def peringkat_ide(skor, kriteria, bobot=None, arah=None, metode='topsis'):
+    skor = np.asarray(skor, dtype=float)
+    arah = arah_kriteria(kriteria) if arah is None else np.asarray(arah, dtype=float)
+    nilai = METODE[metode](skor, bobot, arah)
+    return {
+        'nilai': nilai,
+        'peringkat': peringkat_dari_nilai(nilai),
+        'urutan': np.argsort(-nilai, kind='stable'),
+        'arah': arah,
+        'bobot': normalisasi_bobot(bobot, skor.shape[1]),
+    }
+
+
+def sensitivitas_peringkat(skor, kriteria, bobot=None, arah=None, metode='topsis',
+                           n_sampel=500, sebaran=0.25, seed=0, ukuran_blok=None):
+    """Uji kestabilan peringkat terhadap perubahan bobot.
+
+    Bobot diacak secara multiplikatif (log-normal, `sebaran` = simpangan
+    baku log) sebanyak `n_sampel` kali. Mengembalikan peluang tiap ide menjadi
+    peringkat 1, rata-rata dan simpangan baku peringkatnya.
+    """
+    skor = np.asarray(skor, dtype=float)
+    jumlah_ide, jumlah_kriteria = skor.shape
+    arah = arah_kriteria(kriteria) if arah is None else np.asarray(arah, dtype=float)
+    dasar = normalisasi_bobot(bobot, jumlah_kriteria)
+    rng = np.random.default_rng(seed)
+    sampel_bobot = normalisasi_bobot(dasar * rng.lognormal(0.0, sebaran, size=(n_sampel, jumlah_kriteria)), jumlah_kriteria)
+
+    # Semua metode menerima banyak set bobot sekaligus -> nilai (ide, sampel); dibagi per blok agar memori terbatas
+    ukuran_blok = ukuran_blok or max(1, int(2_000_000 // max(jumlah_ide, 1)))
+    juara = np.zeros(jumlah_ide)
+    jumlah_peringkat = np.zeros(jumlah_ide)
+    jumlah_kuadrat = np.zeros(jumlah_ide)
+    for mulai in range(0, n_sampel, ukuran_blok):
+        blok = sampel_bobot[mulai:mulai + ukuran_blok]
+        nilai = METODE[metode](skor, blok, arah)
+        peringkat = peringkat_dari_nilai(nilai, axis=0)
+        juara += np.bincount(np.argmax(nilai, axis=0), minlength=jumlah_ide)
+        jumlah_peringkat += peringkat.sum(axis=1)
+        jumlah_kuadrat += (peringkat.astype(float) ** 2).sum(axis=1)
+    rata = jumlah_peringkat / n_sampel
+    return {
+        'peluang_juara': juara / n_sampel,
+        'rata_rata_peringkat': rata,
+        'std_peringkat': np.sqrt(np.maximum(jumlah_kuadrat / n_sampel - rata ** 2, 0.0)),
+    }
@@ -0,0 +1,252 @@
+"""Pembatas laju request ke OpenRouter yang aman dipakai lintas thread.
+
+- `RateLimiter`: jeda sederhana N request per menit (dipakai `batch.py --rpm`).
+- `SharedLimiter`: token bucket per (API key, model) dengan anggaran request
+  per menit dan token per menit, dipakai bersama semua sesi di proses ini.
+  Permintaan yang harus menunggu masuk antrean adil (round-robin antar klien,
+  misal per sesi Streamlit), sehingga satu klien dengan banyak request (batch,
+  fan-out multi-model) tidak membuat sesi lain kelaparan. Jika
+  `IDEAGEN_RATELIMIT_DB` diisi, isi bucket disimpan di SQLite sehingga
+  beberapa proses worker berbagi anggaran yang sama. Mati secara default;
+  aktifkan dengan `IDEAGEN_RPM` dan/atau `IDEAGEN_TPM`.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+DEFAULT_RPM = float(os.environ.get("IDEAGEN_RPM", "0"))  # 0 = request per menit tidak dibatasi
+DEFAULT_TPM = float(os.environ.get("IDEAGEN_TPM", "0"))  # 0 = token per menit tidak dibatasi
+DEFAULT_DB_PATH = os.environ.get("IDEAGEN_RATELIMIT_DB", "")
+KLIEN_DEFAULT = "default"
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Setiap pemanggil memesan slot waktu berikutnya, lalu menunggu di luar lock
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def estimasi_token(messages, max_tokens):
+    # Perkiraan kasar sebelum request: ~4 karakter per token prompt + batas token jawaban
+    return sum(len(m.get("content") or "") for m in messages) // 4 + (max_tokens or 0)
+
+
+def kunci_bucket(api_key, model_name):
+    # API key tidak disimpan apa adanya (juga tidak ke file SQLite)
+    return f"{hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]}:{model_name}"
+
+
+def isi_ulang_dan_ambil(state, now, rpm, tpm, token):
+    """Token bucket: isi ulang sesuai waktu berlalu lalu coba ambil 1 request + `token` token.
+
+    `state` = (sisa_request, sisa_token, waktu_update) atau None (bucket penuh).
+    Mengembalikan (state_baru, tunggu_detik); tunggu 0 berarti kuota berhasil diambil.
+    Permintaan yang lebih besar dari kapasitas dibatasi ke kapasitas agar tidak menunggu selamanya.
+    """
+    sisa_req, sisa_tok, updated = state if state is not None else (rpm, tpm, now)
+    berlalu = max(0.0, now - updated)
+    sisa_req = min(rpm, sisa_req + berlalu * rpm / 60.0) if rpm else 0.0
+    sisa_tok = min(tpm, sisa_tok + berlalu * tpm / 60.0) if tpm else 0.0
+    butuh_tok = min(token, tpm)
+    tunggu = 0.0
+    if rpm and sisa_req < 1.0:
+        tunggu = max(tunggu, (1.0 - sisa_req) * 60.0 / rpm)
+    if tpm and sisa_tok < butuh_tok:
+        tunggu = max(tunggu, (butuh_tok - sisa_tok) * 60.0 / tpm)
+    if tunggu == 0.0:
+        sisa_req -= 1.0 if rpm else 0.0
+        sisa_tok -= butuh_tok if tpm else 0.0
+    return (sisa_req, sisa_tok, now), tunggu
+
+
+class _BucketMemori:
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def ambil(self, kunci, rpm, tpm, token):
+        with self._lock:
+            self._state[kunci], tunggu = isi_ulang_dan_ambil(self._state.get(kunci), time.time(), rpm, tpm, token)
+        return tunggu
+
+    def koreksi(self, kunci, tpm, selisih):
+        # Selisih token aktual vs perkiraan (positif = ditagih tambahan, negatif = dikembalikan)
+        with self._lock:
+            state = self._state.get(kunci)
+            if state is not None and tpm:
+                self._state[kunci] = (state[0], min(tpm, state[1] - selisih), state[2])
+
+
+class _BucketSqlite:
+    # Bucket bersama antar proses: setiap ambil/koreksi dalam satu transaksi BEGIN IMMEDIATE
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (kunci TEXT PRIMARY KEY, req REAL, tok REAL, updated REAL)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _transaksi(self, kunci, ubah):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT req, tok, updated FROM buckets WHERE kunci = ?", (kunci,)).fetchone()
+            state, hasil = ubah(row)
+            if state is not None:
+                conn.execute("INSERT OR REPLACE INTO buckets (kunci, req, tok, updated) VALUES (?, ?, ?, ?)",
+                             (kunci,) + tuple(state))
+            conn.execute("COMMIT")
+            return hasil
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def ambil(self, kunci, rpm, tpm, token):
+        return self._transaksi(kunci, lambda row: isi_ulang_dan_ambil(row, time.time(), rpm, tpm, token))
+
+    def koreksi(self, kunci, tpm, selisih):
+        def ubah(row):
+            if row is None or not tpm:
+                return None, None
+            return (row[0], min(tpm, row[1] - selisih), row[2]), None
+        self._transaksi(kunci, ubah)
+
+
+class SharedLimiter:
+    """Token bucket (request/menit + token/menit) per (API key, model) dengan antrean adil.
+
+    Pemanggil yang harus menunggu dilayani bergiliran per klien: klien yang
+    baru datang tidak perlu menunggu seluruh antrean klien lain habis.
+    """
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, db_path=DEFAULT_DB_PATH):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._bucket = _BucketSqlite(db_path) if db_path else _BucketMemori()
+        self._cond = threading.Condition()
+        self._antrean = defaultdict(lambda: defaultdict(deque))  # kunci -> klien -> tiket
+        self._giliran = defaultdict(deque)  # kunci -> urutan klien (round-robin)
+
+    def klien(self, nama=KLIEN_DEFAULT):
+        return KlienLimiter(self, nama)
+
+    def _kepala(self, kunci):
+        giliran = self._giliran[kunci]
+        return self._antrean[kunci][giliran[0]][0] if giliran else None
+
+    def acquire(self, api_key, model_name, token=0, klien=KLIEN_DEFAULT):
+        """Tunggu hingga kuota tersedia dan giliran klien ini tiba. Mengembalikan lama menunggu (detik)."""
+        if not self.rpm and not self.tpm:
+            return 0.0
+        kunci = kunci_bucket(api_key, model_name)
+        tiket = object()
+        mulai = time.monotonic()
+        with self._cond:
+            antrean_klien = self._antrean[kunci][klien]
+            if not antrean_klien:
+                self._giliran[kunci].append(klien)
+            antrean_klien.append(tiket)
+        while True:
+            with self._cond:
+                while self._kepala(kunci) is not tiket:
+                    self._cond.wait(timeout=1.0)
+            # Hanya kepala antrean yang mengambil kuota; bucket (SQLite bisa menunggu proses lain)
+            # diakses di luar lock agar antrean model/klien lain tidak ikut tertahan
+            try:
+                tunggu = self._bucket.ambil(kunci, self.rpm, self.tpm, token)
+            except BaseException:
+                with self._cond:
+                    self._lepas(kunci, klien)
+                raise
+            with self._cond:
+                if tunggu == 0.0:
+                    self._lepas(kunci, klien)
+                    return time.monotonic() - mulai
+                # Lock dilepas selama menunggu; kepala antrean bangun sendiri saat kuota terisi
+                self._cond.wait(timeout=min(tunggu, 1.0))
+
+    def _lepas(self, kunci, klien):
+        # Tiket terdepan selesai: klien pindah ke belakang giliran jika masih punya tiket
+        giliran = self._giliran[kunci]
+        antrean_klien = self._antrean[kunci][klien]
+        antrean_klien.popleft()
+        giliran.popleft()
+        if antrean_klien:
+            giliran.append(klien)
+        else:
+            del self._antrean[kunci][klien]
+        self._cond.notify_all()
+
+    def koreksi(self, api_key, model_name, estimasi, aktual):
+        # Setelah respons diterima, anggaran token disesuaikan dengan pemakaian sebenarnya
+        if self.tpm and aktual is not None:
+            self._bucket.koreksi(kunci_bucket(api_key, model_name), self.tpm, aktual - min(estimasi, self.tpm))
+
+    def posisi(self, klien):
+        """Posisi antrean klien: jumlah request klien lain yang dilayani lebih dulu
+        dari request terdepan klien ini, per model (dict kunci -> posisi)."""
+        hasil = {}
+        with self._cond:
+            for kunci, giliran in self._giliran.items():
+                if klien in giliran:
+                    # Round-robin: setiap klien di depan dalam giliran dilayani satu kali lebih dulu
+                    hasil[kunci.split(":", 1)[1]] = list(giliran).index(klien)
+        return hasil
+
+    def stats(self):
+        with self._cond:
+            return {kunci.split(":", 1)[1]: sum(len(q) for q in antrean.values())
+                    for kunci, antrean in self._antrean.items() if antrean}
+
+
+class KlienLimiter:
+    # SharedLimiter yang terikat ke satu klien; bisa dioper sebagai `rate_limiter` ke fungsi pipeline
+    def __init__(self, limiter, nama):
+        self.limiter = limiter
+        self.nama = nama
+
+    def acquire(self, api_key, model_name, token=0):
+        return self.limiter.acquire(api_key, model_name, token, klien=self.nama)
+
+    def koreksi(self, api_key, model_name, estimasi, aktual):
+        self.limiter.koreksi(api_key, model_name, estimasi, aktual)
+
+    def posisi(self):
+        return self.limiter.posisi(self.nama)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    # Satu limiter per proses: kuota per API key & model dipakai bersama semua sesi
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = SharedLimiter()
+        return _default_limiter
@@ -0,0 +1,98 @@
+"""Routing model berbasis latensi: hedged request dan fallback otomatis.
+
+Model utama dikirim lebih dulu. Jika belum selesai setelah p95 latensinya
+(dari jendela telemetri terbaru), permintaan yang sama juga dikirim ke model
+cadangan terbaik; hasil valid pertama yang dipakai. Jika satu model gagal
+(error API, timeout, atau output yang tidak bisa di-parse), model berikutnya
+langsung dicoba, sehingga pengguna tidak perlu mengganti model sendiri.
+"""
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from core.client import OpenRouterError
+from core.telemetry import get_telemetry
+
+JENDELA = 50  # Panggilan terakhir per model yang dipakai untuk statistik
+MIN_SAMPEL = 5  # Di bawah ini p95 belum dipercaya, pakai batas default
+BATAS_HEDGE_DEFAULT = 20.0  # detik
+BATAS_HEDGE_MIN = 2.0
+ERROR_RATE_MAKS = 0.5  # Model utama yang lebih sering gagal dari ini dicoba paling akhir
+STATUS_BERHENTI = (401, 402)  # Masalah API key/kredit: model lain pasti gagal juga
+
+HasilRouting = namedtuple("HasilRouting", ["hasil", "model", "dicoba"])
+
+
+def batas_hedge(model_name, tahap):
+    # Lama menunggu model sebelum permintaan cadangan dikirim: p95 latensi terbaru model tsb
+    stat = get_telemetry().statistik_model(model_name, tahap, JENDELA)
+    if stat["p95_s"] is None or stat["n"] - round(stat["error_rate"] * stat["n"]) < MIN_SAMPEL:
+        return BATAS_HEDGE_DEFAULT
+    return max(BATAS_HEDGE_MIN, stat["p95_s"])
+
+
+def urutkan_model(utama, cadangan, tahap):
+    """Urutan percobaan: model utama lalu cadangan (tingkat error terendah, lalu p50 tercepat)."""
+    telemetry = get_telemetry()
+    stat = {m: telemetry.statistik_model(m, tahap, JENDELA) for m in dict.fromkeys([utama, *cadangan])}
+
+    def skor(m):
+        # Model tanpa data latensi dianggap sedang-sedang saja (di belakang model yang terbukti cepat)
+        return (round(stat[m]["error_rate"], 1), stat[m]["p50_s"] if stat[m]["p50_s"] is not None else BATAS_HEDGE_DEFAULT)
+
+    urutan = sorted((m for m in stat if m != utama), key=skor)
+    if stat[utama]["n"] >= MIN_SAMPEL and stat[utama]["error_rate"] > ERROR_RATE_MAKS:
+        return urutan + [utama]
+    return [utama] + urutan
+
+
+def jalankan_routing(fn, models, valid=bool, tahap="chat", hedge=True):
+    """Jalankan `fn(model_name)` dengan hedging & fallback sesuai urutan `models`.
+
+    Mengembalikan `HasilRouting(hasil, model, dicoba)` dari hasil valid pertama.
+    Jika tidak ada yang valid, hasil terakhir yang tidak kosong dikembalikan;
+    jika semua model error, error terakhir dilempar ulang. Error 401/402
+    (API key tidak valid / kredit habis) langsung dilempar tanpa fallback.
+    """
+    sisa = deque(models)
+    pool = ThreadPoolExecutor(max_workers=len(sisa) or 1)
+    berjalan = {}  # future -> model
+    dicoba = []
+    cadangan, error_terakhir = None, None
+
+    def kirim():
+        model_name = sisa.popleft()
+        dicoba.append(model_name)
+        berjalan[pool.submit(fn, model_name)] = model_name
+
+    try:
+        kirim()
+        while berjalan:
+            batas = batas_hedge(dicoba[-1], tahap) if hedge and sisa else None
+            selesai, _ = wait(berjalan, timeout=batas, return_when=FIRST_COMPLETED)
+            if not selesai:
+                kirim()  # Model terakhir lebih lambat dari p95-nya: kirim duplikat ke model berikutnya
+                continue
+            for future in selesai:
+                model_name = berjalan.pop(future)
+                try:
+                    hasil = future.result()
+                except OpenRouterError as e:
+                    if e.status_code in STATUS_BERHENTI:
+                        raise
+                    error_terakhir = e
+                    continue
+                except Exception as e:
+                    error_terakhir = e
+                    continue
+                if valid(hasil):
+                    return HasilRouting(hasil, model_name, list(dicoba))
+                if hasil:
+                    cadangan = HasilRouting(hasil, model_name, list(dicoba))
+            if not berjalan and sisa:
+                kirim()  # Semua yang berjalan gagal: fallback ke model berikutnya
+        if cadangan is not None or error_terakhir is None:
+            return cadangan or HasilRouting("", dicoba[-1] if dicoba else None, list(dicoba))
+        raise error_terakhir
+    finally:
+        # Permintaan yang kalah dibiarkan selesai di latar belakang (hasilnya tetap masuk cache)
+        pool.shutdown(wait=False)
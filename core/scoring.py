@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from core.prompts import KRITERIA_DEFAULT
+from core.ranking import arah_kriteria, skor_terorientasi
+
+
+def rata_rata_per_ide(df_scores, ide_labels):
+    # Pastikan jumlah bar dan label sesuai ide yang dipilih
+    ide_labels = list(ide_labels)
+    # Kriteria cost (Kesulitan Implementasi, Modal Awal) dibalik dulu agar rata-rata tinggi = lebih unggul
+    terorientasi = skor_terorientasi(df_scores.to_numpy(dtype=float), arah_kriteria(df_scores.columns))
+    mean_scores = pd.DataFrame(terorientasi, index=df_scores.index, columns=df_scores.columns).mean(axis=1)
+    # Jika jumlah mean_scores tidak sama dengan jumlah ide_labels, sesuaikan
+    if len(mean_scores) > len(ide_labels):
+        mean_scores = mean_scores[:len(ide_labels)]
+    elif len(mean_scores) < len(ide_labels):
+        ide_labels = ide_labels[:len(mean_scores)]
+    return ide_labels, mean_scores
+
+
+def indeks_tertinggi(values):
+    # Indeks semua nilai yang setara dengan nilai maksimum (bisa lebih dari 1)
+    values = np.asarray(values, dtype=float)
+    return [int(i) for i in np.flatnonzero(np.isclose(values, np.nanmax(values)))]
+
+
+def cari_kriteria_favorit(kriteria_list):
+    # Kriteria favorit user = kriteria tambahan terakhir (selain default)
+    for k in reversed(kriteria_list or []):
+        if k not in KRITERIA_DEFAULT:
+            return k
+    return None
+
+
+def terbaik_pada_kriteria(df_scores, kriteria):
+    # Indeks ide terbaik pada satu kriteria: skor tertinggi untuk benefit, terendah untuk cost
+    skor = df_scores[kriteria].to_numpy(dtype=float)
+    return indeks_tertinggi(skor_terorientasi(skor, arah_kriteria([kriteria])))
@@ -0,0 +1,300 @@
+"""Penyimpanan riwayat brief, ide dan hasil perbandingan (SQLite lokal).
+
+Setiap brief (segmen, pain point, tren, kompetitor), ide yang dihasilkan
+beserta modelnya, dan tabel perbandingan disimpan permanen sehingga tidak
+hilang saat sesi berakhir. Teks ide diindeks dengan FTS5 untuk pencarian
+riwayat, dan setiap brief diberi signature MinHash (dengan indeks LSH) agar
+brief yang hampir sama ("mahasiswa urban" vs "Mahasiswa Urban, kost mahal")
+bisa dikenali dan hasil lamanya ditawarkan sebelum memanggil AI lagi.
+"""
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from contextlib import contextmanager
+
+from core.qa import judul_ide
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "IDEAGEN_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "idea_store.sqlite"),
+)
+FIELD_BRIEF = ("segmen", "pain_point", "tren", "kompetitor")
+
+# MinHash: 128 permutasi dibagi 32 band x 4 baris -> brief dengan kemiripan >= ~0.5 hampir pasti jadi kandidat
+JUMLAH_PERMUTASI = 128
+BARIS_PER_BAND = 4
+AMBANG_MIRIP = 0.6
+_PRIMA = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTASI = [(_rng.randrange(1, _PRIMA), _rng.randrange(0, _PRIMA)) for _ in range(JUMLAH_PERMUTASI)]
+
+
+# --- Normalisasi & MinHash ---
+def normalisasi_teks(teks):
+    # Huruf kecil, tanpa aksen/tanda baca, kata unik diurutkan (urutan & kapitalisasi tidak berpengaruh)
+    teks = unicodedata.normalize("NFKD", teks or "").encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(sorted(set(re.findall(r"[a-z0-9]+", teks))))
+
+
+def normalisasi_brief(brief):
+    return " | ".join(normalisasi_teks(brief.get(field, "")) for field in FIELD_BRIEF)
+
+
+def shingle(teks_normal):
+    # Kata utuh + trigram huruf per kata, sehingga "kost"/"kos" atau salah ketik kecil tetap mirip.
+    # Field tidak dibedakan: isi yang sama di kolom berbeda (segmen vs pain point) tetap dianggap mirip
+    hasil = set()
+    for kata in teks_normal.replace("|", " ").split():
+        hasil.add(kata)
+        kata = f" {kata} "
+        hasil.update(kata[i:i + 3] for i in range(len(kata) - 2))
+    return hasil
+
+
+def minhash(shingles):
+    if not shingles:
+        return [0] * JUMLAH_PERMUTASI
+    nilai = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    return [min((a * x + b) % _PRIMA for x in nilai) for a, b in _PERMUTASI]
+
+
+def band_lsh(signature):
+    # Hash tiap band; brief yang berbagi minimal satu band menjadi kandidat mirip
+    return [
+        (band, zlib.crc32(json.dumps(signature[i:i + BARIS_PER_BAND]).encode("ascii")))
+        for band, i in enumerate(range(0, len(signature), BARIS_PER_BAND))
+    ]
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _query_fts(query):
+    # Setiap kata jadi prefix-term ber-tanda kutip agar input bebas tidak merusak sintaks FTS5
+    kata = re.findall(r"\w+", query or "")
+    return " ".join(f'"{k}"*' for k in kata)
+
+
+class IdeaStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.fts = False
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS briefs ("
+                " id INTEGER PRIMARY KEY, segmen TEXT, pain_point TEXT, tren TEXT, kompetitor TEXT,"
+                " kriteria TEXT, normal TEXT UNIQUE, created_at REAL);"
+                "CREATE TABLE IF NOT EXISTS brief_lsh (band INTEGER, hash INTEGER, brief_id INTEGER);"
+                "CREATE INDEX IF NOT EXISTS idx_brief_lsh ON brief_lsh(band, hash);"
+                "CREATE TABLE IF NOT EXISTS generasi ("
+                " id INTEGER PRIMARY KEY, brief_id INTEGER, model TEXT, hasil TEXT, created_at REAL);"
+                "CREATE INDEX IF NOT EXISTS idx_generasi_brief ON generasi(brief_id);"
+                "CREATE TABLE IF NOT EXISTS ide ("
+                " id INTEGER PRIMARY KEY, generasi_id INTEGER, nomor INTEGER, model TEXT, judul TEXT, isi TEXT);"
+                "CREATE INDEX IF NOT EXISTS idx_ide_generasi ON ide(generasi_id);"
+                "CREATE TABLE IF NOT EXISTS perbandingan ("
+                " id INTEGER PRIMARY KEY, generasi_id INTEGER, model TEXT, label_ide TEXT, kriteria TEXT,"
+                " hasil TEXT, created_at REAL);"
+                "CREATE INDEX IF NOT EXISTS idx_perbandingan_generasi ON perbandingan(generasi_id);"
+            )
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS ide_fts USING fts5("
+                    " judul, isi, brief, tokenize='unicode61 remove_diacritics 2')"
+                )
+                self.fts = True
+            except sqlite3.OperationalError:
+                pass  # SQLite tanpa FTS5: pencarian memakai LIKE
+
+    @contextmanager
+    def _connect(self):
+        # Koneksi baru per operasi: aman dipakai lintas thread dan lintas proses
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Simpan ---
+    def simpan_brief(self, brief, kriteria=None):
+        """Simpan brief (dict berisi FIELD_BRIEF) dan kembalikan id-nya.
+
+        Brief yang isinya sama setelah dinormalisasi memakai id yang sudah ada.
+        """
+        if not self.path:
+            return None
+        normal = normalisasi_brief(brief)
+        with self._connect() as conn:
+            row = conn.execute("SELECT id FROM briefs WHERE normal = ?", (normal,)).fetchone()
+            if row is not None:
+                return row[0]
+            brief_id = conn.execute(
+                "INSERT INTO briefs (segmen, pain_point, tren, kompetitor, kriteria, normal, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                tuple(brief.get(field, "") for field in FIELD_BRIEF) + (json.dumps(kriteria or []), normal, time.time()),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO brief_lsh (band, hash, brief_id) VALUES (?, ?, ?)",
+                [(band, h, brief_id) for band, h in band_lsh(minhash(shingle(normal)))],
+            )
+            return brief_id
+
+    def simpan_generasi(self, brief_id, hasil, ide_list, ide_model, model=""):
+        if not self.path:
+            return None
+        teks_brief = ""
+        with self._connect() as conn:
+            row = conn.execute("SELECT segmen, pain_point, tren, kompetitor FROM briefs WHERE id = ?", (brief_id,)).fetchone()
+            if row is not None:
+                teks_brief = " ".join(x for x in row if x)
+            generasi_id = conn.execute(
+                "INSERT INTO generasi (brief_id, model, hasil, created_at) VALUES (?, ?, ?, ?)",
+                (brief_id, model, hasil, time.time()),
+            ).lastrowid
+            for nomor, (ide, model_ide) in enumerate(zip(ide_list, ide_model), start=1):
+                judul = judul_ide(ide, nomor - 1)
+                ide_id = conn.execute(
+                    "INSERT INTO ide (generasi_id, nomor, model, judul, isi) VALUES (?, ?, ?, ?, ?)",
+                    (generasi_id, nomor, model_ide, judul, ide),
+                ).lastrowid
+                if self.fts:
+                    conn.execute("INSERT INTO ide_fts (rowid, judul, isi, brief) VALUES (?, ?, ?, ?)",
+                                 (ide_id, judul, ide, teks_brief))
+            return generasi_id
+
+    def simpan_perbandingan(self, generasi_id, hasil, label_ide, kriteria, model=""):
+        if not self.path or generasi_id is None:
+            return None
+        with self._connect() as conn:
+            return conn.execute(
+                "INSERT INTO perbandingan (generasi_id, model, label_ide, kriteria, hasil, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (generasi_id, model, json.dumps(label_ide), json.dumps(kriteria), hasil, time.time()),
+            ).lastrowid
+
+    # --- Cari ---
+    def cari_brief_mirip(self, brief, ambang=AMBANG_MIRIP, limit=3):
+        """Brief tersimpan yang mirip (Jaccard shingle >= ambang) dan punya hasil generate.
+
+        Kandidat diambil lewat indeks LSH MinHash, lalu diurutkan dengan
+        kemiripan sebenarnya. Mengembalikan list dict berisi `brief_id`,
+        `kemiripan`, field brief, `generasi_id` terbaru, `model` dan `waktu`.
+        """
+        if not self.path:
+            return []
+        normal = normalisasi_brief(brief)
+        shingles = shingle(normal)
+        bands = band_lsh(minhash(shingles))
+        with self._connect() as conn:
+            kandidat = conn.execute(
+                "SELECT DISTINCT brief_id FROM brief_lsh WHERE " + " OR ".join(["(band = ? AND hash = ?)"] * len(bands)),
+                [x for band in bands for x in band],
+            ).fetchall()
+            if not kandidat:
+                return []
+            rows = conn.execute(
+                "SELECT b.id, b.segmen, b.pain_point, b.tren, b.kompetitor, b.normal, g.id, g.model, g.created_at"
+                " FROM briefs b JOIN generasi g ON g.id = (SELECT MAX(id) FROM generasi WHERE brief_id = b.id)"
+                f" WHERE b.id IN ({','.join('?' * len(kandidat))})",
+                [k[0] for k in kandidat],
+            ).fetchall()
+        hasil = []
+        for row in rows:
+            kemiripan = jaccard(shingles, shingle(row[5]))
+            if kemiripan >= ambang:
+                hasil.append({
+                    "brief_id": row[0], "kemiripan": kemiripan, **dict(zip(FIELD_BRIEF, row[1:5])),
+                    "generasi_id": row[6], "model": row[7], "waktu": row[8],
+                })
+        hasil.sort(key=lambda x: (-x["kemiripan"], -x["waktu"]))
+        return hasil[:limit]
+
+    def cari(self, query, limit=20):
+        # Pencarian teks di semua ide tersimpan (judul, isi, dan brief asalnya), hasil terbaru dulu jika skor sama
+        if not self.path or not _query_fts(query):
+            return []
+        with self._connect() as conn:
+            if self.fts:
+                rows = conn.execute(
+                    "SELECT i.id, i.generasi_id, i.nomor, i.model, i.judul,"
+                    " snippet(ide_fts, 1, '**', '**', ' ... ', 16), g.created_at"
+                    " FROM ide_fts JOIN ide i ON i.id = ide_fts.rowid JOIN generasi g ON g.id = i.generasi_id"
+                    " WHERE ide_fts MATCH ? ORDER BY bm25(ide_fts), g.created_at DESC LIMIT ?",
+                    (_query_fts(query), limit),
+                ).fetchall()
+            else:
+                pola = f"%{query.strip()}%"
+                rows = conn.execute(
+                    "SELECT i.id, i.generasi_id, i.nomor, i.model, i.judul, substr(i.isi, 1, 160), g.created_at"
+                    " FROM ide i JOIN generasi g ON g.id = i.generasi_id"
+                    " WHERE i.judul LIKE ? OR i.isi LIKE ? ORDER BY g.created_at DESC LIMIT ?",
+                    (pola, pola, limit),
+                ).fetchall()
+        kolom = ("ide_id", "generasi_id", "nomor", "model", "judul", "cuplikan", "waktu")
+        return [dict(zip(kolom, row)) for row in rows]
+
+    # --- Muat ---
+    def muat_generasi(self, generasi_id):
+        """Hasil generate tersimpan: `hasil` (markdown), `ide_list`, `ide_model`, `brief`
+        dan `perbandingan` terakhir (dict `hasil`/`label_ide`/`kriteria`, atau None)."""
+        if not self.path:
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT g.hasil, g.model, b.segmen, b.pain_point, b.tren, b.kompetitor, b.kriteria"
+                " FROM generasi g LEFT JOIN briefs b ON b.id = g.brief_id WHERE g.id = ?",
+                (generasi_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            ide = conn.execute("SELECT isi, model FROM ide WHERE generasi_id = ? ORDER BY nomor", (generasi_id,)).fetchall()
+            cmp_row = conn.execute(
+                "SELECT hasil, label_ide, kriteria FROM perbandingan WHERE generasi_id = ? ORDER BY id DESC LIMIT 1",
+                (generasi_id,),
+            ).fetchone()
+        return {
+            "generasi_id": generasi_id,
+            "hasil": row[0],
+            "model": row[1],
+            "brief": dict(zip(FIELD_BRIEF, row[2:6])),
+            "kriteria": json.loads(row[6] or "[]"),
+            "ide_list": [r[0] for r in ide],
+            "ide_model": [r[1] for r in ide],
+            "perbandingan": None if cmp_row is None else {
+                "hasil": cmp_row[0], "label_ide": json.loads(cmp_row[1]), "kriteria": json.loads(cmp_row[2]),
+            },
+        }
+
+    def stats(self):
+        if not self.path:
+            return {"briefs": 0, "generasi": 0, "ide": 0, "perbandingan": 0}
+        with self._connect() as conn:
+            return {tabel: conn.execute(f"SELECT COUNT(*) FROM {tabel}").fetchone()[0]
+                    for tabel in ("briefs", "generasi", "ide", "perbandingan")}
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    # Satu instance per proses, dipakai bersama oleh semua sesi Streamlit
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = IdeaStore()
+        return _default_store
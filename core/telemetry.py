@@ -0,0 +1,246 @@
+"""Telemetri per panggilan AI: latensi, token, status, retry dan hasil parsing.
+
+Setiap panggilan ke OpenRouter (dan setiap langkah parsing) dicatat sebagai
+satu event. Event ditulis ke log JSON-lines (opsional), diringkas menjadi metrik format
+teks Prometheus (file dan/atau endpoint HTTP opsional), dan disimpan di
+memori untuk menghitung p50/p95 latensi per model di sidebar.
+
+Konfigurasi lewat environment:
+- IDEAGEN_TELEMETRY_LOG  : file JSONL event (default "" = mati; isi path untuk mengaktifkan)
+- IDEAGEN_METRICS_PATH   : file metrik Prometheus (default .cache/metrics.prom, "" = mati)
+- IDEAGEN_METRICS_PORT   : jika diisi, metrik juga disajikan di http://HOST:PORT/metrics
+- IDEAGEN_METRICS_HOST   : alamat bind endpoint metrik (default 127.0.0.1; "0.0.0.0" = semua interface)
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+# Log event tumbuh tanpa batas selama aplikasi berjalan, jadi hanya ditulis jika diminta
+DEFAULT_LOG_PATH = os.environ.get("IDEAGEN_TELEMETRY_LOG", "")
+DEFAULT_METRICS_PATH = os.environ.get("IDEAGEN_METRICS_PATH", os.path.join(_CACHE_DIR, "metrics.prom"))
+METRICS_PORT = os.environ.get("IDEAGEN_METRICS_PORT")
+METRICS_HOST = os.environ.get("IDEAGEN_METRICS_HOST", "127.0.0.1")
+
+BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+
+def persentil(values, q):
+    # Persentil nearest-rank tanpa numpy (sidebar dirender saat startup)
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(q * len(values) + 0.5)) - 1))]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label(**labels):
+    isi = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + isi + "}" if isi else ""
+
+
+class Telemetry:
+    def __init__(self, log_path=DEFAULT_LOG_PATH, metrics_path=DEFAULT_METRICS_PATH, max_events=5000,
+                 metrics_interval=5.0):
+        self.log_path = log_path
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=max_events)  # event panggilan jaringan terbaru (untuk persentil)
+        self._requests = defaultdict(int)  # (model, tahap, status) -> jumlah
+        self._durasi = defaultdict(lambda: [0] * (len(BUCKETS) + 1) + [0.0])  # (model, tahap) -> bucket.., sum
+        self._ttfb = defaultdict(lambda: [0] * (len(BUCKETS) + 1) + [0.0])
+        self._tokens = defaultdict(int)  # (model, jenis) -> jumlah
+        self._retries = defaultdict(int)  # model -> jumlah
+        self._parse = defaultdict(int)  # (tahap, hasil) -> jumlah
+        self._last_metrics_write = 0.0
+        for path in (log_path, metrics_path):
+            if path:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # --- Pencatatan ---
+    def catat_panggilan(self, tahap, model, status, wall_s, ttfb_s=None, http_status=None, usage=None,
+                        retries=0, stream=False, error=None):
+        """Catat satu panggilan AI. `status`: "ok", "error" atau "cache" (cache hit, tanpa request)."""
+        usage = usage or {}
+        event = {
+            "ts": round(time.time(), 3), "jenis": "panggilan", "tahap": tahap, "model": model, "status": status,
+            "http_status": http_status, "wall_s": round(wall_s, 4),
+            "ttfb_s": None if ttfb_s is None else round(ttfb_s, 4),
+            "prompt_tokens": usage.get("prompt_tokens"), "completion_tokens": usage.get("completion_tokens"),
+            "retries": retries, "stream": stream, "error": error,
+        }
+        with self._lock:
+            self._requests[(model, tahap, status)] += 1
+            if status != "cache":
+                self._events.append(event)
+                self._observe(self._durasi[(model, tahap)], wall_s)
+                if ttfb_s is not None:
+                    self._observe(self._ttfb[(model, tahap)], ttfb_s)
+                self._retries[model] += retries
+                for jenis in ("prompt", "completion"):
+                    self._tokens[(model, jenis)] += usage.get(f"{jenis}_tokens") or 0
+        self._tulis(event)
+
+    def catat_parse(self, tahap, ok, model=None, jumlah=None):
+        # Hasil parsing output AI (mis. parse_ide, parse_skor); gagal parse tidak lagi diam-diam
+        event = {"ts": round(time.time(), 3), "jenis": "parse", "tahap": tahap, "model": model,
+                 "ok": bool(ok), "jumlah": jumlah}
+        with self._lock:
+            self._parse[(tahap, "ok" if ok else "gagal")] += 1
+        self._tulis(event)
+
+    @staticmethod
+    def _observe(histogram, nilai):
+        for i, batas in enumerate(BUCKETS):
+            if nilai <= batas:
+                histogram[i] += 1
+        histogram[len(BUCKETS)] += 1  # +Inf (= count)
+        histogram[-1] += nilai
+
+    def _tulis(self, event):
+        if self.log_path:
+            line = json.dumps(event, ensure_ascii=False) + "\n"
+            with self._lock:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        # File metrik ditulis ulang paling sering tiap `metrics_interval` detik
+        if self.metrics_path and time.monotonic() - self._last_metrics_write >= self.metrics_interval:
+            self.tulis_metrics()
+
+    # --- Ekspor ---
+    def prometheus_text(self):
+        with self._lock:
+            requests_ = dict(self._requests)
+            durasi = {k: list(v) for k, v in self._durasi.items()}
+            ttfb = {k: list(v) for k, v in self._ttfb.items()}
+            tokens = dict(self._tokens)
+            retries = dict(self._retries)
+            parse = dict(self._parse)
+        lines = [
+            "# HELP ideagen_requests_total Panggilan AI per model, tahap dan status (cache = cache hit).",
+            "# TYPE ideagen_requests_total counter",
+        ]
+        lines += [f"ideagen_requests_total{_label(model=m, tahap=t, status=s)} {n}"
+                  for (m, t, s), n in sorted(requests_.items())]
+        for nama, keterangan, data in (
+            ("ideagen_request_duration_seconds", "Waktu total panggilan AI (wall time).", durasi),
+            ("ideagen_ttfb_seconds", "Waktu hingga byte/token pertama diterima.", ttfb),
+        ):
+            lines += [f"# HELP {nama} {keterangan}", f"# TYPE {nama} histogram"]
+            for (m, t), hist in sorted(data.items()):
+                for i, batas in enumerate(BUCKETS):
+                    lines.append(f"{nama}_bucket{_label(model=m, tahap=t, le=batas)} {hist[i]}")
+                lines.append(f"{nama}_bucket{_label(model=m, tahap=t, le='+Inf')} {hist[len(BUCKETS)]}")
+                lines.append(f"{nama}_sum{_label(model=m, tahap=t)} {hist[-1]:.6f}")
+                lines.append(f"{nama}_count{_label(model=m, tahap=t)} {hist[len(BUCKETS)]}")
+        lines += ["# HELP ideagen_tokens_total Token prompt/completion yang dilaporkan OpenRouter.",
+                  "# TYPE ideagen_tokens_total counter"]
+        lines += [f"ideagen_tokens_total{_label(model=m, jenis=j)} {n}" for (m, j), n in sorted(tokens.items())]
+        lines += ["# HELP ideagen_retries_total Jumlah retry (429/5xx/koneksi) per model.",
+                  "# TYPE ideagen_retries_total counter"]
+        lines += [f"ideagen_retries_total{_label(model=m)} {n}" for m, n in sorted(retries.items())]
+        lines += ["# HELP ideagen_parse_total Hasil parsing output AI per tahap.",
+                  "# TYPE ideagen_parse_total counter"]
+        lines += [f"ideagen_parse_total{_label(tahap=t, hasil=h)} {n}" for (t, h), n in sorted(parse.items())]
+        return "\n".join(lines) + "\n"
+
+    def tulis_metrics(self, path=None):
+        path = path or self.metrics_path
+        self._last_metrics_write = time.monotonic()
+        if not path:
+            return
+        # Tulis ke file sementara lalu rename agar scraper tidak membaca file setengah jadi
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    # --- Ringkasan untuk UI ---
+    def ringkasan_per_model(self):
+        # p50/p95 latensi & TTFB per model dari event jaringan terbaru (cache hit tidak dihitung)
+        with self._lock:
+            events = list(self._events)
+            parse = dict(self._parse)
+        per_model = defaultdict(list)
+        for event in events:
+            per_model[event["model"]].append(event)
+        hasil = {}
+        for model, items in per_model.items():
+            ok = [e for e in items if e["status"] == "ok"]
+            ttfb = [e["ttfb_s"] for e in ok if e["ttfb_s"] is not None]
+            hasil[model] = {
+                "n": len(items),
+                "error": len(items) - len(ok),
+                "p50_s": persentil([e["wall_s"] for e in ok], 0.5),
+                "p95_s": persentil([e["wall_s"] for e in ok], 0.95),
+                "ttfb_p50_s": persentil(ttfb, 0.5),
+                "completion_tokens": sum(e["completion_tokens"] or 0 for e in ok),
+            }
+        parse_ringkas = {}
+        for (tahap, status), n in parse.items():
+            parse_ringkas.setdefault(tahap, {"ok": 0, "gagal": 0})[status] += n
+        return hasil, parse_ringkas
+
+    def statistik_model(self, model, tahap=None, jendela=50):
+        # Latensi & tingkat error dari `jendela` panggilan jaringan terakhir satu model (untuk routing)
+        with self._lock:
+            events = [e for e in reversed(self._events) if e["model"] == model and tahap in (None, e["tahap"])]
+        events = events[:jendela]
+        ok = [e["wall_s"] for e in events if e["status"] == "ok"]
+        return {
+            "n": len(events),
+            "error_rate": (len(events) - len(ok)) / len(events) if events else 0.0,
+            "p50_s": persentil(ok, 0.5),
+            "p95_s": persentil(ok, 0.95),
+        }
+
+
+def start_metrics_server(telemetry, port, host=METRICS_HOST):
+    # Endpoint /metrics sederhana (thread daemon) untuk di-scrape Prometheus; default hanya localhost
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = telemetry.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="ideagen-metrics").start()
+    return server
+
+
+_default_telemetry = None
+_default_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    # Satu pencatat per proses: metrik dari semua sesi digabung
+    global _default_telemetry
+    with _default_telemetry_lock:
+        if _default_telemetry is None:
+            _default_telemetry = Telemetry()
+            # Pastikan file metrik memuat event terakhir saat proses (mis. batch) selesai
+            atexit.register(_default_telemetry.tulis_metrics)
+            if METRICS_PORT:
+                try:
+                    start_metrics_server(_default_telemetry, METRICS_PORT)
+                except OSError:
+                    pass  # port sudah dipakai proses lain; file metrik tetap ditulis
+        return _default_telemetry
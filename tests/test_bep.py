@@ -0,0 +1,23 @@
+import warnings
+
+import numpy as np
+
+from core.bep import bulan_bep, inflasi_bulanan, monte_carlo
+
+
+def test_bep_dasar_tidak_dibatasi_horizon():
+    assert bulan_bep(100e6, 3e6, 2e6) == 100
+
+
+def test_inflasi_minus_100_persen_atau_kurang():
+    # Regresi: inflasi <= -100% dulu menghasilkan -1/NaN sehingga BEP dianggap tidak tercapai
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        for tahunan in (-1.0, -1.5, -3.0):
+            inflasi = inflasi_bulanan(tahunan)
+            assert not np.isnan(inflasi)
+            bulan = bulan_bep(10e6, 3e6, 2e6, inflasi=inflasi)
+            assert np.isfinite(bulan) and bulan <= 10
+            assert bulan_bep(10e6, 3e6, 2e6, inflasi=tahunan) == bulan_bep(10e6, 3e6, 2e6, inflasi=-0.99)
+        sampel = monte_carlo(10e6, 3e6, 2e6, inflasi=-2.0, n_sampel=1000)
+        assert np.isfinite(sampel).all()
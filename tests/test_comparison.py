@@ -0,0 +1,33 @@
+import numpy as np
+
+from core.comparison import _baris_ke_ide, _matriks_chunk
+
+KRITERIA = ['Potensi Pasar', 'Inovasi']
+
+
+def tabel(baris):
+    isi = '\n'.join(f"| {ide} | {a} | {b} |" for ide, a, b in baris)
+    return f"| Ide | Potensi Pasar | Inovasi |\n|---|---|---|\n{isi}\n\nRingkasan Analisis: ..."
+
+
+def test_nomor_ide_global():
+    assert _baris_ke_ide(['Ide 1', 'Ide 6', '**Ide 7**'], [0, 5, 6]) == [0, 5, 6]
+
+
+def test_angka_lain_di_label_diabaikan():
+    # Nomor urut baris dan angka di judul tidak boleh dibaca sebagai nomor ide
+    chunk = [0, 2, 11]
+    baris = ['1. Ide 12 – 3 langkah', '2. Ide 1: Kos 3 lantai', '3. Ide 3']
+    assert _baris_ke_ide(baris, chunk) == [11, 0, 2]
+
+
+def test_chunk_lanjutan_dinomori_ulang_pakai_urutan_baris():
+    # Model menomori ulang baris kelompok kedua jadi Ide 1..n: dipetakan sesuai urutan, bukan ke ide 1..n global
+    chunk = [0, 4, 5, 6]
+    teks = tabel([('Ide 1', 5, 1), ('Ide 2', 4, 2), ('Ide 3', 3, 3), ('Ide 4', 2, 4)])
+    matriks = _matriks_chunk(teks, chunk, KRITERIA)
+    np.testing.assert_array_equal(matriks, [[5, 1], [4, 2], [3, 3], [2, 4]])
+
+
+def test_jumlah_baris_tidak_cocok():
+    assert _baris_ke_ide(['Ide 1', 'Ide 2'], [0, 4, 5]) is None